@@ -24,7 +24,8 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# (pulado quando a própria API aplica as migrações: ver backend/database/migracoes.py)
+if config.config_file_name is not None and config.attributes.get("configurar_log", True):
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
@@ -73,6 +74,14 @@ def run_migrations_online() -> None:
     # Get the alembic config object
     config_ = context.config
 
+    # Conexão já aberta por backend/database/migracoes.py (que segura o advisory lock)
+    conexao = config_.attributes.get("connection")
+    if conexao is not None:
+        context.configure(connection=conexao, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     # Set the sqlalchemy.url dynamically from .env
     DATABASE_HOST = os.getenv("DATABASE_HOST")
     DATABASE_NAME = os.getenv("DATABASE_NAME")
@@ -83,7 +92,7 @@ def run_migrations_online() -> None:
     config_.set_main_option('sqlalchemy.url', url)
 
     connectable = engine_from_config(
-        config_.get_section(config_.main_section, {}),
+        config_.get_section(config_.config_ini_section, {}),
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
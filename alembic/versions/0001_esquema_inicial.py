@@ -0,0 +1,103 @@
+"""esquema inicial
+
+Tabelas como criadas até aqui por Base.metadata.create_all. Bancos que já
+existiam são aceitos como estão (IF NOT EXISTS), então `alembic upgrade head`
+funciona tanto em banco novo quanto em banco criado pelo create_all.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "cadastros",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nome", sa.String(255), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("telefone", sa.String(20)),
+        sa.Column("data_nascimento", sa.Date()),
+        sa.Column("endereco", sa.String(500)),
+        sa.Column("data_criacao", sa.DateTime()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_cadastros_id", "cadastros", ["id"], if_not_exists=True)
+    op.create_index("ix_cadastros_email", "cadastros", ["email"], unique=True, if_not_exists=True)
+
+    op.create_table(
+        "funcionarios",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nome", sa.String(255), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("telefone", sa.String(20)),
+        sa.Column("cargo", sa.String(100)),
+        sa.Column("departamento", sa.String(100)),
+        sa.Column("especialidade", sa.String(100)),
+        sa.Column("ativo", sa.Boolean()),
+        sa.Column("data_admissao", sa.Date()),
+        sa.Column("data_criacao", sa.DateTime()),
+        sa.Column("data_atualizacao", sa.DateTime()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_funcionarios_id", "funcionarios", ["id"], if_not_exists=True)
+    op.create_index("ix_funcionarios_email", "funcionarios", ["email"], unique=True, if_not_exists=True)
+
+    op.create_table(
+        "agendamentos",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("titulo", sa.String(255), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("cadastros.id"), nullable=False),
+        sa.Column("data_hora", sa.DateTime(), nullable=False),
+        sa.Column("tipo_sessao", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(30), nullable=False),
+        sa.Column("observacoes", sa.Text()),
+        sa.Column("duracao_em_minutos", sa.Integer()),
+        sa.Column("local", sa.String(255)),
+        sa.Column("profissional_responsavel_id", sa.Integer(), sa.ForeignKey("funcionarios.id")),
+        sa.Column("data_criacao", sa.DateTime()),
+        sa.Column("data_atualizacao", sa.DateTime()),
+        sa.Column("valor", sa.Float()),
+        sa.Column("concluido", sa.Boolean()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_agendamentos_id", "agendamentos", ["id"], if_not_exists=True)
+
+    op.create_table(
+        "agendamento_participantes",
+        sa.Column("agendamento_id", sa.Integer(), sa.ForeignKey("agendamentos.id"), primary_key=True),
+        sa.Column("participante_id", sa.Integer(), sa.ForeignKey("cadastros.id"), primary_key=True),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "metricas_diarias",
+        sa.Column("dia", sa.Date(), primary_key=True),
+        sa.Column("metrica", sa.String(30), primary_key=True),
+        sa.Column("chave", sa.String(50), primary_key=True),
+        sa.Column("quantidade", sa.Integer(), nullable=False),
+        sa.Column("valor_total", sa.Float(), nullable=False),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("metricas_diarias")
+    op.drop_table("agendamento_participantes")
+    op.drop_table("agendamentos")
+    op.drop_table("funcionarios")
+    op.drop_table("cadastros")
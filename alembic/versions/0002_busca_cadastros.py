@@ -0,0 +1,65 @@
+"""busca de cadastros por trigramas
+
+pg_trgm + unaccent, índices GIN sobre nome (sem acentos, minúsculo) e email,
+e a coluna gerada telefone_digitos (só os dígitos do telefone) com índice próprio.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+
+    # unaccent() é STABLE e não pode ser usada em índices; fixar o dicionário
+    # torna o resultado determinístico e permite declarar a função IMMUTABLE
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """
+    )
+
+    op.execute(
+        """
+        ALTER TABLE cadastros ADD COLUMN IF NOT EXISTS telefone_digitos varchar(20)
+        GENERATED ALWAYS AS (regexp_replace(coalesce(telefone, ''), '[^0-9]', '', 'g')) STORED
+        """
+    )
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_cadastros_nome_trgm "
+        "ON cadastros USING gin (lower(f_unaccent(nome)) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_cadastros_email_trgm "
+        "ON cadastros USING gin (lower(email) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_cadastros_telefone_digitos_trgm "
+        "ON cadastros USING gin (telefone_digitos gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_cadastros_telefone_digitos_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_cadastros_email_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_cadastros_nome_trgm")
+    op.execute("ALTER TABLE cadastros DROP COLUMN IF EXISTS telefone_digitos")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
@@ -0,0 +1,71 @@
+"""índices das consultas de agendamentos
+
+Índices compostos casados com os filtros da listagem (aplicar_filtros_agendamento)
+e com a ordenação data_hora desc, id desc; índice parcial para os pendentes;
+índices das buscas reversas por participante e por titular.
+
+Criados com CONCURRENTLY para não bloquear escritas em tabelas grandes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ORDEM = [sa.text("data_hora DESC"), sa.text("id DESC")]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_agendamentos_data_hora_id", "agendamentos", ORDEM,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_agendamentos_status_data_hora", "agendamentos", ["status", *ORDEM],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_agendamentos_tipo_sessao_data_hora", "agendamentos", ["tipo_sessao", *ORDEM],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_agendamentos_pendentes_data_hora", "agendamentos", ORDEM,
+            postgresql_where=sa.text("concluido = false"),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_agendamentos_usuario_id", "agendamentos", ["usuario_id"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_agendamento_participantes_participante_id", "agendamento_participantes", ["participante_id"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nome, tabela in (
+            ("ix_agendamento_participantes_participante_id", "agendamento_participantes"),
+            ("ix_agendamentos_usuario_id", "agendamentos"),
+            ("ix_agendamentos_pendentes_data_hora", "agendamentos"),
+            ("ix_agendamentos_tipo_sessao_data_hora", "agendamentos"),
+            ("ix_agendamentos_status_data_hora", "agendamentos"),
+            ("ix_agendamentos_data_hora_id", "agendamentos"),
+        ):
+            op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,40 @@
+"""índice de agendamentos por profissional responsável
+
+Serve o filtro profissional_responsavel_id da listagem (com a mesma ordenação
+data_hora desc, id desc dos demais índices da migração 0003).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 10:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_agendamentos_profissional_data_hora", "agendamentos",
+            ["profissional_responsavel_id", sa.text("data_hora DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_agendamentos_profissional_data_hora", table_name="agendamentos",
+            postgresql_concurrently=True, if_exists=True,
+        )
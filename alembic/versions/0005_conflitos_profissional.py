@@ -0,0 +1,84 @@
+"""agenda do profissional sem sobreposição
+
+Restrição de exclusão GiST: um mesmo profissional responsável não pode ter dois
+agendamentos não cancelados cujos intervalos [data_hora, data_hora + duração)
+se sobreponham. Se o banco já tiver sobreposições a migração falha listando
+os pares de ids em conflito; resolva-os (cancelando ou reagendando um dos
+agendamentos) e rode `alembic upgrade head` de novo. No modo offline (--sql)
+a checagem não roda: o SQL gerado falha na criação da restrição se houver
+sobreposições.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def periodo(tabela: str = "") -> str:
+    """Intervalo ocupado (mesma expressão de fim_agendamento em disponibilidade_service)"""
+    prefixo = f"{tabela}." if tabela else ""
+    return (
+        f"tsrange({prefixo}data_hora, "
+        f"{prefixo}data_hora + coalesce({prefixo}duracao_em_minutos, 60) * interval '1 minute')"
+    )
+
+
+ATIVOS = "profissional_responsavel_id IS NOT NULL AND status <> 'cancelado'"
+
+
+# Pares listados na mensagem de erro
+PARES_NO_ERRO = 20
+
+
+def verificar_sobreposicoes() -> None:
+    """Falha com os ids dos agendamentos sobrepostos que impedem a restrição"""
+    pares = op.get_bind().execute(sa.text(f"""
+        SELECT a.id, b.id
+        FROM agendamentos a
+        JOIN agendamentos b
+          ON a.profissional_responsavel_id = b.profissional_responsavel_id
+         AND a.id < b.id
+         AND {periodo("a")} && {periodo("b")}
+        WHERE a.status <> 'cancelado' AND b.status <> 'cancelado'
+        ORDER BY a.id, b.id
+        LIMIT {PARES_NO_ERRO + 1}
+    """)).all()
+    if pares:
+        listados = ", ".join(f"{a}/{b}" for a, b in pares[:PARES_NO_ERRO])
+        mais = " (e outros)" if len(pares) > PARES_NO_ERRO else ""
+        raise RuntimeError(
+            "Agendamentos sobrepostos para o mesmo profissional impedem a restrição "
+            f"agendamentos_profissional_sem_sobreposicao: {listados}{mais}. "
+            "Resolva os conflitos e rode a migração de novo."
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    if not context.is_offline_mode():
+        verificar_sobreposicoes()
+
+    op.execute(f"""
+        ALTER TABLE agendamentos
+        ADD CONSTRAINT agendamentos_profissional_sem_sobreposicao
+        EXCLUDE USING gist (profissional_responsavel_id WITH =, {periodo()} WITH &&)
+        WHERE ({ATIVOS})
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE agendamentos DROP CONSTRAINT IF EXISTS agendamentos_profissional_sem_sobreposicao")
@@ -0,0 +1,93 @@
+"""séries de agendamentos (recorrências)
+
+A regra de cada série fica em recorrencias_agendamento (com os participantes em
+recorrencia_participantes); as ocorrências são expandidas na consulta. Uma
+ocorrência editada vira linha em agendamentos com recorrencia_id e
+ocorrencia_dia, únicos juntos, e a expansão passa a pular aquele dia.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "recorrencias_agendamento",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("titulo", sa.String(255), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("cadastros.id"), nullable=False),
+        sa.Column("inicio", sa.DateTime(), nullable=False),
+        sa.Column("frequencia", sa.String(10), nullable=False),
+        sa.Column("intervalo", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("dias_semana", postgresql.ARRAY(sa.Integer()), nullable=False, server_default="{}"),
+        sa.Column("ate", sa.Date()),
+        sa.Column("contagem", sa.Integer()),
+        sa.Column("excecoes", postgresql.ARRAY(sa.Date()), nullable=False, server_default="{}"),
+        sa.Column("tipo_sessao", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(30), nullable=False),
+        sa.Column("observacoes", sa.Text()),
+        sa.Column("duracao_em_minutos", sa.Integer()),
+        sa.Column("local", sa.String(255)),
+        sa.Column("profissional_responsavel_id", sa.Integer(), sa.ForeignKey("funcionarios.id")),
+        sa.Column("valor", sa.Float()),
+        sa.Column("data_criacao", sa.DateTime()),
+        sa.Column("data_atualizacao", sa.DateTime()),
+        sa.CheckConstraint("frequencia IN ('semanal', 'mensal')", name="ck_recorrencias_frequencia"),
+        sa.CheckConstraint("intervalo >= 1", name="ck_recorrencias_intervalo"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_recorrencias_agendamento_id", "recorrencias_agendamento", ["id"], if_not_exists=True)
+    op.create_index("ix_recorrencias_agendamento_inicio", "recorrencias_agendamento", ["inicio"], if_not_exists=True)
+    op.create_index(
+        "ix_recorrencias_agendamento_profissional", "recorrencias_agendamento",
+        ["profissional_responsavel_id"], if_not_exists=True,
+    )
+
+    op.create_table(
+        "recorrencia_participantes",
+        sa.Column(
+            "recorrencia_id", sa.Integer(),
+            sa.ForeignKey("recorrencias_agendamento.id", ondelete="CASCADE"), primary_key=True,
+        ),
+        sa.Column("participante_id", sa.Integer(), sa.ForeignKey("cadastros.id"), primary_key=True),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_recorrencia_participantes_participante_id", "recorrencia_participantes",
+        ["participante_id"], if_not_exists=True,
+    )
+
+    # Colunas novas e nulas: não reescrevem a tabela
+    op.execute(
+        "ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS recorrencia_id integer "
+        "REFERENCES recorrencias_agendamento (id) ON DELETE SET NULL"
+    )
+    op.execute("ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS ocorrencia_dia date")
+    op.create_index(
+        "ix_agendamentos_recorrencia_ocorrencia", "agendamentos",
+        ["recorrencia_id", "ocorrencia_dia"], unique=True, if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_agendamentos_recorrencia_ocorrencia", table_name="agendamentos", if_exists=True)
+    op.execute("ALTER TABLE agendamentos DROP COLUMN IF EXISTS ocorrencia_dia")
+    op.execute("ALTER TABLE agendamentos DROP COLUMN IF EXISTS recorrencia_id")
+    op.drop_table("recorrencia_participantes")
+    op.drop_table("recorrencias_agendamento")
@@ -0,0 +1,52 @@
+"""outbox de e-mails
+
+Tabela emails_pendentes, gravada na mesma transação do agendamento e drenada
+pelo worker de e-mails (backend/services/outbox_service.py). O índice parcial
+cobre só as mensagens pendentes, na ordem em que o worker as reserva.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "emails_pendentes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("destinatario", sa.String(255), nullable=False),
+        sa.Column("assunto", sa.String(255), nullable=False),
+        sa.Column("template", sa.String(100), nullable=False),
+        sa.Column("contexto", postgresql.JSONB(), nullable=False, server_default="{}"),
+        sa.Column("status", sa.String(10), nullable=False, server_default="pendente"),
+        sa.Column("tentativas", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("proxima_tentativa", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("ultimo_erro", sa.Text()),
+        sa.Column("data_criacao", sa.DateTime()),
+        sa.Column("enviado_em", sa.DateTime()),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_emails_pendentes_fila", "emails_pendentes", ["proxima_tentativa", "id"],
+        postgresql_where=sa.text("status = 'pendente'"), if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_emails_pendentes_fila", table_name="emails_pendentes", if_exists=True)
+    op.drop_table("emails_pendentes")
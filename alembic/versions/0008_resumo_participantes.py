@@ -0,0 +1,85 @@
+"""contagem e resumo dos participantes em agendamentos
+
+participantes_count e participantes_resumo (os primeiros participantes por id,
+com id, nome, email e telefone) são mantidos pela aplicação a cada troca de
+participantes; a listagem lê só a linha do agendamento e vai à tabela de
+associação apenas quando o resumo não cobre todos. As colunas entram com
+default constante (sem reescrever a tabela) e são preenchidas a partir de
+agendamento_participantes.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Padrão de PARTICIPANTES_NO_RESUMO em backend/database/models.py
+PARTICIPANTES_NO_RESUMO = 5
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "agendamentos",
+        sa.Column("participantes_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "agendamentos",
+        sa.Column("participantes_resumo", postgresql.JSONB(), nullable=False, server_default="[]"),
+    )
+
+    op.execute(f"""
+        UPDATE agendamentos a
+        SET participantes_count = p.quantidade,
+            participantes_resumo = p.resumo
+        FROM (
+            SELECT ap.agendamento_id,
+                   count(*) AS quantidade,
+                   coalesce(
+                       jsonb_agg(
+                           jsonb_build_object('id', c.id, 'nome', c.nome, 'email', c.email, 'telefone', c.telefone)
+                           ORDER BY c.id
+                       ) FILTER (WHERE ordem <= {PARTICIPANTES_NO_RESUMO}),
+                       '[]'
+                   ) AS resumo
+            FROM (
+                SELECT agendamento_id, participante_id,
+                       row_number() OVER (PARTITION BY agendamento_id ORDER BY participante_id) AS ordem
+                FROM agendamento_participantes
+            ) ap
+            JOIN cadastros c ON c.id = ap.participante_id
+            GROUP BY ap.agendamento_id
+        ) p
+        WHERE a.id = p.agendamento_id
+    """)
+
+    # CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_agendamentos_participantes_count", "agendamentos",
+            [sa.text("participantes_count DESC"), sa.text("data_hora DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_agendamentos_participantes_count", table_name="agendamentos",
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.drop_column("agendamentos", "participantes_resumo")
+    op.drop_column("agendamentos", "participantes_count")
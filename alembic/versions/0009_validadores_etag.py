@@ -0,0 +1,51 @@
+"""data_atualizacao como validador dos ETags
+
+Os ETags das rotas GET vêm de max(data_atualizacao) e count(*) das tabelas de
+origem (backend/utils/etag.py). cadastros e metricas_diarias ganham a coluna:
+o default now() é estável, então entra sem reescrever a tabela e vale para as
+linhas existentes; depois o default fica só na aplicação, como nas demais
+tabelas. Os índices deixam max() e count(*) em index-only scans.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDICES = (
+    ("ix_cadastros_data_atualizacao", "cadastros"),
+    ("ix_agendamentos_data_atualizacao", "agendamentos"),
+    ("ix_recorrencias_agendamento_data_atualizacao", "recorrencias_agendamento"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for tabela in ("cadastros", "metricas_diarias"):
+        op.add_column(tabela, sa.Column("data_atualizacao", sa.DateTime(), server_default=sa.func.now()))
+        op.alter_column(tabela, "data_atualizacao", server_default=None)
+
+    # CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação
+    with op.get_context().autocommit_block():
+        for nome, tabela in INDICES:
+            op.create_index(nome, tabela, ["data_atualizacao"], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nome, tabela in INDICES:
+            op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
+    op.drop_column("metricas_diarias", "data_atualizacao")
+    op.drop_column("cadastros", "data_atualizacao")
@@ -0,0 +1,40 @@
+"""métricas de envio dos workers de e-mail
+
+Tabela workers_email: cada worker (backend/services/outbox_service.py) grava
+periodicamente o resumo das métricas de envio, e o /health/emails da API, que
+roda em outro processo, as lê daqui.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 19:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, Sequence[str], None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "workers_email",
+        sa.Column("worker", sa.String(255), primary_key=True),
+        sa.Column("iniciado_em", sa.DateTime(), nullable=False),
+        sa.Column("atualizado_em", sa.DateTime(), nullable=False),
+        sa.Column("metricas", postgresql.JSONB(), nullable=False, server_default="{}"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("workers_email")
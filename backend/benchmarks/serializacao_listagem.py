@@ -0,0 +1,152 @@
+"""
+Custo por linha da montagem e serialização de GET /agendamentos/, sem banco:
+
+    python -m backend.benchmarks.serializacao_listagem [--linhas 50] [--repeticoes 2000]
+
+"antes" reproduz o caminho anterior: objetos do ORM, dict montado à mão com
+isoformat e as propriedades do modelo, validação pelo response_model com
+List[Dict[str, Any]] e json.dumps do jsonable_encoder (o que o FastAPI faz ao
+devolver o modelo). "depois" é o caminho atual: tuplas das colunas,
+agendamento_service.itens_da_listagem (participantes do resumo gravado na
+linha) e um único orjson.dumps. Também mede a
+resposta vinda do cache (json.loads + validação + nova codificação, contra os
+bytes guardados devolvidos como estão).
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from backend.database import models
+from backend.services.agendamento_service import itens_da_listagem
+from backend.utils.resposta_json import serializar
+
+
+class PaginadoAntigo(BaseModel):
+    agendamentos: List[Dict[str, Any]]
+    total: Optional[int] = None
+    limit: int
+    skip: int
+
+
+def gerar_dados(quantidade: int):
+    """Os mesmos agendamentos como objetos do ORM e como tuplas (com o resumo de participantes)"""
+    base = datetime(2025, 3, 3, 9, 0, 0, 123456)
+    objetos, linhas = [], []
+    for i in range(quantidade):
+        pessoas = [
+            {"id": i * 3 + j, "nome": f"Pessoa {i * 3 + j}", "email": f"p{i * 3 + j}@exemplo.com", "telefone": "11999990000"}
+            for j in range(3)
+        ]
+        campos = dict(
+            id=i + 1,
+            titulo=f"Sessão {i}",
+            data_hora=base - timedelta(hours=i),
+            tipo_sessao="consulta",
+            status="confirmado",
+            observacoes="Observação de exemplo",
+            duracao_em_minutos=90,
+            local="Sala 2",
+            valor=150.0,
+            concluido=False,
+            data_criacao=base - timedelta(days=10),
+            data_atualizacao=base - timedelta(days=1),
+            recorrencia_id=None,
+        )
+        objeto = models.Agendamento(**campos)
+        objeto.participantes = [models.Cadastro(**pessoa) for pessoa in pessoas]
+        objetos.append(objeto)
+        linhas.append((*campos.values(), len(pessoas), pessoas))
+    return objetos, linhas
+
+
+def listagem_antes(objetos) -> bytes:
+    processados = []
+    for agendamento in objetos:
+        try:
+            participantes = []
+            try:
+                participantes = [
+                    {"id": p.id, "nome": p.nome, "email": p.email, "telefone": getattr(p, "telefone", None)}
+                    for p in agendamento.participantes
+                ]
+            except Exception:
+                participantes = []
+            processados.append({
+                "id": agendamento.id,
+                "titulo": agendamento.titulo,
+                "data_hora": agendamento.data_hora.isoformat() if agendamento.data_hora else None,
+                "tipo_sessao": agendamento.tipo_sessao,
+                "status": agendamento.status,
+                "observacoes": agendamento.observacoes,
+                "duracao_em_minutos": agendamento.duracao_em_minutos,
+                "local": agendamento.local,
+                "valor": agendamento.valor,
+                "concluido": agendamento.concluido,
+                "participantes": participantes,
+                "data_criacao": agendamento.data_criacao.isoformat() if agendamento.data_criacao else None,
+                "data_atualizacao": agendamento.data_atualizacao.isoformat() if agendamento.data_atualizacao else None,
+                "participantes_count": len(participantes),
+                "duracao_formatada": agendamento.duracao_formatada,
+                "status_cor": agendamento.status_cor,
+                "recorrencia_id": agendamento.recorrencia_id,
+            })
+        except Exception:
+            processados.append({"id": agendamento.id})
+    resultado = PaginadoAntigo(agendamentos=processados, total=len(processados), limit=50, skip=0)
+    # response_model: valida de novo e codifica
+    validado = PaginadoAntigo.model_validate(resultado.model_dump())
+    return json.dumps(jsonable_encoder(validado)).encode("utf-8")
+
+
+def listagem_depois(linhas) -> bytes:
+    return serializar({
+        "agendamentos": itens_da_listagem(linhas, {}),
+        "total": len(linhas),
+        "limit": 50,
+        "skip": 0,
+    })
+
+
+def cache_antes(guardado: str) -> bytes:
+    validado = PaginadoAntigo.model_validate(json.loads(guardado))
+    return json.dumps(jsonable_encoder(validado)).encode("utf-8")
+
+
+def medir(funcao, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Custo por linha da listagem de agendamentos")
+    parser.add_argument("--linhas", type=int, default=50, help="Itens por página (a rota aceita até 50)")
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    objetos, linhas = gerar_dados(args.linhas)
+    assert json.loads(listagem_antes(objetos))["agendamentos"] == json.loads(listagem_depois(linhas))["agendamentos"]
+    guardado_antes = listagem_antes(objetos).decode("utf-8")
+    guardado_depois = listagem_depois(linhas)
+
+    casos = [
+        ("montagem + serialização, antes", lambda: listagem_antes(objetos)),
+        ("montagem + serialização, depois", lambda: listagem_depois(linhas)),
+        ("resposta do cache, antes", lambda: cache_antes(guardado_antes)),
+        ("resposta do cache, depois", lambda: bytes(guardado_depois)),
+    ]
+    total_linhas = args.linhas * args.repeticoes
+    print(f"{args.linhas} linhas x {args.repeticoes} repetições")
+    for nome, funcao in casos:
+        segundos = medir(funcao, args.repeticoes)
+        print(f"{nome:34s} {segundos / total_linhas * 1e6:8.2f} µs/linha")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Estratégias de carregamento dos relacionamentos usadas pelas rotas.
+
+Participantes vêm sempre por selectinload (um SELECT ... WHERE id IN (...) por
+consulta, sem multiplicar as linhas do pai nem quebrar LIMIT/OFFSET) e só com
+as colunas de ParticipanteResponse. Nas leituras que viram resposta, os demais
+relacionamentos ficam com raiseload: um acesso esquecido falha no teste (ver
+backend/tests/test_consultas_por_rota.py) em vez de virar uma consulta por linha.
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import load_only, raiseload, selectinload
+
+from backend.database import models
+
+# Colunas de Cadastro lidas para participantes (ParticipanteResponse e e-mails).
+# data_criacao entra porque Cadastro usa eager_defaults: adiada, o flush de um
+# participante incluído/removido (marcado pelo backref) a buscaria um a um
+COLUNAS_PARTICIPANTE = (
+    models.Cadastro.id,
+    models.Cadastro.nome,
+    models.Cadastro.email,
+    models.Cadastro.telefone,
+    models.Cadastro.data_criacao,
+)
+
+
+def participantes_do_agendamento():
+    return selectinload(models.Agendamento.participantes).load_only(*COLUNAS_PARTICIPANTE)
+
+
+def participantes_da_recorrencia():
+    return selectinload(models.RecorrenciaAgendamento.participantes).load_only(*COLUNAS_PARTICIPANTE)
+
+
+def agendamento_para_resposta():
+    """Agendamento completo para AgendamentoResponse: duas consultas, qualquer que seja o número de participantes"""
+    return (participantes_do_agendamento(), raiseload("*"))
+
+
+def recorrencia_para_resposta():
+    """Série completa para RecorrenciaResponse"""
+    return (participantes_da_recorrencia(), raiseload("*"))
+
+
+def consulta_participantes(participantes_ids):
+    """Cadastros a associar como participantes, só com as colunas usadas"""
+    return (
+        select(models.Cadastro)
+        .options(load_only(*COLUNAS_PARTICIPANTE), raiseload("*"))
+        .where(models.Cadastro.id.in_(participantes_ids))
+    )
@@ -1,28 +1,164 @@
+from contextlib import asynccontextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Lê as variáveis DB_POOL_* já com o .env carregado
+from backend.database.pool import MetricasPool, estado_pool, opcoes_engine, registrar_eventos
+
 DATABASE_HOST = os.getenv("DATABASE_HOST")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
 DATABASE_USER = os.getenv("DATABASE_USER")
 DATABASE_PASSWORD = os.getenv("DATABASE_PASSWORD")
-DATABASE_PORT = os.getenv("DATABASE_PORT") 
+DATABASE_PORT = os.getenv("DATABASE_PORT")
+# "false" força o caminho síncrono (psycopg2 no threadpool) nas rotas
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "true").lower() in ("1", "true", "sim", "yes")
 
 SQLALCHEMY_DATABASE_URL = f"postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}"
+SQLALCHEMY_ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Engine síncrono: create_all, scripts de linha de comando e fallback das rotas
+metricas_pool = MetricasPool()
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **opcoes_engine(False, metricas_pool))
+registrar_eventos(engine, metricas_pool)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+metricas_pool_async = MetricasPool()
+if DATABASE_ASYNC:
+    try:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL, **opcoes_engine(True, metricas_pool_async))
+        registrar_eventos(async_engine.sync_engine, metricas_pool_async)
+        # expire_on_commit=False: atributos continuam acessíveis após o commit sem
+        # disparar carregamento implícito (proibido fora do greenlet do asyncio)
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    except ImportError as e:
+        print(f"Driver assíncrono indisponível ({e}); usando sessões síncronas")
+
 Base = declarative_base()
 
-def get_db():
+
+def estatisticas_pool():
+    """Estado dos pools de conexão (síncrono e, se ativo, assíncrono)"""
+    estatisticas = {"sincrono": estado_pool(engine, metricas_pool)}
+    if async_engine is not None:
+        estatisticas["assincrono"] = estado_pool(async_engine.sync_engine, metricas_pool_async)
+    return estatisticas
+
+
+class ResultadoStreamAdaptado:
+    """Equivalente a AsyncResult para um Result síncrono com cursor no servidor"""
+
+    def __init__(self, resultado):
+        self.resultado = resultado
+
+    async def partitions(self, size=None):
+        particoes = self.resultado.partitions(size)
+        while True:
+            lote = await run_in_threadpool(next, particoes, None)
+            if lote is None:
+                break
+            yield lote
+
+    async def close(self):
+        return await run_in_threadpool(self.resultado.close)
+
+
+class SessaoSincronaAdaptada:
+    """
+    Expõe a mesma API aguardável de AsyncSession sobre uma Session síncrona,
+    executando cada operação no threadpool. Permite que as rotas usem sempre
+    `await db.execute(...)`, com ou sem o driver asyncpg.
+    """
+
+    def __init__(self, sessao):
+        self.sync_session = sessao
+
+    @property
+    def bind(self):
+        return self.sync_session.bind
+
+    def add(self, instancia):
+        self.sync_session.add(instancia)
+
+    def add_all(self, instancias):
+        self.sync_session.add_all(instancias)
+
+    async def execute(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, *args, **kwargs)
+
+    async def stream(self, *args, **kwargs):
+        # Com yield_per nas execution_options o psycopg2 usa um cursor nomeado (no servidor)
+        resultado = await run_in_threadpool(self.sync_session.execute, *args, **kwargs)
+        return ResultadoStreamAdaptado(resultado)
+
+    async def scalar(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, *args, **kwargs)
+
+    async def flush(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.flush, *args, **kwargs)
+
+    async def commit(self):
+        return await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        return await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.refresh, *args, **kwargs)
+
+    async def delete(self, instancia):
+        return await run_in_threadpool(self.sync_session.delete, instancia)
+
+    async def run_sync(self, funcao, *args, **kwargs):
+        return await run_in_threadpool(funcao, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        return await run_in_threadpool(self.sync_session.close)
+
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+@asynccontextmanager
+async def abrir_sessao():
+    """
+    Sessão assíncrona (asyncpg) ou, no fallback, a sessão síncrona adaptada.
+    Use diretamente quando a sessão precisa viver fora da dependência, como no
+    corpo de uma StreamingResponse (enviado depois que as dependências encerram).
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        yield SessaoSincronaAdaptada(db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def get_db():
+    async with abrir_sessao() as db:
+        yield db
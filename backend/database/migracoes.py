@@ -0,0 +1,55 @@
+"""
+Aplicação das migrações Alembic (alembic/versions).
+
+É um passo explícito do deploy, rodado uma vez antes de subir os workers:
+
+    python -m backend.database.migracoes
+
+(equivale a `alembic upgrade head`, mas segura um advisory lock). Com
+MIGRAR_NA_INICIALIZACAO=true a API também aplica as migrações no startup;
+o mesmo lock impede que vários workers migrem ao mesmo tempo.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
+MIGRAR_NA_INICIALIZACAO = os.getenv("MIGRAR_NA_INICIALIZACAO", "false").lower() in ("1", "true", "sim", "yes")
+
+# Chave do pg_advisory_lock que serializa quem aplica as migrações
+CHAVE_LOCK_MIGRACOES = 7_301_942
+
+RAIZ_PROJETO = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def configuracao_alembic() -> Config:
+    config = Config(os.path.join(RAIZ_PROJETO, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(RAIZ_PROJETO, "alembic"))
+    # O fileConfig do env.py desligaria os loggers já configurados pelo uvicorn
+    config.attributes["configurar_log"] = False
+    return config
+
+
+def aplicar_migracoes() -> None:
+    """Leva o banco até a última revisão; quem chega com outro processo migrando espera o lock e não encontra nada pendente"""
+    from backend.database.database import engine
+
+    with engine.connect() as conexao:
+        conexao.execute(text("SELECT pg_advisory_lock(:chave)"), {"chave": CHAVE_LOCK_MIGRACOES})
+        # O lock é da sessão: sobrevive ao commit e o Alembic abre as próprias transações
+        conexao.commit()
+        try:
+            config = configuracao_alembic()
+            config.attributes["connection"] = conexao
+            command.upgrade(config, "head")
+            conexao.commit()
+        finally:
+            conexao.rollback()
+            conexao.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": CHAVE_LOCK_MIGRACOES})
+            conexao.commit()
+
+
+if __name__ == "__main__":
+    aplicar_migracoes()
+    print("Migrações aplicadas")
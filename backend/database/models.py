@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Boolean, Date, Text, Float, Numeric
+import os
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Boolean, Date, Text, Float, Index, CheckConstraint, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from backend.database.database import Base
@@ -6,8 +9,8 @@ from backend.database.database import Base
 
 class user(Base):
     __tablename__ = "users"
-    id = Column(Integer, primary_key=True),
-    email = Column(String, unique=True, nullable=False, index=True),
+    id = Column(Integer, primary_key=True)
+    email = Column(String, unique=True, nullable=False, index=True)
     password = Column(String, nullable=False)
     
 
@@ -15,7 +18,9 @@ agendamento_participantes = Table(
     'agendamento_participantes',
     Base.metadata,
     Column('agendamento_id', Integer, ForeignKey('agendamentos.id'), primary_key=True),
-    Column('participante_id', Integer, ForeignKey('cadastros.id'), primary_key=True)
+    Column('participante_id', Integer, ForeignKey('cadastros.id'), primary_key=True),
+    # A chave primária (agendamento_id, participante_id) não serve a busca reversa
+    Index('ix_agendamento_participantes_participante_id', 'participante_id'),
 )
 class Cadastro(Base):
     __tablename__ = "cadastros"
@@ -27,6 +32,11 @@ class Cadastro(Base):
     data_nascimento = Column(Date)
     endereco = Column(String(500))
     data_criacao = Column(DateTime, default=func.now())
+    # Validador dos ETags (backend/utils/etag.py, migração 0009)
+    data_atualizacao = Column(DateTime, default=func.now(), onupdate=func.now(), index=True)
+
+    # Traz data_criacao no próprio INSERT (RETURNING), usado pelas métricas diárias
+    __mapper_args__ = {"eager_defaults": True}
 
     agendamentos = relationship("Agendamento", back_populates="cadastro")
     
@@ -52,6 +62,50 @@ class Funcionario(Base):
 
     agendamentos = relationship("Agendamento", back_populates="funcionario")
 
+CORES_STATUS = {
+    'agendado': '#3B82F6',     
+    'confirmado': '#10B981',   
+    'cancelado': '#EF4444',     
+    'realizado': '#8B5CF6',     
+    'adiado': '#F59E0B'         
+}
+COR_STATUS_PADRAO = '#6B7280'
+
+
+def cor_do_status(status):
+    """Cor de exibição de um status de agendamento"""
+    return CORES_STATUS.get(status, COR_STATUS_PADRAO)
+
+
+def formatar_duracao(duracao_em_minutos):
+    """Duração formatada (ex: 1h 30min)"""
+    if not duracao_em_minutos:
+        return "Não definida"
+
+    horas = duracao_em_minutos // 60
+    minutos = duracao_em_minutos % 60
+
+    if horas > 0 and minutos > 0:
+        return f"{horas}h {minutos}min"
+    elif horas > 0:
+        return f"{horas}h"
+    else:
+        return f"{minutos}min"
+
+
+# Participantes guardados em Agendamento.participantes_resumo (a migração 0008 preencheu com 5)
+PARTICIPANTES_NO_RESUMO = int(os.getenv("PARTICIPANTES_RESUMO", "5"))
+
+
+def resumo_participantes(participantes):
+    """Primeiros participantes por id, como dicts de ParticipanteResponse (objetos ou dicts)"""
+    como_dict = [
+        p if isinstance(p, dict) else {"id": p.id, "nome": p.nome, "email": p.email, "telefone": p.telefone}
+        for p in participantes
+    ]
+    return sorted(como_dict, key=lambda p: p["id"])[:PARTICIPANTES_NO_RESUMO]
+
+
 class Agendamento(Base):
     __tablename__ = "agendamentos"
 
@@ -69,6 +123,35 @@ class Agendamento(Base):
     data_atualizacao = Column(DateTime, default=func.now(), onupdate=func.now())
     valor = Column(Float, nullable=True) 
     concluido = Column(Boolean, default=False)
+    # Ocorrência materializada de uma série: a regra e o dia da ocorrência que a linha substitui
+    recorrencia_id = Column(Integer, ForeignKey("recorrencias_agendamento.id", ondelete="SET NULL"))
+    ocorrencia_dia = Column(Date)
+    # Mantidos pela aplicação a cada troca de participantes (definir_resumo_participantes,
+    # agendamento_service.gravar_participantes e recalcular_participantes, migração 0008): a listagem não precisa da tabela de associação
+    participantes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Primeiros participantes por id, no formato de ParticipanteResponse
+    participantes_resumo = Column(JSONB, nullable=False, default=list, server_default="[]")
+
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Casados com aplicar_filtros_agendamento e a ordenação data_hora desc, id desc (migrações 0003 e 0004)
+    __table_args__ = (
+        Index("ix_agendamentos_data_hora_id", data_hora.desc(), id.desc()),
+        Index("ix_agendamentos_status_data_hora", status, data_hora.desc(), id.desc()),
+        Index("ix_agendamentos_tipo_sessao_data_hora", tipo_sessao, data_hora.desc(), id.desc()),
+        Index(
+            "ix_agendamentos_pendentes_data_hora", data_hora.desc(), id.desc(),
+            postgresql_where=text("concluido = false"),
+        ),
+        Index("ix_agendamentos_usuario_id", usuario_id),
+        Index("ix_agendamentos_profissional_data_hora", profissional_responsavel_id, data_hora.desc(), id.desc()),
+        # Uma linha por ocorrência materializada (migração 0006)
+        Index("ix_agendamentos_recorrencia_ocorrencia", recorrencia_id, ocorrencia_dia, unique=True),
+        # Listagem ordenada por número de participantes (migração 0008)
+        Index("ix_agendamentos_participantes_count", participantes_count.desc(), data_hora.desc(), id.desc()),
+        # max(data_atualizacao) e count(*) dos ETags (migração 0009)
+        Index("ix_agendamentos_data_atualizacao", data_atualizacao),
+    )
 
     cadastro = relationship("Cadastro", back_populates="agendamentos")
     funcionario = relationship("Funcionario", back_populates="agendamentos")
@@ -79,43 +162,143 @@ class Agendamento(Base):
         back_populates="agendamentos_participando"
     )
 
+    def definir_participantes(self, participantes):
+        """Troca os participantes mantendo participantes_count e participantes_resumo"""
+        self.participantes = list(participantes)
+        self.definir_resumo_participantes(self.participantes)
+
+    def definir_resumo_participantes(self, participantes):
+        """participantes_count e participantes_resumo a partir de todos os participantes (objetos ou dicts)"""
+        self.participantes_count = len(participantes)
+        self.participantes_resumo = resumo_participantes(participantes)
+
     def __repr__(self):
         return f"<Agendamento(id={self.id}, titulo='{self.titulo}', data_hora='{self.data_hora}')>"
 
-    @property
-    def participantes_nomes(self):
-        """Retorna lista com nomes dos participantes"""
-        return [p.nome for p in self.participantes]
-    
-    @property
-    def participantes_count(self):
-        """Retorna quantidade de participantes"""
-        return len(self.participantes)
-    
     @property
     def duracao_formatada(self):
         """Retorna duração formatada (ex: 1h 30min)"""
-        if not self.duracao_em_minutos:
-            return "Não definida"
-        
-        horas = self.duracao_em_minutos // 60
-        minutos = self.duracao_em_minutos % 60
-        
-        if horas > 0 and minutos > 0:
-            return f"{horas}h {minutos}min"
-        elif horas > 0:
-            return f"{horas}h"
-        else:
-            return f"{minutos}min"
+        return formatar_duracao(self.duracao_em_minutos)
     
     @property
     def status_cor(self):
         """Retorna cor baseada no status"""
-        cores = {
-            'agendado': '#3B82F6',     
-            'confirmado': '#10B981',   
-            'cancelado': '#EF4444',     
-            'realizado': '#8B5CF6',     
-            'adiado': '#F59E0B'         
-        }
-        return cores.get(self.status, '#6B7280') 
\ No newline at end of file
+        return cor_do_status(self.status)
+
+
+recorrencia_participantes = Table(
+    'recorrencia_participantes',
+    Base.metadata,
+    Column('recorrencia_id', Integer, ForeignKey('recorrencias_agendamento.id', ondelete='CASCADE'), primary_key=True),
+    Column('participante_id', Integer, ForeignKey('cadastros.id'), primary_key=True),
+    Index('ix_recorrencia_participantes_participante_id', 'participante_id'),
+)
+
+
+class RecorrenciaAgendamento(Base):
+    """
+    Série de agendamentos guardada uma única vez: a regra (semanal ou mensal, a cada
+    `intervalo`, até `ate` ou por `contagem` ocorrências, menos os dias em `excecoes`)
+    e os campos comuns às ocorrências. As ocorrências são expandidas sob demanda
+    (recorrencia_service); só a ocorrência editada vira linha em agendamentos.
+    """
+    __tablename__ = "recorrencias_agendamento"
+
+    id = Column(Integer, primary_key=True, index=True)
+    titulo = Column(String(255), nullable=False)
+    usuario_id = Column(Integer, ForeignKey("cadastros.id"), nullable=False)
+    # Data e hora da primeira ocorrência; a hora vale para todas
+    inicio = Column(DateTime, nullable=False)
+    frequencia = Column(String(10), nullable=False)  # semanal | mensal
+    intervalo = Column(Integer, nullable=False, default=1)
+    # Dias da semana das ocorrências semanais (0 = segunda ... 6 = domingo)
+    dias_semana = Column(ARRAY(Integer), nullable=False, default=list)
+    ate = Column(Date)
+    contagem = Column(Integer)
+    excecoes = Column(ARRAY(Date), nullable=False, default=list)
+    tipo_sessao = Column(String(50), nullable=False, default="reuniao")
+    status = Column(String(30), nullable=False, default="agendado")
+    observacoes = Column(Text)
+    duracao_em_minutos = Column(Integer, default=60)
+    local = Column(String(255))
+    profissional_responsavel_id = Column(Integer, ForeignKey("funcionarios.id"))
+    valor = Column(Float, nullable=True)
+    data_criacao = Column(DateTime, default=func.now())
+    data_atualizacao = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        Index("ix_recorrencias_agendamento_inicio", inicio),
+        Index("ix_recorrencias_agendamento_profissional", profissional_responsavel_id),
+        Index("ix_recorrencias_agendamento_data_atualizacao", data_atualizacao),
+        CheckConstraint("frequencia IN ('semanal', 'mensal')", name="ck_recorrencias_frequencia"),
+        CheckConstraint("intervalo >= 1", name="ck_recorrencias_intervalo"),
+    )
+
+    participantes = relationship("Cadastro", secondary=recorrencia_participantes)
+
+    def __repr__(self):
+        return f"<RecorrenciaAgendamento(id={self.id}, titulo='{self.titulo}', frequencia='{self.frequencia}')>"
+
+
+class MetricaDiaria(Base):
+    """Agregado diário do dashboard, mantido incrementalmente pelas escritas"""
+    __tablename__ = "metricas_diarias"
+
+    dia = Column(Date, primary_key=True)
+    # cadastros | agendamentos | status | tipo_sessao
+    metrica = Column(String(30), primary_key=True)
+    # valor da dimensão (ex.: 'confirmado'); vazio para os totais
+    chave = Column(String(50), primary_key=True, default="")
+    quantidade = Column(Integer, nullable=False, default=0)
+    valor_total = Column(Float, nullable=False, default=0)
+    data_atualizacao = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<MetricaDiaria(dia='{self.dia}', metrica='{self.metrica}', chave='{self.chave}', quantidade={self.quantidade})>"
+
+
+class EmailPendente(Base):
+    """
+    Outbox de e-mails: gravado na mesma transação da escrita que o originou e
+    entregue pelo worker (python -m backend.services.outbox_service)
+    """
+    __tablename__ = "emails_pendentes"
+
+    id = Column(Integer, primary_key=True)
+    destinatario = Column(String(255), nullable=False)
+    assunto = Column(String(255), nullable=False)
+    template = Column(String(100), nullable=False)
+    contexto = Column(JSONB, nullable=False, default=dict)
+    # pendente | enviado | falhou
+    status = Column(String(10), nullable=False, default="pendente")
+    tentativas = Column(Integer, nullable=False, default=0)
+    # Próxima tentativa; enquanto um worker envia, é o fim da reserva dele
+    proxima_tentativa = Column(DateTime, nullable=False, default=func.now())
+    ultimo_erro = Column(Text)
+    data_criacao = Column(DateTime, default=func.now())
+    enviado_em = Column(DateTime)
+
+    __table_args__ = (
+        # Fila: só as pendentes, na ordem em que o worker as reserva (migração 0007)
+        Index("ix_emails_pendentes_fila", proxima_tentativa, id, postgresql_where=text("status = 'pendente'")),
+    )
+
+    def __repr__(self):
+        return f"<EmailPendente(id={self.id}, destinatario='{self.destinatario}', status='{self.status}')>"
+
+
+class WorkerEmail(Base):
+    """Últimas métricas de envio publicadas por cada worker de e-mails (lidas pelo /health/emails)"""
+    __tablename__ = "workers_email"
+
+    # host:pid do processo
+    worker = Column(String(255), primary_key=True)
+    iniciado_em = Column(DateTime, nullable=False)
+    atualizado_em = Column(DateTime, nullable=False)
+    # MetricasEnvio.resumo()
+    metricas = Column(JSONB, nullable=False, default=dict)
+
+    def __repr__(self):
+        return f"<WorkerEmail(worker='{self.worker}', atualizado_em='{self.atualizado_em}')>"
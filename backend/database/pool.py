@@ -0,0 +1,138 @@
+"""
+Configuração e métricas do pool de conexões.
+
+Variáveis de ambiente:
+    DB_POOL_SIZE=5            conexões mantidas abertas
+    DB_MAX_OVERFLOW=10        conexões extras sob pico
+    DB_POOL_TIMEOUT=30        segundos aguardando uma conexão livre
+    DB_POOL_RECYCLE=1800      recicla conexões mais antigas que isso (segundos; -1 desativa)
+    DB_POOL_PRE_PING=true     testa a conexão antes de entregá-la
+    DB_PGBOUNCER=false        modo compatível com PgBouncer (transaction pooling):
+                              NullPool e sem prepared statements no asyncpg
+"""
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "sim", "yes")
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "sim", "yes")
+
+
+class MetricasPool:
+    """Contadores de uso do pool (checkouts, espera, conexões em uso)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.conexoes_criadas = 0
+        self.invalidacoes = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+
+    def registrar_espera(self, segundos: float, timeout: bool = False) -> None:
+        with self._lock:
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+            if timeout:
+                self.timeouts += 1
+
+    def incrementar(self, contador: str) -> None:
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def resumo(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "em_uso": self.checkouts - self.checkins,
+                "conexoes_criadas": self.conexoes_criadas,
+                "invalidacoes": self.invalidacoes,
+                "timeouts": self.timeouts,
+                "espera_media_ms": round(self.espera_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "espera_maxima_ms": round(self.espera_maxima * 1000, 3),
+            }
+
+
+class _MedirEspera:
+    """Mede o tempo gasto aguardando uma conexão livre em _do_get"""
+
+    metricas: MetricasPool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except PoolTimeoutError:
+            self.metricas.registrar_espera(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.metricas.registrar_espera(time.perf_counter() - inicio)
+        return conexao
+
+
+class QueuePoolMedido(_MedirEspera, QueuePool):
+    pass
+
+
+class AsyncQueuePoolMedido(_MedirEspera, AsyncAdaptedQueuePool):
+    pass
+
+
+def opcoes_engine(assincrono: bool, metricas: MetricasPool) -> Dict[str, Any]:
+    """Argumentos de create_engine/create_async_engine conforme o ambiente"""
+    if DB_PGBOUNCER:
+        opcoes: Dict[str, Any] = {"poolclass": NullPool, "pool_pre_ping": DB_POOL_PRE_PING}
+        if assincrono:
+            # PgBouncer em modo transaction não preserva prepared statements entre transações
+            opcoes["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        return opcoes
+
+    classe = AsyncQueuePoolMedido if assincrono else QueuePoolMedido
+    # Subclasse por engine para que cada pool registre nas próprias métricas
+    poolclass = type(classe.__name__, (classe,), {"metricas": metricas})
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def registrar_eventos(engine_sincrono, metricas: MetricasPool) -> None:
+    """Liga os eventos do pool aos contadores (para AsyncEngine, passe engine.sync_engine)"""
+    event.listen(engine_sincrono, "checkout", lambda *args: metricas.incrementar("checkouts"))
+    event.listen(engine_sincrono, "checkin", lambda *args: metricas.incrementar("checkins"))
+    event.listen(engine_sincrono, "connect", lambda *args: metricas.incrementar("conexoes_criadas"))
+    event.listen(engine_sincrono, "invalidate", lambda *args: metricas.incrementar("invalidacoes"))
+
+
+def estado_pool(engine_sincrono, metricas: MetricasPool) -> Dict[str, Any]:
+    """Configuração, ocupação atual e contadores acumulados de um pool"""
+    pool = engine_sincrono.pool
+    estado: Dict[str, Any] = {"classe": type(pool).__name__, "pgbouncer": DB_PGBOUNCER}
+    if isinstance(pool, QueuePool):
+        estado.update({
+            "tamanho": pool.size(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "timeout": DB_POOL_TIMEOUT,
+            "recycle": DB_POOL_RECYCLE,
+            "pre_ping": DB_POOL_PRE_PING,
+            "disponiveis": pool.checkedin(),
+            "emprestadas": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    estado["metricas"] = metricas.resumo()
+    return estado
@@ -1,16 +1,19 @@
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import uvicorn
 from datetime import datetime
 
-from backend.database.database import get_db, engine
+from backend.database.database import get_db, async_engine, SessionLocal, estatisticas_pool
 from backend.database import models
 from backend.utils import auth
 from backend.utils.email import enviar_email_background
-from backend.routers import agendamento, cadastro, funcionario, login, dashboard
-
-models.Base.metadata.create_all(bind=engine)
+from backend.utils.etag import etag_por_conteudo
+from backend.routers import agendamento, cadastro, funcionario, login, dashboard, recorrencia
+from backend.services.metricas_service import garantir_metricas
+from backend.services import outbox_service
+from backend.database.migracoes import MIGRAR_NA_INICIALIZACAO, aplicar_migracoes
 
 app = FastAPI(
     title="Sistema de Agendamentos",
@@ -20,6 +23,9 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Antes do CORS: o CORS fica por fora e também marca os 304 gerados aqui
+app.middleware("http")(etag_por_conteudo)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -30,10 +36,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Conflitos"],
 )
 
 
 app.include_router(agendamento.router, prefix="/api") 
+app.include_router(recorrencia.router, prefix="/api")
 app.include_router(cadastro.router, prefix="/api")
 app.include_router(funcionario.router, prefix="/api")
 app.include_router(login.router, prefix="/api")
@@ -60,18 +68,30 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "pool": estatisticas_pool()
     }
 
+@app.get("/health/emails")
+async def health_emails(db: AsyncSession = Depends(get_db)):
+    """Fila de e-mails (pendentes, atraso, falhas) e as métricas de envio publicadas pelos workers, que rodam em outro processo"""
+    try:
+        return await db.run_sync(outbox_service.estatisticas_fila)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/login/", response_model=login.LoginResponse)
 async def login_sem_auth(login_data: login.LoginRequest):
     return await login.login(login_data)
 
 
 @app.get("/funcionarios/")
-async def listar_funcionarios(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def listar_funcionarios(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
     try:
-        return db.query(models.Funcionario).filter(models.Funcionario.ativo == True).offset(skip).limit(limit).all()
+        resultado = await db.execute(
+            select(models.Funcionario).where(models.Funcionario.ativo == True).offset(skip).limit(limit)
+        )
+        return resultado.scalars().all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -80,9 +100,22 @@ async def startup_event():
     print("Sistema de Agendamentos iniciado!")
     print(f"Documentação disponível em: http://localhost:8000/docs")
     print(f"API Agendamentos: http://localhost:8000/api/agendamentos/")
+    # O esquema é versionado em alembic/versions; o normal é migrar no deploy (ver migracoes.py)
+    if MIGRAR_NA_INICIALIZACAO:
+        aplicar_migracoes()
+    db = SessionLocal()
+    try:
+        garantir_metricas(db)
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao preparar métricas diárias: {e}")
+    finally:
+        db.close()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    if async_engine is not None:
+        await async_engine.dispose()
     print("Sistema de Agendamentos encerrado")
 
 @app.exception_handler(Exception)
@@ -1,14 +1,50 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query, BackgroundTasks
-from typing import List, Dict, Any
-from datetime import datetime, date, timedelta
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Request, Response
+from typing import List, Dict, Any, Optional
+from datetime import datetime, date, time, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func, and_, or_
-from backend.utils.email import enviar_email_background
+from sqlalchemy import func, and_, tuple_, select, exists
+from pydantic import ValidationError
+from backend.utils.paginacao import (
+    CursorInvalido,
+    DIRECAO_ANTERIOR,
+    DIRECAO_PROXIMA,
+    codificar_cursor,
+    decodificar_cursor,
+)
+from backend.utils.contagem import PADRAO_ESTRATEGIAS, contar_total
+from backend.utils.cache import cache_respostas
+from backend.utils.etag import verificar_etag
+from backend.utils.exportacao import PADRAO_FORMATOS, resposta_exportacao
+from backend.utils.resposta_json import resposta_json, serializar
 
 from backend.database.database import get_db
+from backend.database import carregamento
 from backend.database import models
 from backend.schemas import agendamento as agendamento_schema
+from backend.services.agendamento_service import (
+    COLUNAS_LISTAGEM,
+    calendario_agendamentos,
+    estatisticas_agendamentos,
+    gravar_participantes,
+    ids_com_resumo_incompleto,
+    intercalar_com_ocorrencias,
+    itens_da_listagem,
+    ocorrencias_da_listagem,
+    participantes_por_agendamento,
+    periodos_referencia,
+    validar_participantes,
+)
+from backend.services import (
+    disponibilidade_service,
+    metricas_service,
+    operacoes_lote_service,
+    outbox_service,
+    recorrencia_service,
+)
+
+# Maior intervalo aceito por /calendario (um mês com as semanas das bordas)
+CALENDARIO_MAX_DIAS = 42
 
 router = APIRouter(
     prefix="/agendamentos",
@@ -18,138 +54,226 @@ router = APIRouter(
 from pydantic import BaseModel
 
 class AgendamentoPaginado(BaseModel):
-    agendamentos: List[Dict[str, Any]]
-    total: int
-    pagina: int
-    totalPaginas: int
+    agendamentos: List[agendamento_schema.AgendamentoItemListagem]
+    total: Optional[int] = None
+    pagina: Optional[int] = None
+    totalPaginas: Optional[int] = None
     limit: int
     skip: int
     filtro: str
     temProxima: bool
     temAnterior: bool
+    paginacao: str = "offset"
+    proximoCursor: Optional[str] = None
+    cursorAnterior: Optional[str] = None
+    contagem: str = "exata"
+
+def filtros_agendamento(
+    data_inicio: Optional[date] = Query(None, description="Agendamentos a partir desta data (AAAA-MM-DD)"),
+    data_fim: Optional[date] = Query(None, description="Agendamentos até esta data, inclusive (AAAA-MM-DD)"),
+    status_agendamento: Optional[List[str]] = Query(None, alias="status", description="Status aceitos (repetido ou separado por vírgula)"),
+    tipo_sessao: Optional[List[str]] = Query(None, description="Tipos de sessão aceitos (repetido ou separado por vírgula)"),
+    profissional_responsavel_id: Optional[int] = Query(None, description="Funcionário responsável"),
+    participante_id: Optional[int] = Query(None, description="Cadastro entre os participantes"),
+    valor_min: Optional[float] = Query(None, ge=0, description="Valor mínimo"),
+    valor_max: Optional[float] = Query(None, ge=0, description="Valor máximo"),
+    concluido: Optional[bool] = Query(None, description="true = concluídos, false = pendentes"),
+    participantes_min: Optional[int] = Query(None, ge=0, description="Número mínimo de participantes"),
+    participantes_max: Optional[int] = Query(None, ge=0, description="Número máximo de participantes"),
+) -> agendamento_schema.FiltrosAgendamento:
+    """Lê os critérios combináveis da query string (dependência das rotas de consulta)"""
+    try:
+        return agendamento_schema.FiltrosAgendamento(
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            status=status_agendamento,
+            tipo_sessao=tipo_sessao,
+            profissional_responsavel_id=profissional_responsavel_id,
+            participante_id=participante_id,
+            valor_min=valor_min,
+            valor_max=valor_max,
+            concluido=concluido,
+            participantes_min=participantes_min,
+            participantes_max=participantes_max,
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail="; ".join(erro["msg"] for erro in e.errors()))
 
 @router.get("/", response_model=AgendamentoPaginado)
 async def listar_agendamentos(
+    request: Request,
+    response: Response,
     limit: int = Query(6, ge=1, le=50, description="Número de itens por página"),
     skip: int = Query(0, ge=0, description="Número de itens para pular"),
     filtro: str = Query("todos", description="Filtro a aplicar"),
-    db: Session = Depends(get_db)
+    paginacao: str = Query("offset", pattern="^(offset|cursor)$", description="Modo de paginação: offset ou cursor"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado em proximoCursor/cursorAnterior"),
+    contagem: str = Query("exata", pattern=PADRAO_ESTRATEGIAS, description="Como calcular o total: exata, estimada, cache ou nenhuma"),
+    ordenar: str = Query("data", pattern="^(data|participantes)$", description="data (mais recentes primeiro) ou participantes (mais participantes primeiro)"),
+    filtros: agendamento_schema.FiltrosAgendamento = Depends(filtros_agendamento),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Listar agendamentos com paginação e filtros - Versão adaptada
+
+    Além do filtro rápido (hoje, semana, reuniao, pendente...), aceita critérios
+    combináveis: data_inicio/data_fim, status e tipo_sessao múltiplos,
+    profissional_responsavel_id, participante_id, valor_min/valor_max, concluido e
+    participantes_min/participantes_max.
+
+    No modo cursor (ou quando um cursor é informado) a página é buscada por
+    chave (data_hora, id), sem OFFSET, então o custo não cresce com a página.
+    O parâmetro contagem evita o COUNT(*) exato quando ele não é necessário.
+
+    No modo offset as ocorrências das séries na janela do filtro são expandidas e
+    intercaladas (id "r<série>-<dia>", ocorrencia_virtual = true); no modo
+    cursor e com ordenar=participantes (só no modo offset) entram apenas os
+    agendamentos gravados.
+
+    As linhas são lidas como tuplas (sem objetos do ORM) e os participantes vêm
+    do resumo gravado na própria linha; a tabela de associação só é consultada
+    para os agendamentos com mais participantes do que o resumo guarda. O corpo
+    é serializado uma vez com orjson, inclusive o guardado no cache.
     """
     try:
-        pagina = (skip // limit) + 1
-        print(f"Buscando agendamentos - Página: {pagina}, Limit: {limit}, Skip: {skip}, Filtro: {filtro}")
-        
-        query = db.query(models.Agendamento).options(joinedload(models.Agendamento.participantes))
-        count_query = db.query(func.count(models.Agendamento.id))
-        
-        filtros_aplicados = aplicar_filtros_agendamento(query, count_query, filtro)
+        nao_modificado = await verificar_etag("agendamentos", request, response, db)
+        if nao_modificado is not None:
+            return nao_modificado
+        chave_cache = cache_respostas.chave("agendamentos", request)
+        em_cache = cache_respostas.obter_serializado(chave_cache)
+        if em_cache is not None:
+            return resposta_json(em_cache, response)
+        
+        modo_cursor = paginacao == "cursor" or cursor is not None
+        if modo_cursor and ordenar != "data":
+            raise HTTPException(status_code=400, detail="ordenar=participantes só está disponível na paginação por offset")
+        pagina = None if modo_cursor else (skip // limit) + 1
+        print(f"Buscando agendamentos - Página: {pagina}, Limit: {limit}, Skip: {skip}, Filtro: {filtro}, Cursor: {cursor}")
+        
+        query = select(*COLUNAS_LISTAGEM)
+        count_query = select(func.count(models.Agendamento.id))
+        
+        filtros_aplicados = aplicar_filtros_agendamento(query, count_query, filtro, filtros)
         query = filtros_aplicados["query"]
         count_query = filtros_aplicados["count_query"]
+        chave_filtro = ""
+        if filtros_aplicados["condicao"] is not None:
+            chave_filtro = f"{filtro}|{filtros.model_dump_json(exclude_defaults=True)}"
+        
+        total, contagem_usada = await db.run_sync(contar_total, count_query, models.Agendamento, chave_filtro, contagem)
+        
+        proximo_cursor = None
+        cursor_anterior = None
+        if modo_cursor:
+            pagina_cursor = await buscar_pagina_por_cursor(db, query, cursor, limit)
+            agendamentos = pagina_cursor["agendamentos"]
+            tem_proxima = pagina_cursor["temProxima"]
+            tem_anterior = pagina_cursor["temAnterior"]
+            if agendamentos and tem_proxima:
+                ultimo = agendamentos[-1]
+                proximo_cursor = codificar_cursor(ultimo.data_hora, ultimo.id, DIRECAO_PROXIMA)
+            if agendamentos and tem_anterior:
+                primeiro = agendamentos[0]
+                cursor_anterior = codificar_cursor(primeiro.data_hora, primeiro.id, DIRECAO_ANTERIOR)
+        else:
+            ordem = (models.Agendamento.data_hora.desc(), models.Agendamento.id.desc())
+            if ordenar == "participantes":
+                ordem = (models.Agendamento.participantes_count.desc(), *ordem)
+                ocorrencias = []
+            else:
+                ocorrencias = await db.run_sync(ocorrencias_da_listagem, filtro, filtros)
+            # Com ocorrências na janela, as linhas gravadas até o fim da página são
+            # intercaladas com elas e o OFFSET é aplicado depois
+            resultado_consulta = await db.execute(
+                query
+                .order_by(*ordem)
+                .offset(0 if ocorrencias else skip)
+                .limit(limit + 1 + (skip if ocorrencias else 0))
+            )
+            agendamentos = resultado_consulta.all()
+            if ocorrencias:
+                agendamentos = intercalar_com_ocorrencias(agendamentos, ocorrencias)[skip:]
+                if total is not None:
+                    total += len(ocorrencias)
+            tem_proxima = len(agendamentos) > limit
+            tem_anterior = pagina > 1
+            agendamentos = agendamentos[:limit]
         
-        total = count_query.scalar()
+        participantes = await db.run_sync(participantes_por_agendamento, ids_com_resumo_incompleto(agendamentos))
+        itens = itens_da_listagem(agendamentos, participantes)
         
-        agendamentos = (
-            query
-            .order_by(models.Agendamento.data_hora.desc(), models.Agendamento.data_criacao.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        total_paginas = (total + limit - 1) // limit if total is not None else None
         
-        agendamentos_processados = []
-        for agendamento in agendamentos:
-            try:
-                participantes = []
-                try:
-                    participantes = [
-                        {
-                            "id": p.id,
-                            "nome": p.nome,
-                            "email": p.email,
-                            "telefone": getattr(p, 'telefone', None)
-                        }
-                        for p in agendamento.participantes
-                    ]
-                except Exception as e:
-                    print(f"Erro ao buscar participantes do agendamento {agendamento.id}: {e}")
-                    participantes = []
-                
-                agendamento_dict = {
-                    "id": agendamento.id,
-                    "titulo": agendamento.titulo,
-                    "data_hora": agendamento.data_hora.isoformat() if agendamento.data_hora else None,
-                    "tipo_sessao": agendamento.tipo_sessao,
-                    "status": agendamento.status,
-                    "observacoes": agendamento.observacoes,
-                    "duracao_em_minutos": agendamento.duracao_em_minutos,
-                    "local": agendamento.local,
-                    "valor": agendamento.valor,              
-                    "concluido": agendamento.concluido,      
-                    "participantes": participantes,
-                    "data_criacao": agendamento.data_criacao.isoformat() if agendamento.data_criacao else None,
-                    "data_atualizacao": agendamento.data_atualizacao.isoformat() if agendamento.data_atualizacao else None,
-                    "participantes_count": len(participantes),
-                    "duracao_formatada": agendamento.duracao_formatada,
-                    "status_cor": agendamento.status_cor
-                }
-
-                agendamentos_processados.append(agendamento_dict)
-                
-            except Exception as e:
-                print(f"Erro ao processar agendamento {agendamento.id}: {e}")
-                agendamentos_processados.append({
-                    "id": agendamento.id,
-                    "titulo": getattr(agendamento, 'titulo', 'Título não disponível'),
-                    "data_hora": agendamento.data_hora.isoformat() if agendamento.data_hora else None,
-                    "tipo_sessao": getattr(agendamento, 'tipo_sessao', 'reuniao'),
-                    "status": getattr(agendamento, 'status', 'agendado'),
-                    "observacoes": getattr(agendamento, 'observacoes', None),
-                    "duracao_em_minutos": getattr(agendamento, 'duracao_em_minutos', 60),
-                    "local": getattr(agendamento, 'local', None),
-                    "valor": getattr(agendamento, 'valor', None),
-                    "concluido": getattr(agendamento, 'concluido', False),
-                    "participantes": [],
-                    "participantes_count": 0,
-                    "error": f"Erro ao processar: {str(e)}"
-                })
-        
-        total_paginas = (total + limit - 1) // limit 
-        
-        print(f"Retornando {len(agendamentos_processados)} agendamentos de {total} total")
-        
-        return AgendamentoPaginado(
-            agendamentos=agendamentos_processados,
-            total=total,
-            pagina=pagina,
-            totalPaginas=total_paginas,
-            limit=limit,
-            skip=skip,
-            filtro=filtro,
-            temProxima=pagina < total_paginas,
-            temAnterior=pagina > 1
-        )
+        print(f"Retornando {len(itens)} agendamentos de {total} total")
+        
+        conteudo = serializar({
+            "agendamentos": itens,
+            "total": total,
+            "pagina": pagina,
+            "totalPaginas": total_paginas,
+            "limit": limit,
+            "skip": skip,
+            "filtro": filtro,
+            "temProxima": tem_proxima,
+            "temAnterior": tem_anterior,
+            "paginacao": "cursor" if modo_cursor else "offset",
+            "proximoCursor": proximo_cursor,
+            "cursorAnterior": cursor_anterior,
+            "contagem": contagem_usada,
+        })
+        cache_respostas.definir_serializado(chave_cache, conteudo)
+        return resposta_json(conteudo, response)
         
+    except HTTPException:
+        raise
+    except CursorInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Erro ao buscar agendamentos: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Erro ao buscar agendamentos: {str(e)}")
 
-def aplicar_filtros_agendamento(query, count_query, filtro: str):
+async def buscar_pagina_por_cursor(db, query, cursor: Optional[str], limit: int):
     """
-    Aplicar filtros nas queries baseado no tipo de filtro - Adaptado para seu modelo
+    Paginação por chave (keyset) ordenada por data_hora desc, id desc.
+    Busca limit + 1 linhas para saber se existe outra página na mesma direção.
     """
-    hoje = datetime.now().date()
-    inicio_hoje = datetime.combine(hoje, datetime.min.time())
-    fim_hoje = datetime.combine(hoje + timedelta(days=1), datetime.min.time())
+    chave = tuple_(models.Agendamento.data_hora, models.Agendamento.id)
+    direcao = DIRECAO_PROXIMA
     
-    dias_desde_domingo = hoje.weekday() + 1 if hoje.weekday() != 6 else 0
-    inicio_semana = datetime.combine(hoje - timedelta(days=dias_desde_domingo), datetime.min.time())
+    if cursor:
+        data_hora_cursor, id_cursor, direcao = decodificar_cursor(cursor)
+        if direcao == DIRECAO_PROXIMA:
+            query = query.filter(chave < tuple_(data_hora_cursor, id_cursor))
+        else:
+            query = query.filter(chave > tuple_(data_hora_cursor, id_cursor))
     
-    inicio_mes = datetime.combine(hoje.replace(day=1), datetime.min.time())
+    if direcao == DIRECAO_PROXIMA:
+        ordem = (models.Agendamento.data_hora.desc(), models.Agendamento.id.desc())
+    else:
+        ordem = (models.Agendamento.data_hora.asc(), models.Agendamento.id.asc())
+    
+    resultado = await db.execute(query.order_by(*ordem).limit(limit + 1))
+    agendamentos = list(resultado.all())
+    tem_mais = len(agendamentos) > limit
+    agendamentos = agendamentos[:limit]
+    
+    if direcao == DIRECAO_ANTERIOR:
+        agendamentos.reverse()
+        return {"agendamentos": agendamentos, "temProxima": True, "temAnterior": tem_mais}
+    
+    return {"agendamentos": agendamentos, "temProxima": tem_mais, "temAnterior": cursor is not None}
+
+def condicao_filtro_agendamento(filtro: str):
+    """
+    Condição SQL correspondente ao filtro da listagem (None para "todos" ou desconhecido)
+    """
+    periodos = periodos_referencia()
+    inicio_hoje = periodos["inicio_hoje"]
+    fim_hoje = periodos["fim_hoje"]
+    inicio_semana = periodos["inicio_semana"]
+    inicio_mes = periodos["inicio_mes"]
     
     if filtro == "hoje":
         filtro_condicao = and_(
@@ -177,14 +301,126 @@ def aplicar_filtros_agendamento(query, count_query, filtro: str):
     else: 
         filtro_condicao = None
     
+    return filtro_condicao
+
+def condicao_filtros_combinados(filtros: Optional[agendamento_schema.FiltrosAgendamento]):
+    """
+    Compila os critérios combináveis em um único predicado (None se nenhum foi informado).
+    Período, status e tipo_sessao caem nos índices (…, data_hora desc, id desc);
+    participante_id vira um EXISTS servido pelo índice de agendamento_participantes.
+    """
+    if filtros is None:
+        return None
+    
+    condicoes = []
+    if filtros.data_inicio:
+        condicoes.append(models.Agendamento.data_hora >= datetime.combine(filtros.data_inicio, datetime.min.time()))
+    if filtros.data_fim:
+        fim = datetime.combine(filtros.data_fim + timedelta(days=1), datetime.min.time())
+        condicoes.append(models.Agendamento.data_hora < fim)
+    if filtros.status:
+        condicoes.append(models.Agendamento.status.in_(filtros.status))
+    if filtros.tipo_sessao:
+        condicoes.append(models.Agendamento.tipo_sessao.in_(filtros.tipo_sessao))
+    if filtros.profissional_responsavel_id is not None:
+        condicoes.append(models.Agendamento.profissional_responsavel_id == filtros.profissional_responsavel_id)
+    if filtros.participante_id is not None:
+        participacoes = models.agendamento_participantes.c
+        condicoes.append(
+            exists()
+            .where(participacoes.agendamento_id == models.Agendamento.id)
+            .where(participacoes.participante_id == filtros.participante_id)
+        )
+    if filtros.valor_min is not None:
+        condicoes.append(models.Agendamento.valor >= filtros.valor_min)
+    if filtros.valor_max is not None:
+        condicoes.append(models.Agendamento.valor <= filtros.valor_max)
+    if filtros.concluido is not None:
+        condicoes.append(models.Agendamento.concluido == filtros.concluido)
+    if filtros.participantes_min is not None:
+        condicoes.append(models.Agendamento.participantes_count >= filtros.participantes_min)
+    if filtros.participantes_max is not None:
+        condicoes.append(models.Agendamento.participantes_count <= filtros.participantes_max)
+    
+    return and_(*condicoes) if condicoes else None
+
+def aplicar_filtros_agendamento(query, count_query, filtro: str, filtros: Optional[agendamento_schema.FiltrosAgendamento] = None):
+    """
+    Aplicar filtros nas queries baseado no tipo de filtro - Adaptado para seu modelo
+    """
+    condicoes = [
+        condicao for condicao in (condicao_filtro_agendamento(filtro), condicao_filtros_combinados(filtros))
+        if condicao is not None
+    ]
+    filtro_condicao = and_(*condicoes) if condicoes else None
+    
     if filtro_condicao is not None:
         query = query.filter(filtro_condicao)
         count_query = count_query.filter(filtro_condicao)
     
-    return {"query": query, "count_query": count_query}
+    return {"query": query, "count_query": count_query, "condicao": filtro_condicao}
+
+async def carregar_agendamento(db, agendamento_id: int):
+    """
+    Busca um agendamento com os participantes já carregados (em sessão assíncrona
+    não há carregamento implícito de relacionamentos): duas consultas, qualquer
+    que seja o número de participantes
+    """
+    resultado = await db.execute(
+        select(models.Agendamento)
+        .options(*carregamento.agendamento_para_resposta())
+        .where(models.Agendamento.id == agendamento_id)
+        .execution_options(populate_existing=True)
+    )
+    return resultado.scalars().first()
+
+async def checar_conflitos(
+    db,
+    inicio: datetime,
+    duracao_em_minutos: Optional[int],
+    profissional_id: Optional[int],
+    participantes_ids: List[int],
+    permitir_conflito: bool,
+    ignorar_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Agendamentos que se sobrepõem ao horário para o profissional ou os participantes.
+    Conflitos do profissional sempre impedem a gravação (409); os de participantes
+    também, a menos que permitir_conflito seja verdadeiro, e então são devolvidos.
+    """
+    fim = inicio + timedelta(minutes=duracao_em_minutos or disponibilidade_service.DURACAO_PADRAO)
+    conflitos = await db.run_sync(
+        disponibilidade_service.ocupacoes,
+        inicio,
+        fim,
+        [profissional_id] if profissional_id else [],
+        participantes_ids,
+        ignorar_id,
+    )
+    return validar_conflitos(disponibilidade_service.descrever_conflitos(conflitos), permitir_conflito)
+
+def validar_conflitos(descritos: List[Dict[str, Any]], permitir_conflito: bool) -> List[Dict[str, Any]]:
+    """409 para conflitos do profissional, ou de participantes sem permitir_conflito"""
+    do_profissional = any(conflito["papel"] == "profissional" for conflito in descritos)
+    if descritos and (do_profissional or not permitir_conflito):
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "mensagem": "Conflito de horário com outro agendamento"
+                + (" do profissional responsável" if do_profissional else " de um participante"),
+                "conflitos": descritos,
+            },
+        )
+    return descritos
+
+def erro_sobreposicao(e: IntegrityError) -> HTTPException:
+    """Violação da restrição de exclusão do profissional (gravações concorrentes)"""
+    if "agendamentos_profissional_sem_sobreposicao" in str(e):
+        return HTTPException(status_code=409, detail={"mensagem": "O profissional responsável já tem um agendamento neste horário", "conflitos": []})
+    return HTTPException(status_code=400, detail=f"Dados inválidos: {str(e.orig)}")
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-async def criar_agendamento(agendamento_data: agendamento_schema.AgendamentoCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def criar_agendamento(agendamento_data: agendamento_schema.AgendamentoCreate, db: AsyncSession = Depends(get_db)):
     
     try:
         print(f"Dados recebidos para criação: {agendamento_data}")
@@ -196,6 +432,17 @@ async def criar_agendamento(agendamento_data: agendamento_schema.AgendamentoCrea
         except ValueError as e:
             raise HTTPException(status_code=400, detail=f"Formato de data/hora inválido: {str(e)}")
         
+        conflitos = await checar_conflitos(
+            db,
+            data_hora,
+            agendamento_data.duracao_em_minutos,
+            agendamento_data.profissional_responsavel_id,
+            agendamento_data.participantes_ids,
+            agendamento_data.permitir_conflito,
+        )
+        
+        # Uma consulta valida os ids e traz nome/e-mail para o resumo e os e-mails
+        participantes = await db.run_sync(validar_participantes, agendamento_data.participantes_ids)
        
         db_agendamento = models.Agendamento(
             titulo=agendamento_data.titulo,
@@ -207,82 +454,216 @@ async def criar_agendamento(agendamento_data: agendamento_schema.AgendamentoCrea
             duracao_em_minutos=agendamento_data.duracao_em_minutos,
             local=agendamento_data.local,
             valor=agendamento_data.valor,
-            concluido=agendamento_data.concluido or False
+            concluido=agendamento_data.concluido or False,
+            profissional_responsavel_id=agendamento_data.profissional_responsavel_id,
         )
+        db_agendamento.definir_resumo_participantes(participantes)
     
         
         db.add(db_agendamento)
-        db.flush()  
+        await db.flush()  
+        await db.run_sync(gravar_participantes, db_agendamento.id, [p["id"] for p in participantes])
+        await db.run_sync(metricas_service.registrar_agendamento, db_agendamento)
         
-        print(f"Agendamento criado com ID: {db_agendamento.id}")
+        print(f"Agendamento criado com ID: {db_agendamento.id} e {len(participantes)} participante(s)")
         
-       
-        if agendamento_data.participantes_ids:
-            try:
-                participantes = db.query(models.Cadastro).filter(
-                    models.Cadastro.id.in_(agendamento_data.participantes_ids)
-                ).all()
-                
-                print(f"Encontrados {len(participantes)} participantes para adicionar")
-                
-                for participante in participantes:
-                    db_agendamento.participantes.append(participante)
-                    print(f"Participante {participante.nome} adicionado")
-                        
-            except Exception as e:
-                print(f"Erro ao adicionar participantes: {e}")
-        
-        db.commit()
-        db.refresh(db_agendamento)
+        # Os e-mails vão para a outbox na mesma transação; o worker de e-mails os entrega
         for participante in participantes:
-            email_destino = (participante.email or "").strip()
+            email_destino = (participante["email"] or "").strip()
             if not email_destino:
                 continue
             context = {
-                "nome": participante.nome,
+                "nome": participante["nome"],
                 "titulo": db_agendamento.titulo,
                 "data_hora": data_hora.strftime("%d/%m/%Y %H:%M"),
                 "local": db_agendamento.local,
                 "descricao": db_agendamento.observacoes              
             }
-            enviar_email_background(
-                background_tasks,
+            outbox_service.enfileirar_email(
+                db,
                 destinatario=email_destino,
                 assunto="Novo Agendamento",
                 template_name="agendamento.html",
                 context=context
-                
             )
-        return {"msg": "Agendamento criado e e-mails enviados"}
+        
+        await db.commit()
+        cache_respostas.invalidar("agendamentos")
+        return {"msg": "Agendamento criado e e-mails enfileirados", "id": db_agendamento.id, "conflitos": conflitos}
         return agendamento_schema.AgendamentoResponse.from_orm(db_agendamento)
         
     except HTTPException:
         raise
+    except IntegrityError as e:
+        await db.rollback()
+        raise erro_sobreposicao(e)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Erro ao criar agendamento: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Erro ao criar agendamento: {str(e)}")
 
+@router.get("/calendario")
+async def obter_calendario(
+    request: Request,
+    response: Response,
+    inicio: date = Query(..., description="Primeiro dia (AAAA-MM-DD)"),
+    fim: date = Query(..., description="Último dia, inclusive (AAAA-MM-DD)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Agendamentos do intervalo agrupados por dia, em colunas
+    (id, titulo, data_hora, duracao, status, status_cor, participantes)
+    """
+    if fim < inicio:
+        raise HTTPException(status_code=400, detail="fim deve ser igual ou posterior a inicio")
+    if (fim - inicio).days + 1 > CALENDARIO_MAX_DIAS:
+        raise HTTPException(status_code=400, detail=f"O intervalo do calendário é limitado a {CALENDARIO_MAX_DIAS} dias")
+    
+    try:
+        nao_modificado = await verificar_etag("agendamentos", request, response, db)
+        if nao_modificado is not None:
+            return nao_modificado
+        chave_cache = cache_respostas.chave("agendamentos", request)
+        em_cache = cache_respostas.obter(chave_cache)
+        if em_cache is not None:
+            return em_cache
+        
+        resultado = await db.run_sync(calendario_agendamentos, inicio, fim)
+        cache_respostas.definir(chave_cache, resultado)
+        return resultado
+    except Exception as e:
+        print(f"Erro ao montar calendário: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao montar calendário: {str(e)}")
+
+@router.get("/calendario/semana")
+async def obter_calendario_semana(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    """
+    Calendário da semana atual (domingo a sábado), servido do cache de respostas
+    (invalidado a cada escrita de agendamentos); a ETag muda também na virada do dia.
+    """
+    try:
+        nao_modificado = await verificar_etag("agendamentos", request, response, db)
+        if nao_modificado is not None:
+            return nao_modificado
+        chave_cache = cache_respostas.chave("agendamentos", request)
+        em_cache = cache_respostas.obter(chave_cache)
+        # A chave não muda entre semanas: confere se o cache ainda é da semana atual
+        inicio = periodos_referencia()["inicio_semana"].date()
+        if em_cache is not None and em_cache.get("inicio") == inicio.isoformat():
+            return em_cache
+        
+        resultado = await db.run_sync(calendario_agendamentos, inicio, inicio + timedelta(days=6))
+        cache_respostas.definir(chave_cache, resultado)
+        return resultado
+    except Exception as e:
+        print(f"Erro ao montar calendário da semana: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao montar calendário: {str(e)}")
+
+@router.get("/disponibilidade")
+async def obter_disponibilidade(
+    inicio: date = Query(..., description="Primeiro dia (AAAA-MM-DD)"),
+    fim: date = Query(..., description="Último dia, inclusive (AAAA-MM-DD)"),
+    profissional_id: List[int] = Query([], description="Funcionários (repetir o parâmetro para vários)"),
+    participante_id: List[int] = Query([], description="Cadastros (repetir o parâmetro para vários)"),
+    duracao: int = Query(60, ge=5, le=disponibilidade_service.DURACAO_MAXIMA, description="Duração mínima do horário livre, em minutos"),
+    expediente_inicio: time = Query(time(8, 0), description="Início do expediente (HH:MM)"),
+    expediente_fim: time = Query(time(18, 0), description="Fim do expediente (HH:MM)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Horários livres em comum para as pessoas informadas: os agendamentos delas no
+    período são ordenados e mesclados (O(n log n)) e as lacunas do expediente de
+    cada dia com pelo menos `duracao` minutos são devolvidas
+    """
+    if not profissional_id and not participante_id:
+        raise HTTPException(status_code=400, detail="Informe ao menos um profissional_id ou participante_id")
+    if fim < inicio:
+        raise HTTPException(status_code=400, detail="fim deve ser igual ou posterior a inicio")
+    if (fim - inicio).days + 1 > CALENDARIO_MAX_DIAS:
+        raise HTTPException(status_code=400, detail=f"O intervalo é limitado a {CALENDARIO_MAX_DIAS} dias")
+    
+    try:
+        return await db.run_sync(
+            disponibilidade_service.calcular_disponibilidade,
+            inicio,
+            fim,
+            profissional_id,
+            participante_id,
+            expediente_inicio,
+            expediente_fim,
+            duracao,
+        )
+    except Exception as e:
+        print(f"Erro ao calcular disponibilidade: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao calcular disponibilidade: {str(e)}")
+
+@router.get("/export")
+async def exportar_agendamentos(
+    filtro: str = Query("todos", description="Mesmo filtro da listagem"),
+    formato: str = Query("csv", pattern=PADRAO_FORMATOS, description="csv ou ndjson"),
+    filtros: agendamento_schema.FiltrosAgendamento = Depends(filtros_agendamento),
+):
+    """
+    Exporta todos os agendamentos do filtro em streaming (cursor no servidor),
+    com os nomes dos participantes separados por "; "
+    """
+    participantes = (
+        select(func.string_agg(models.Cadastro.nome, "; "))
+        .select_from(models.agendamento_participantes)
+        .join(models.Cadastro, models.Cadastro.id == models.agendamento_participantes.c.participante_id)
+        .where(models.agendamento_participantes.c.agendamento_id == models.Agendamento.id)
+        .correlate(models.Agendamento)
+        .scalar_subquery()
+    )
+    consulta = select(
+        models.Agendamento.id,
+        models.Agendamento.titulo,
+        models.Agendamento.data_hora,
+        models.Agendamento.tipo_sessao,
+        models.Agendamento.status,
+        models.Agendamento.duracao_em_minutos,
+        models.Agendamento.local,
+        models.Agendamento.valor,
+        models.Agendamento.concluido,
+        models.Agendamento.usuario_id,
+        models.Agendamento.profissional_responsavel_id,
+        models.Agendamento.observacoes,
+        participantes.label("participantes"),
+        models.Agendamento.data_criacao,
+    )
+    condicao = aplicar_filtros_agendamento(consulta, consulta, filtro, filtros)["condicao"]
+    if condicao is not None:
+        consulta = consulta.where(condicao)
+
+    # Ordem pela chave primária: o índice entrega as linhas sem ordenar tudo antes
+    return resposta_exportacao(consulta.order_by(models.Agendamento.id), formato, "agendamentos")
+
 @router.get("/{agendamento_id}", response_model=agendamento_schema.AgendamentoResponse)
-async def obter_agendamento(agendamento_id: int, db: Session = Depends(get_db)):
+async def obter_agendamento(agendamento_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Obter um agendamento específico por ID - Mantendo sua lógica
     """
     try:
+        nao_modificado = await verificar_etag("agendamentos", request, response, db)
+        if nao_modificado is not None:
+            return nao_modificado
+        chave_cache = cache_respostas.chave("agendamentos", request)
+        em_cache = cache_respostas.obter(chave_cache)
+        if em_cache is not None:
+            return em_cache
+        
         print(f"Buscando agendamento ID: {agendamento_id}")
         
-        db_agendamento = db.query(models.Agendamento).options(
-            joinedload(models.Agendamento.participantes)
-        ).filter(
-            models.Agendamento.id == agendamento_id
-        ).first()
+        db_agendamento = await carregar_agendamento(db, agendamento_id)
         
         if db_agendamento is None:
             raise HTTPException(status_code=404, detail="Agendamento não encontrado")
         
-        return agendamento_schema.AgendamentoResponse.from_orm(db_agendamento)
+        resultado = agendamento_schema.AgendamentoResponse.from_orm(db_agendamento)
+        cache_respostas.definir(chave_cache, resultado)
+        return resultado
         
     except HTTPException:
         raise
@@ -294,18 +675,22 @@ async def obter_agendamento(agendamento_id: int, db: Session = Depends(get_db)):
 async def atualizar_agendamento(
     agendamento_id: int, 
     agendamento_data: agendamento_schema.AgendamentoUpdate, 
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
    
     try:
-        db_agendamento = db.query(models.Agendamento).filter(
-            models.Agendamento.id == agendamento_id
-        ).first()
+        db_agendamento = await carregar_agendamento(db, agendamento_id)
         
         if not db_agendamento:
             raise HTTPException(status_code=404, detail="Agendamento não encontrado")
         
         dados_atualizacao = agendamento_data.dict(exclude_unset=True)
+        antes = {
+            "status": db_agendamento.status,
+            "tipo_sessao": db_agendamento.tipo_sessao,
+            "valor": db_agendamento.valor,
+        }
         
         if 'data' in dados_atualizacao and 'hora' in dados_atualizacao:
             try:
@@ -319,49 +704,89 @@ async def atualizar_agendamento(
         if 'descricao' in dados_atualizacao:
             dados_atualizacao['observacoes'] = dados_atualizacao.pop('descricao')
         
+        permitir_conflito = dados_atualizacao.pop('permitir_conflito', False)
+        participantes_ids = dados_atualizacao.get('participantes_ids') or [p.id for p in db_agendamento.participantes]
+        status_final = dados_atualizacao.get('status', db_agendamento.status)
+        campos_de_agenda = {'data_hora', 'duracao_em_minutos', 'profissional_responsavel_id', 'participantes_ids', 'status'}
+        conflitos = []
+        if campos_de_agenda & dados_atualizacao.keys() and status_final not in disponibilidade_service.STATUS_LIVRES:
+            conflitos = await checar_conflitos(
+                db,
+                dados_atualizacao.get('data_hora', db_agendamento.data_hora),
+                dados_atualizacao.get('duracao_em_minutos', db_agendamento.duracao_em_minutos),
+                dados_atualizacao.get('profissional_responsavel_id', db_agendamento.profissional_responsavel_id),
+                participantes_ids,
+                permitir_conflito,
+                ignorar_id=agendamento_id,
+            )
+            if conflitos:
+                # Gravado com permitir_conflito: sinaliza sem mudar o corpo da resposta
+                response.headers["X-Conflitos"] = str(len(conflitos))
+                print(f"Agendamento {agendamento_id} gravado com {len(conflitos)} conflito(s) de participantes")
+        
+        # Associações gravadas direto na tabela: só os removidos e os incluídos
+        novos_participantes = None
         if 'participantes_ids' in dados_atualizacao:
             participantes_ids = dados_atualizacao.pop('participantes_ids')
             if participantes_ids:
-                participantes = db.query(models.Cadastro).filter(
-                    models.Cadastro.id.in_(participantes_ids)
-                ).all()
-                db_agendamento.participantes = participantes
+                novos_participantes = await db.run_sync(validar_participantes, participantes_ids)
+                await db.run_sync(
+                    gravar_participantes,
+                    agendamento_id,
+                    [p["id"] for p in novos_participantes],
+                    [p.id for p in db_agendamento.participantes],
+                )
+                db_agendamento.definir_resumo_participantes(novos_participantes)
         
         for campo, valor in dados_atualizacao.items():
             if hasattr(db_agendamento, campo):
                 setattr(db_agendamento, campo, valor)
         
         db_agendamento.data_atualizacao = datetime.now()
+        await db.run_sync(metricas_service.registrar_alteracao_agendamento, antes, db_agendamento)
         
-        db.commit()
-        db.refresh(db_agendamento)
+        await db.commit()
+        cache_respostas.invalidar("agendamentos")
+        # expire_on_commit=False: o objeto já está atualizado, sem recarregar; os
+        # participantes gravados fora do relacionamento vêm de validar_participantes
         
         print(f"Agendamento {agendamento_id} atualizado com sucesso")
-        return agendamento_schema.AgendamentoResponse.from_orm(db_agendamento)
+        resposta = agendamento_schema.AgendamentoResponse.from_orm(db_agendamento)
+        if novos_participantes is not None:
+            resposta.participantes = [agendamento_schema.ParticipanteResponse(**p) for p in novos_participantes]
+        return resposta
         
     except HTTPException:
         raise
+    except IntegrityError as e:
+        await db.rollback()
+        raise erro_sobreposicao(e)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Erro ao atualizar agendamento {agendamento_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao atualizar agendamento: {str(e)}")
 
 @router.delete("/{agendamento_id}")
-async def excluir_agendamento(agendamento_id: int, db: Session = Depends(get_db)):
+async def excluir_agendamento(agendamento_id: int, db: AsyncSession = Depends(get_db)):
     """
     Excluir agendamento
     """
     try:
-        db_agendamento = db.query(models.Agendamento).filter(
-            models.Agendamento.id == agendamento_id
-        ).first()
+        db_agendamento = await carregar_agendamento(db, agendamento_id)
         
         if not db_agendamento:
             raise HTTPException(status_code=404, detail="Agendamento não encontrado")
         
         titulo = db_agendamento.titulo
-        db.delete(db_agendamento)
-        db.commit()
+        await db.run_sync(metricas_service.registrar_agendamento, db_agendamento, -1)
+        if db_agendamento.recorrencia_id is not None:
+            # Ocorrência materializada: sem a exceção a expansão voltaria a mostrá-la
+            await db.run_sync(
+                recorrencia_service.adicionar_excecao, db_agendamento.recorrencia_id, db_agendamento.ocorrencia_dia
+            )
+        await db.delete(db_agendamento)
+        await db.commit()
+        cache_respostas.invalidar("agendamentos")
         
         print(f"Agendamento '{titulo}' excluído com sucesso")
         return {"message": "Agendamento excluído com sucesso", "id": agendamento_id}
@@ -369,90 +794,89 @@ async def excluir_agendamento(agendamento_id: int, db: Session = Depends(get_db)
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Erro ao excluir agendamento {agendamento_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao excluir agendamento: {str(e)}")
 
+@router.post("/bulk", response_model=agendamento_schema.ResultadoLote)
+async def operar_em_massa(dados: agendamento_schema.AgendamentosLote, db: AsyncSession = Depends(get_db)):
+    """
+    Altera vários agendamentos de uma vez: status, concluido, reagendar
+    (desloca data_hora em deslocamento_minutos) ou excluir. A seleção é por ids
+    e/ou pelos mesmos filtros da listagem, e tudo roda em uma transação com um
+    único UPDATE/DELETE. Com notificar, cada participante recebe um só e-mail
+    com os seus agendamentos alterados (status, reagendar e excluir).
+
+    Ocorrências virtuais das séries não são selecionadas; no reagendamento vale
+    a restrição de sobreposição do profissional (409), mas os conflitos de
+    participantes não são verificados.
+    """
+    try:
+        condicoes = [
+            condicao for condicao in (
+                models.Agendamento.id.in_(dados.ids) if dados.ids else None,
+                condicao_filtro_agendamento(dados.filtro.value) if dados.filtro else None,
+                condicao_filtros_combinados(dados.filtros),
+            )
+            if condicao is not None
+        ]
+        # Sem condição o UPDATE/DELETE alcançaria todos os agendamentos
+        if not condicoes:
+            raise HTTPException(status_code=422, detail="Nenhum critério de seleção: informe ids, filtro ou filtros")
+        resultado = await db.run_sync(operacoes_lote_service.executar_lote, dados, and_(*condicoes))
+        await db.commit()
+        if resultado["afetados"]:
+            cache_respostas.invalidar("agendamentos")
+
+        print(f"Operação em massa '{dados.operacao}': {resultado['afetados']} agendamento(s), {resultado['emails_enfileirados']} e-mail(s)")
+        return resultado
+
+    except HTTPException:
+        raise
+    except IntegrityError as e:
+        await db.rollback()
+        raise erro_sobreposicao(e)
+    except Exception as e:
+        await db.rollback()
+        print(f"Erro na operação em massa '{dados.operacao}': {e}")
+        raise HTTPException(status_code=500, detail=f"Erro na operação em massa: {str(e)}")
+
 @router.get("/stats/resumo")
-async def obter_estatisticas_agendamentos(db: Session = Depends(get_db)):
+async def obter_estatisticas_agendamentos(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Obter estatísticas dos agendamentos para dashboard
+
+    Todas as contagens (períodos, cada status e cada tipo de sessão presente)
+    saem de uma única consulta agregada.
     """
     try:
-        hoje = datetime.now().date()
-        inicio_hoje = datetime.combine(hoje, datetime.min.time())
-        fim_hoje = datetime.combine(hoje + timedelta(days=1), datetime.min.time())
-        
-        
-        dias_desde_domingo = hoje.weekday() + 1 if hoje.weekday() != 6 else 0
-        inicio_semana = datetime.combine(hoje - timedelta(days=dias_desde_domingo), datetime.min.time())
-        
-        inicio_mes = datetime.combine(hoje.replace(day=1), datetime.min.time())
-        
-        # Contar estatísticas usando seu modelo
-        total = db.query(func.count(models.Agendamento.id)).scalar()
-        
-        hoje_count = db.query(func.count(models.Agendamento.id)).filter(
-            and_(models.Agendamento.data_hora >= inicio_hoje, models.Agendamento.data_hora < fim_hoje)
-        ).scalar()
-        
-        semana_count = db.query(func.count(models.Agendamento.id)).filter(
-            models.Agendamento.data_hora >= inicio_semana
-        ).scalar()
-        
-        mes_count = db.query(func.count(models.Agendamento.id)).filter(
-            models.Agendamento.data_hora >= inicio_mes
-        ).scalar()
-        
-        # Por tipo de sessão
-        reunioes_count = db.query(func.count(models.Agendamento.id)).filter(
-            models.Agendamento.tipo_sessao == "reuniao"
-        ).scalar()
-        
-        consultas_count = db.query(func.count(models.Agendamento.id)).filter(
-            models.Agendamento.tipo_sessao == "consulta"
-        ).scalar()
-        
-        eventos_count = db.query(func.count(models.Agendamento.id)).filter(
-            models.Agendamento.tipo_sessao == "evento"
-        ).scalar()
-        
-        # Por status
-        agendados_count = db.query(func.count(models.Agendamento.id)).filter(
-            models.Agendamento.status == "agendado"
-        ).scalar()
-        
-        confirmados_count = db.query(func.count(models.Agendamento.id)).filter(
-            models.Agendamento.status == "confirmado"
-        ).scalar()
-        
-        return {
-            "total": total,
-            "hoje": hoje_count,
-            "esta_semana": semana_count,
-            "este_mes": mes_count,
-            "reunioes": reunioes_count,
-            "consultas": consultas_count,
-            "eventos": eventos_count,
-            "agendados": agendados_count,
-            "confirmados": confirmados_count
-        }
+        nao_modificado = await verificar_etag("agendamentos", request, response, db)
+        if nao_modificado is not None:
+            return nao_modificado
+        chave_cache = cache_respostas.chave("agendamentos", request)
+        em_cache = cache_respostas.obter(chave_cache)
+        if em_cache is not None:
+            return em_cache
+        
+        resultado = await db.run_sync(estatisticas_agendamentos)
+        cache_respostas.definir(chave_cache, resultado)
+        return resultado
         
     except Exception as e:
         print(f"Erro ao buscar estatísticas: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar estatísticas: {str(e)}")
 
 @router.get("/test/database")
-async def test_database(db: Session = Depends(get_db)):
+async def test_database(db: AsyncSession = Depends(get_db)):
     """
     Endpoint de teste para verificar se o banco está funcionando
     """
     try:
-        count_agendamentos = db.query(models.Agendamento).count()
+        count_agendamentos = await db.scalar(select(func.count(models.Agendamento.id)))
         
-        count_cadastros = db.query(models.Cadastro).count()
+        count_cadastros = await db.scalar(select(func.count(models.Cadastro.id)))
         
-        result = db.execute("SELECT name FROM sqlite_master WHERE type='table';").fetchall() if "sqlite" in str(db.bind.url) else []
+        result = []
         
         return {
             "database_status": "connected",
@@ -1,12 +1,27 @@
 import datetime
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 
 from backend.database import models
 from backend.database.database import get_db
 from backend.schemas import cadastro as cadastro_schema
+from backend.services.cadastro_service import COLUNAS_LISTAGEM, estatisticas_cadastros, itens_da_listagem
+from backend.services.autocomplete_service import autocomplete_cadastros
+from backend.services import agendamento_service, busca_service, importacao_service, metricas_service
+from backend.utils.cache import cache_respostas
+from backend.utils.etag import verificar_etag
+from backend.utils.contagem import PADRAO_ESTRATEGIAS, contar_total
+from backend.utils.exportacao import PADRAO_FORMATOS, resposta_exportacao
+from backend.utils.resposta_json import resposta_json, serializar
+
+# Campos do cadastro copiados para Agendamento.participantes_resumo
+CAMPOS_RESUMO_PARTICIPANTE = {"nome", "email", "telefone"}
+
+# Quantos erros de linha a importação em massa devolve na resposta
+LIMITE_ERROS_IMPORTACAO = 1000
 
 router = APIRouter(
     prefix="/cadastros",
@@ -16,106 +31,100 @@ router = APIRouter(
 from pydantic import BaseModel
 
 class CadastroPaginado(BaseModel):
-    cadastros: List[Dict[str, Any]]
-    total: int
+    cadastros: List[cadastro_schema.CadastroItemListagem]
+    total: Optional[int] = None
     pagina: int
-    totalPaginas: int
+    totalPaginas: Optional[int] = None
     limit: int
     skip: int
     filtro: str
     temProxima: bool
     temAnterior: bool
+    contagem: str = "exata"
+
+def condicao_filtro_cadastro(filtro: str):
+    """Busca por trecho de nome, email ou telefone (None quando o filtro está vazio)"""
+    if not filtro or not filtro.strip():
+        return None
+    return busca_service.condicao_busca(filtro.strip())
 
 @router.get("/", response_model=CadastroPaginado)
 async def listar_cadastros(
+    request: Request,
+    response: Response,
     limit: int = Query(6, ge=1, le=50, description="Número de itens por página"),
     skip: int = Query(0, ge=0, description="Número de itens para pular"),
     filtro: str = Query("", description="Filtro de busca por nome, email ou telefone"),
-    db: Session = Depends(get_db)
+    contagem: str = Query("exata", pattern=PADRAO_ESTRATEGIAS, description="Como calcular o total: exata, estimada, cache ou nenhuma"),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Listar cadastros com paginação e filtros
+
+    As linhas são lidas como tuplas e o corpo é serializado uma vez com orjson
+    (backend/utils/resposta_json.py), inclusive o guardado no cache.
     """
     try:
+        nao_modificado = await verificar_etag("cadastros", request, response, db)
+        if nao_modificado is not None:
+            return nao_modificado
+        chave_cache = cache_respostas.chave("cadastros", request)
+        em_cache = cache_respostas.obter_serializado(chave_cache)
+        if em_cache is not None:
+            return resposta_json(em_cache, response)
+
         pagina = (skip // limit) + 1
         print(f"Buscando cadastros - Página: {pagina}, Limit: {limit}, Skip: {skip}, Filtro: '{filtro}'")
         
         # Query base
-        query = db.query(models.Cadastro)
-        count_query = db.query(func.count(models.Cadastro.id))
+        query = select(*COLUNAS_LISTAGEM)
+        count_query = select(func.count(models.Cadastro.id))
         
         # Aplicar filtro se fornecido
-        if filtro and filtro.strip():
+        filtro_condicao = condicao_filtro_cadastro(filtro)
+        if filtro_condicao is not None:
             filtro = filtro.strip()
-            filtro_condicao = or_(
-                models.Cadastro.nome.ilike(f"%{filtro}%"),
-                models.Cadastro.email.ilike(f"%{filtro}%"),
-                models.Cadastro.telefone.ilike(f"%{filtro}%")
-            )
             query = query.filter(filtro_condicao)
             count_query = count_query.filter(filtro_condicao)
         
-        # Contar total
-        total = count_query.scalar()
+        # Contar total conforme a estratégia pedida
+        total, contagem_usada = await db.run_sync(contar_total, count_query, models.Cadastro, filtro.strip(), contagem)
         
-        # Buscar cadastros com paginação
-        cadastros = (
+        # Com busca por trigramas os mais parecidos com o filtro vêm primeiro
+        ordem = busca_service.ordem_relevancia(filtro) or [models.Cadastro.data_criacao.desc()]
+        
+        # Buscar cadastros com paginação (uma linha extra indica se há próxima página)
+        resultado_consulta = await db.execute(
             query
-            .order_by(models.Cadastro.data_criacao.desc())
+            .order_by(*ordem)
             .offset(skip)
-            .limit(limit)
-            .all()
+            .limit(limit + 1)
         )
+        cadastros = resultado_consulta.all()
+        tem_proxima = len(cadastros) > limit
+        cadastros_processados = itens_da_listagem(cadastros[:limit])
         
-        # Processar cadastros para JSON
-        cadastros_processados = []
-        for cadastro in cadastros:
-            try:
-                cadastro_dict = {
-                    "id": cadastro.id,
-                    "nome": cadastro.nome,
-                    "email": cadastro.email,
-                    "telefone": cadastro.telefone,
-                    "data_nascimento": cadastro.data_nascimento.isoformat() if cadastro.data_nascimento else None,
-                    "endereco": getattr(cadastro, 'endereco', None),
-                    "data_criacao": cadastro.data_criacao.isoformat() if hasattr(cadastro, 'data_criacao') and cadastro.data_criacao else None,
-                    "data_atualizacao": getattr(cadastro, 'data_atualizacao', None)
-                }
-                if cadastro_dict["data_atualizacao"]:
-                    cadastro_dict["data_atualizacao"] = cadastro_dict["data_atualizacao"].isoformat()
-                
-                cadastros_processados.append(cadastro_dict)
-                
-            except Exception as e:
-                print(f"Erro ao processar cadastro {cadastro.id}: {e}")
-                # Fallback com dados mínimos
-                cadastros_processados.append({
-                    "id": cadastro.id,
-                    "nome": getattr(cadastro, 'nome', 'Nome não disponível'),
-                    "email": getattr(cadastro, 'email', ''),
-                    "telefone": getattr(cadastro, 'telefone', ''),
-                    "data_nascimento": None,
-                    "endereco": None,
-                    "data_criacao": None,
-                    "data_atualizacao": None,
-                    "error": f"Erro ao processar: {str(e)}"
-                })
-        
-        total_paginas = (total + limit - 1) // limit if total > 0 else 1
+        if total is None:
+            total_paginas = None
+        else:
+            total_paginas = (total + limit - 1) // limit if total > 0 else 1
         
         print(f"Retornando {len(cadastros_processados)} cadastros de {total} total")
         
-        return CadastroPaginado(
-            cadastros=cadastros_processados,
-            total=total,
-            pagina=pagina,
-            totalPaginas=total_paginas,
-            limit=limit,
-            skip=skip,
-            filtro=filtro,
-            temProxima=pagina < total_paginas,
-            temAnterior=pagina > 1
-        )
+        conteudo = serializar({
+            "cadastros": cadastros_processados,
+            "total": total,
+            "pagina": pagina,
+            "totalPaginas": total_paginas,
+            "limit": limit,
+            "skip": skip,
+            "filtro": filtro,
+            "temProxima": tem_proxima,
+            "temAnterior": pagina > 1,
+            "contagem": contagem_usada,
+        })
+        cache_respostas.definir_serializado(chave_cache, conteudo)
+        return resposta_json(conteudo, response)
         
     except Exception as e:
         print(f"Erro ao buscar cadastros: {e}")
@@ -126,56 +135,183 @@ async def listar_cadastros(
 # Manter o endpoint antigo para compatibilidade (opcional)
 @router.get("/simples")
 async def listar_cadastros_simples(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    request: Request, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)
 ):
     """Endpoint simples para compatibilidade"""
     try:
-        return db.query(models.Cadastro).offset(skip).limit(limit).all()
+        chave_cache = cache_respostas.chave("cadastros", request)
+        em_cache = cache_respostas.obter(chave_cache)
+        if em_cache is not None:
+            return em_cache
+
+        consulta = await db.execute(select(models.Cadastro).offset(skip).limit(limit))
+        resultado = consulta.scalars().all()
+        cache_respostas.definir(chave_cache, resultado)
+        return resultado
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/autocomplete")
+async def autocompletar_cadastros(
+    q: str = Query(..., min_length=1, max_length=100, description="Início do nome, de um sobrenome ou do email"),
+    limite: int = Query(10, ge=1, le=50, description="Máximo de sugestões"),
+):
+    """Sugestões {id, nome, email} para seleção de participantes, servidas pelo índice de prefixos"""
+    try:
+        return await autocomplete_cadastros.buscar(q, limite)
+    except Exception as e:
+        print(f"Erro no autocomplete de cadastros: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro no autocomplete: {str(e)}")
+
+@router.get("/export")
+async def exportar_cadastros(
+    filtro: str = Query("", description="Mesmo filtro da listagem (nome, email ou telefone)"),
+    formato: str = Query("csv", pattern=PADRAO_FORMATOS, description="csv ou ndjson"),
+):
+    """Exporta todos os cadastros do filtro em streaming (cursor no servidor)"""
+    consulta = select(
+        models.Cadastro.id,
+        models.Cadastro.nome,
+        models.Cadastro.email,
+        models.Cadastro.telefone,
+        models.Cadastro.data_nascimento,
+        models.Cadastro.endereco,
+        models.Cadastro.data_criacao,
+    )
+    condicao = condicao_filtro_cadastro(filtro)
+    if condicao is not None:
+        consulta = consulta.where(condicao)
+
+    # Ordem pela chave primária: o índice entrega as linhas sem ordenar tudo antes
+    return resposta_exportacao(consulta.order_by(models.Cadastro.id), formato, "cadastros")
+
 @router.get("/{cadastro_id}")
-async def obter_cadastro(cadastro_id: int, db: Session = Depends(get_db)):
+async def obter_cadastro(cadastro_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     try:
-        cadastro = (
-            db.query(models.Cadastro).filter(models.Cadastro.id == cadastro_id).first()
-        )
+        nao_modificado = await verificar_etag("cadastros", request, response, db)
+        if nao_modificado is not None:
+            return nao_modificado
+        chave_cache = cache_respostas.chave("cadastros", request)
+        em_cache = cache_respostas.obter(chave_cache)
+        if em_cache is not None:
+            return em_cache
+
+        cadastro = await db.get(models.Cadastro, cadastro_id)
         if not cadastro:
             raise HTTPException(status_code=404, detail="Cadastro não encontrado")
+        cache_respostas.definir(chave_cache, cadastro)
         return cadastro
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/", response_model=cadastro_schema.Cadastro, status_code=201)
 async def criar_cadastro(
-    cadastro: cadastro_schema.Cadastro, db: Session = Depends(get_db)
+    cadastro: cadastro_schema.Cadastro, db: AsyncSession = Depends(get_db)
 ):
     try:
         print(f"Criando cadastro: {cadastro.nome}")
 
         db_cadastro = models.Cadastro(**cadastro.model_dump())
         db.add(db_cadastro)
-        db.commit()
-        db.refresh(db_cadastro)
+        await db.flush()
+        await db.run_sync(metricas_service.registrar_cadastros, [db_cadastro.data_criacao])
+        await db.commit()
+        versao_anterior = cache_respostas.versao("cadastros")
+        versoes = cache_respostas.invalidar("cadastros")
+        autocomplete_cadastros.atualizar(
+            db_cadastro.id, db_cadastro.nome, db_cadastro.email, versao_anterior, versoes.get("cadastros"),
+        )
 
         print(f"Cadastro criado com ID: {db_cadastro.id}")
         return db_cadastro
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Erro ao criar cadastro: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao criar cadastro: {str(e)}")
 
+@router.post("/bulk")
+async def importar_cadastros(
+    request: Request,
+    formato: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="csv ou ndjson; por padrão deduzido do Content-Type"),
+    modo: str = Query("ignorar", pattern="^(ignorar|atualizar)$", description="O que fazer com e-mails já cadastrados"),
+    tamanho_lote: int = Query(1000, ge=1, le=5000, description="Linhas validadas e gravadas por transação"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Importa cadastros de um corpo CSV (com cabeçalho) ou NDJSON enviado em streaming.
+    Cada lote é gravado e confirmado separadamente; linhas inválidas entram no
+    relatório de erros sem interromper a importação.
+    """
+    if formato is None:
+        tipo = request.headers.get("content-type", "").lower()
+        formato = importacao_service.FORMATO_NDJSON if ("ndjson" in tipo or "jsonl" in tipo) else importacao_service.FORMATO_CSV
+
+    if formato == importacao_service.FORMATO_NDJSON:
+        registros = importacao_service.registros_ndjson(request.stream())
+    else:
+        registros = importacao_service.registros_csv(request.stream())
+
+    relatorio = {"formato": formato, "modo": modo, "recebidos": 0, "criados": 0, "atualizados": 0, "ignorados": 0, "com_erro": 0}
+    erros: List[Dict[str, Any]] = []
+    gravou = False
+
+    def anotar_erros(novos):
+        relatorio["com_erro"] += len(novos)
+        erros.extend(novos[:max(LIMITE_ERROS_IMPORTACAO - len(erros), 0)])
+
+    async def gravar(lote):
+        nonlocal gravou
+        relatorio["recebidos"] += len(lote)
+        validas, numeros, erros_lote = importacao_service.separar_lote(lote)
+        anotar_erros(erros_lote)
+        if not validas:
+            return
+        try:
+            criados, atualizados = await db.run_sync(importacao_service.inserir_lote, validas, modo)
+            await db.run_sync(metricas_service.registrar_cadastros, criados)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            print(f"Erro ao gravar lote de cadastros (linhas {numeros[0]}-{numeros[-1]}): {e}")
+            anotar_erros([{"linha": numero, "email": linha["email"], "erro": f"Erro ao gravar lote: {e}"} for numero, linha in zip(numeros, validas)])
+            return
+        gravou = gravou or bool(criados or atualizados)
+        relatorio["criados"] += len(criados)
+        relatorio["atualizados"] += atualizados
+        relatorio["ignorados"] += len(validas) - len(criados) - atualizados
+
+    try:
+        lote = []
+        async for registro in registros:
+            lote.append(registro)
+            if len(lote) >= tamanho_lote:
+                await gravar(lote)
+                lote = []
+        await gravar(lote)
+    except UnicodeDecodeError as e:
+        anotar_erros([{"linha": None, "erro": f"Arquivo não está em UTF-8: {e}"}])
+    finally:
+        if gravou:
+            cache_respostas.invalidar("cadastros")
+        if relatorio["atualizados"]:
+            # Cadastros atualizados podem estar no resumo de participantes
+            cache_respostas.invalidar("agendamentos")
+
+    print(
+        f"Importação de cadastros: {relatorio['criados']} criados, {relatorio['atualizados']} atualizados, "
+        f"{relatorio['ignorados']} ignorados, {relatorio['com_erro']} com erro"
+    )
+    return {**relatorio, "erros": erros, "errosTruncados": relatorio["com_erro"] > len(erros)}
+
 @router.put("/{cadastro_id}", response_model=cadastro_schema.Cadastro)
 async def atualizar_cadastro(
     cadastro_id: int,
     cadastro_data: cadastro_schema.CadastroUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
-        db_cadastro = (
-            db.query(models.Cadastro).filter(models.Cadastro.id == cadastro_id).first()
-        )
+        db_cadastro = await db.get(models.Cadastro, cadastro_id)
 
         if not db_cadastro:
             raise HTTPException(status_code=404, detail="Cadastro não encontrado")
@@ -187,8 +323,21 @@ async def atualizar_cadastro(
             if hasattr(db_cadastro, campo) and campo != "id":
                 setattr(db_cadastro, campo, valor)
 
-        db.commit()
-        db.refresh(db_cadastro)
+        # Nome, e-mail e telefone também estão no resumo de participantes dos agendamentos
+        resumo_alterado = bool(CAMPOS_RESUMO_PARTICIPANTE & dados_atualizacao.keys())
+        if resumo_alterado:
+            await db.flush()
+            await db.run_sync(agendamento_service.recalcular_participantes_dos_cadastros, [cadastro_id])
+
+        await db.commit()
+        versao_anterior = cache_respostas.versao("cadastros")
+        versoes = cache_respostas.invalidar("cadastros")
+        if resumo_alterado:
+            cache_respostas.invalidar("agendamentos")
+        await db.refresh(db_cadastro)
+        autocomplete_cadastros.atualizar(
+            db_cadastro.id, db_cadastro.nome, db_cadastro.email, versao_anterior, versoes.get("cadastros"),
+        )
 
         print(f"Cadastro {cadastro_id} atualizado com sucesso")
         return db_cadastro
@@ -196,25 +345,43 @@ async def atualizar_cadastro(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Erro ao atualizar cadastro {cadastro_id}: {e}")
         raise HTTPException(
             status_code=500, detail=f"Erro ao atualizar cadastro: {str(e)}"
         )
 
 @router.delete("/{cadastro_id}")
-async def excluir_cadastro(cadastro_id: int, db: Session = Depends(get_db)):
+async def excluir_cadastro(cadastro_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        db_cadastro = (
-            db.query(models.Cadastro).filter(models.Cadastro.id == cadastro_id).first()
+        # Relacionamentos carregados antes: o delete do ORM precisa deles e a
+        # sessão assíncrona não carrega nada implicitamente
+        resultado_consulta = await db.execute(
+            select(models.Cadastro)
+            .options(
+                selectinload(models.Cadastro.agendamentos),
+                selectinload(models.Cadastro.agendamentos_participando),
+            )
+            .where(models.Cadastro.id == cadastro_id)
         )
+        db_cadastro = resultado_consulta.scalars().first()
 
         if not db_cadastro:
             raise HTTPException(status_code=404, detail="Cadastro não encontrado")
 
         nome = db_cadastro.nome
-        db.delete(db_cadastro)
-        db.commit()
+        participando = [agendamento.id for agendamento in db_cadastro.agendamentos_participando]
+        await db.run_sync(metricas_service.registrar_cadastros, [db_cadastro.data_criacao], -1)
+        await db.delete(db_cadastro)
+        if participando:
+            await db.flush()
+            await db.run_sync(agendamento_service.recalcular_participantes, participando)
+        await db.commit()
+        versao_anterior = cache_respostas.versao("cadastros")
+        versoes = cache_respostas.invalidar("cadastros")
+        if participando:
+            cache_respostas.invalidar("agendamentos")
+        autocomplete_cadastros.remover(cadastro_id, versao_anterior, versoes.get("cadastros"))
 
         print(f"Cadastro '{nome}' excluído com sucesso")
         return {"message": "Cadastro excluído com sucesso", "id": cadastro_id}
@@ -222,52 +389,26 @@ async def excluir_cadastro(cadastro_id: int, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Erro ao excluir cadastro {cadastro_id}: {e}")
         raise HTTPException(
             status_code=500, detail=f"Erro ao excluir cadastro: {str(e)}"
         )
 
 @router.get("/stats/resumo")
-async def obter_estatisticas_cadastros(db: Session = Depends(get_db)):
+async def obter_estatisticas_cadastros(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     try:
-        from datetime import datetime, timedelta
-
-        hoje = datetime.now().date()
-        inicio_mes = datetime(hoje.year, hoje.month, 1).date()
-        mes_passado = (inicio_mes - timedelta(days=1)).replace(day=1)
-
-        total = db.query(func.count(models.Cadastro.id)).scalar()
-
-        try:
-            este_mes = (
-                db.query(func.count(models.Cadastro.id))
-                .filter(func.date(models.Cadastro.data_criacao) >= inicio_mes)
-                .scalar()
-            )
-
-            mes_anterior = (
-                db.query(func.count(models.Cadastro.id))
-                .filter(
-                    func.date(models.Cadastro.data_criacao) >= mes_passado,
-                    func.date(models.Cadastro.data_criacao) < inicio_mes,
-                )
-                .scalar()
-            )
-        except:
-            este_mes = 0
-            mes_anterior = 0
-
-        return {
-            "total": total,
-            "este_mes": este_mes,
-            "mes_anterior": mes_anterior,
-            "crescimento": (
-                ((este_mes - mes_anterior) / mes_anterior * 100)
-                if mes_anterior > 0
-                else 0
-            ),
-        }
+        nao_modificado = await verificar_etag("cadastros", request, response, db)
+        if nao_modificado is not None:
+            return nao_modificado
+        chave_cache = cache_respostas.chave("cadastros", request)
+        em_cache = cache_respostas.obter(chave_cache)
+        if em_cache is not None:
+            return em_cache
+
+        resultado = await db.run_sync(estatisticas_cadastros)
+        cache_respostas.definir(chave_cache, resultado)
+        return resultado
 
     except Exception as e:
         print(f"Erro ao buscar estatísticas: {e}")
@@ -277,32 +418,42 @@ async def obter_estatisticas_cadastros(db: Session = Depends(get_db)):
 
 @router.get("/buscar/avancada")
 async def buscar_cadastros_avancada(
+    request: Request,
     nome: Optional[str] = None,
     email: Optional[str] = None,
     telefone: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
-        query = db.query(models.Cadastro)
-
-        if nome:
-            query = query.filter(models.Cadastro.nome.ilike(f"%{nome}%"))
-        if email:
-            query = query.filter(models.Cadastro.email.ilike(f"%{email}%"))
-        if telefone:
-            query = query.filter(models.Cadastro.telefone.ilike(f"%{telefone}%"))
-
-        cadastros = query.offset(skip).limit(limit).all()
-        total = query.count()
-
-        return {
+        chave_cache = cache_respostas.chave("cadastros", request)
+        em_cache = cache_respostas.obter(chave_cache)
+        if em_cache is not None:
+            return em_cache
+
+        query = select(models.Cadastro)
+
+        condicoes = [
+            busca_service.condicao_nome(nome) if nome else None,
+            busca_service.condicao_email(email) if email else None,
+            busca_service.condicao_telefone(telefone) if telefone else None,
+        ]
+        for condicao in condicoes:
+            if condicao is not None:
+                query = query.where(condicao)
+
+        cadastros = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+        resultado = {
             "cadastros": [cadastro_schema.Cadastro.from_orm(c) for c in cadastros],
             "total": total,
             "skip": skip,
             "limit": limit,
         }
+        cache_respostas.definir(chave_cache, resultado)
+        return resultado
 
     except Exception as e:
         print(f"Erro na busca avançada: {e}")
@@ -310,13 +461,13 @@ async def buscar_cadastros_avancada(
 
 # Endpoint de teste
 @router.get("/test/database")
-async def test_database_cadastros(db: Session = Depends(get_db)):
+async def test_database_cadastros(db: AsyncSession = Depends(get_db)):
     try:
         # Teste básico
-        count_cadastros = db.query(models.Cadastro).count()
+        count_cadastros = await db.scalar(select(func.count(models.Cadastro.id)))
 
         # Buscar um cadastro aleatório
-        cadastro_exemplo = db.query(models.Cadastro).first()
+        cadastro_exemplo = (await db.execute(select(models.Cadastro).limit(1))).scalars().first()
 
         return {
             "database_status": "connected",
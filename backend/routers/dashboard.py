@@ -1,50 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from backend.database.database import get_db
-from backend.database import models
+from backend.services.metricas_service import (
+    METRICA_AGENDAMENTOS,
+    METRICA_CADASTROS,
+    METRICA_STATUS,
+    METRICA_TIPO_SESSAO,
+    somar_metricas,
+)
+from backend.utils.cache import cache_respostas
+from backend.utils.etag import verificar_etag
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
-# ✅ Resumo geral
+
+def _quantidade(metricas, metrica: str, janela: str, chave: str = "") -> int:
+    return metricas.get(metrica, {}).get(chave, {}).get(janela, {}).get("quantidade", 0)
+
+
+# ✅ Resumo geral (lido da tabela de métricas diárias)
 @router.get("/summary")
-def get_summary(db: Session = Depends(get_db)):
+async def get_summary(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     try:
-        total_cadastros = db.query(models.Cadastro).count()
-        total_agendamentos = db.query(models.Agendamento).count()
+        nao_modificado = await verificar_etag("dashboard", request, response, db)
+        if nao_modificado is not None:
+            return nao_modificado
+        chave_cache = cache_respostas.chave("dashboard", request)
+        em_cache = cache_respostas.obter(chave_cache)
+        if em_cache is not None:
+            return em_cache
 
-        return {
-            "cadastros": total_cadastros,
-            "agendamentos": total_agendamentos
+        metricas = await db.run_sync(somar_metricas, {"total": None})
+
+        resultado = {
+            "cadastros": _quantidade(metricas, METRICA_CADASTROS, "total"),
+            "agendamentos": _quantidade(metricas, METRICA_AGENDAMENTOS, "total"),
+            "agendamentos_por_status": {
+                chave: janelas["total"]["quantidade"]
+                for chave, janelas in metricas.get(METRICA_STATUS, {}).items()
+            },
+            "agendamentos_por_tipo_sessao": {
+                chave: janelas["total"]["quantidade"]
+                for chave, janelas in metricas.get(METRICA_TIPO_SESSAO, {}).items()
+            },
+            "valor_total": metricas.get(METRICA_AGENDAMENTOS, {}).get("", {}).get("total", {}).get("valor_total", 0.0),
         }
+        cache_respostas.definir(chave_cache, resultado)
+        return resultado
     except Exception:
         raise HTTPException(status_code=500, detail="Erro ao buscar dados do dashboard")
 
 @router.get("/atividade")
-def get_atividade(db: Session = Depends(get_db)):
+async def get_atividade(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     try:
+        nao_modificado = await verificar_etag("dashboard", request, response, db)
+        if nao_modificado is not None:
+            return nao_modificado
+        chave_cache = cache_respostas.chave("dashboard", request)
+        em_cache = cache_respostas.obter(chave_cache)
+        if em_cache is not None:
+            return em_cache
+
         hoje = datetime.now().date()
         semana_inicio = hoje - timedelta(days=hoje.weekday())
         mes_inicio = hoje.replace(day=1)
 
+        # Uma consulta sobre O(dias) linhas de metricas_diarias
+        metricas = await db.run_sync(somar_metricas, {"hoje": hoje, "semana": semana_inicio, "mes": mes_inicio})
+
         atividades_hoje = (
-            db.query(models.Agendamento).filter(models.Agendamento.data_criacao >= hoje).count() +
-            db.query(models.Cadastro).filter(models.Cadastro.data_criacao >= hoje).count()
+            _quantidade(metricas, METRICA_AGENDAMENTOS, "hoje") +
+            _quantidade(metricas, METRICA_CADASTROS, "hoje")
         )
-
         atividades_semana = (
-            db.query(models.Agendamento).filter(models.Agendamento.data_criacao >= semana_inicio).count() +
-            db.query(models.Cadastro).filter(models.Cadastro.data_criacao >= semana_inicio).count()
-        )
-
-        usuarios_ativos_mes = (
-            db.query(models.Cadastro).filter(models.Cadastro.data_criacao >= mes_inicio).count()
+            _quantidade(metricas, METRICA_AGENDAMENTOS, "semana") +
+            _quantidade(metricas, METRICA_CADASTROS, "semana")
         )
+        usuarios_ativos_mes = _quantidade(metricas, METRICA_CADASTROS, "mes")
 
-        return {
+        resultado = {
             "hoje": atividades_hoje,
             "semana": atividades_semana,
             "ativos_mes": usuarios_ativos_mes
         }
+        cache_respostas.definir(chave_cache, resultado)
+        return resultado
     except Exception:
         raise HTTPException(status_code=500, detail="Erro ao buscar atividades")
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import List
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database import models
 from backend.database.database import get_db
 from backend.schemas import funcionario as funcionario_schema
+from backend.utils.cache import cache_respostas
 
 router = APIRouter(
     prefix="/funcionarios",
@@ -13,22 +15,36 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=funcionario_schema.Funcionario, status_code=201)
-async def criar_funcionario(funcionario: funcionario_schema.Funcionario, db: Session = Depends(get_db)):
+async def criar_funcionario(funcionario: funcionario_schema.Funcionario, db: AsyncSession = Depends(get_db)):
     db_funcionario = models.Funcionario(**funcionario.model_dump())
     db.add(db_funcionario)
-    db.commit()
-    db.refresh(db_funcionario)
+    await db.commit()
+    cache_respostas.invalidar("funcionarios")
+    await db.refresh(db_funcionario)
     return db_funcionario
 
 @router.get("/", response_model=List[funcionario_schema.Funcionario])
-async def listar_funcionarios(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    funcionarios = db.query(models.Funcionario).offset(skip).limit(limit).all()
+async def listar_funcionarios(request: Request, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+    chave_cache = cache_respostas.chave("funcionarios", request)
+    em_cache = cache_respostas.obter(chave_cache)
+    if em_cache is not None:
+        return em_cache
+
+    resultado = await db.execute(select(models.Funcionario).offset(skip).limit(limit))
+    funcionarios = resultado.scalars().all()
+    cache_respostas.definir(chave_cache, funcionarios)
     return funcionarios
 
 @router.get("/{funcionario_id}", response_model=funcionario_schema.Funcionario)
-async def obter_funcionario(funcionario_id: int, db: Session = Depends(get_db)):
-    db_funcionario = db.query(models.Funcionario).filter(models.Funcionario.id == funcionario_id).first()
+async def obter_funcionario(funcionario_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    chave_cache = cache_respostas.chave("funcionarios", request)
+    em_cache = cache_respostas.obter(chave_cache)
+    if em_cache is not None:
+        return em_cache
+
+    db_funcionario = await db.get(models.Funcionario, funcionario_id)
     if db_funcionario is None:
         raise HTTPException(status_code=404, detail="Funcionário não encontrado")
+    cache_respostas.definir(chave_cache, db_funcionario)
     return db_funcionario
 
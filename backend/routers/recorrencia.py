@@ -0,0 +1,283 @@
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Response
+from typing import Optional
+from datetime import datetime, date, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from backend.utils.cache import cache_respostas
+from backend.database.database import get_db
+from backend.database import carregamento
+from backend.database import models
+from backend.schemas import agendamento as agendamento_schema
+from backend.schemas import recorrencia as recorrencia_schema
+from backend.services import disponibilidade_service, metricas_service, outbox_service, recorrencia_service
+from backend.routers.agendamento import atualizar_agendamento, erro_sobreposicao, validar_conflitos
+
+router = APIRouter(
+    prefix="/agendamentos/recorrencias",
+    tags=["recorrencias"],
+)
+
+async def carregar_recorrencia(db, recorrencia_id: int):
+    """Busca a série com os participantes já carregados"""
+    resultado = await db.execute(
+        select(models.RecorrenciaAgendamento)
+        .options(*carregamento.recorrencia_para_resposta())
+        .where(models.RecorrenciaAgendamento.id == recorrencia_id)
+        .execution_options(populate_existing=True)
+    )
+    return resultado.scalars().first()
+
+async def buscar_materializada(db, recorrencia_id: int, dia: date):
+    """Agendamento em que a ocorrência do dia já foi gravada (ou None)"""
+    resultado = await db.execute(
+        select(models.Agendamento).where(
+            models.Agendamento.recorrencia_id == recorrencia_id,
+            models.Agendamento.ocorrencia_dia == dia,
+        )
+    )
+    return resultado.scalars().first()
+
+def conflitos_da_serie(db, regra, participantes_ids, profissional_id):
+    """
+    Conflitos das ocorrências da série dentro do horizonte: uma busca de ocupações
+    para o período todo, depois cada ocorrência é comparada em memória.
+    """
+    inicio = regra.inicio
+    ocorrencias = recorrencia_service.expandir(
+        regra, inicio, inicio + timedelta(days=recorrencia_service.HORIZONTE_DIAS)
+    )
+    if not ocorrencias:
+        return []
+    duracao = timedelta(minutes=regra.duracao_em_minutos or disponibilidade_service.DURACAO_PADRAO)
+    ocupado = disponibilidade_service.ocupacoes(
+        db,
+        ocorrencias[0],
+        ocorrencias[-1] + duracao,
+        [profissional_id] if profissional_id else [],
+        participantes_ids,
+    )
+    return [
+        item for item in ocupado
+        if any(item["data_hora"] < ocorrencia + duracao and item["fim"] > ocorrencia for ocorrencia in ocorrencias)
+    ]
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def criar_recorrencia(
+    recorrencia_data: recorrencia_schema.RecorrenciaCreate,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Cria uma série de agendamentos. Só a regra é gravada: as ocorrências aparecem
+    na listagem, no calendário e nas estatísticas conforme a janela consultada, e
+    cada participante recebe um único e-mail com a descrição da série.
+    """
+    try:
+        try:
+            inicio = datetime.strptime(f"{recorrencia_data.data} {recorrencia_data.hora}:00", "%Y-%m-%d %H:%M:%S")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Formato de data/hora inválido: {str(e)}")
+
+        participantes = []
+        if recorrencia_data.participantes_ids:
+            resultado = await db.execute(carregamento.consulta_participantes(recorrencia_data.participantes_ids))
+            participantes = list(resultado.scalars().all())
+
+        db_recorrencia = models.RecorrenciaAgendamento(
+            titulo=recorrencia_data.titulo,
+            usuario_id=recorrencia_data.participantes_ids[0] if recorrencia_data.participantes_ids else 1,
+            inicio=inicio,
+            frequencia=recorrencia_data.frequencia,
+            intervalo=recorrencia_data.intervalo,
+            dias_semana=recorrencia_data.dias_semana,
+            ate=recorrencia_data.ate,
+            contagem=recorrencia_data.contagem,
+            excecoes=sorted(set(recorrencia_data.excecoes)),
+            tipo_sessao=recorrencia_data.tipo_sessao,
+            status='agendado',
+            observacoes=recorrencia_data.descricao,
+            duracao_em_minutos=recorrencia_data.duracao_em_minutos,
+            local=recorrencia_data.local,
+            valor=recorrencia_data.valor,
+            profissional_responsavel_id=recorrencia_data.profissional_responsavel_id,
+            participantes=participantes,
+        )
+        primeiras = recorrencia_service.expandir(db_recorrencia, None, inicio + timedelta(days=366))
+        if not primeiras:
+            raise HTTPException(status_code=400, detail="A regra não gera nenhuma ocorrência")
+
+        conflitos = await db.run_sync(
+            conflitos_da_serie,
+            db_recorrencia,
+            recorrencia_data.participantes_ids,
+            recorrencia_data.profissional_responsavel_id,
+        )
+        conflitos = validar_conflitos(disponibilidade_service.descrever_conflitos(conflitos), recorrencia_data.permitir_conflito)
+
+        db.add(db_recorrencia)
+        descricao_regra = recorrencia_service.descrever_regra(db_recorrencia)
+        for participante in participantes:
+            email_destino = (participante.email or "").strip()
+            if not email_destino:
+                continue
+            context = {
+                "nome": participante.nome,
+                "titulo": db_recorrencia.titulo,
+                "data_hora": primeiras[0].strftime("%d/%m/%Y %H:%M"),
+                "local": db_recorrencia.local,
+                "descricao": db_recorrencia.observacoes,
+                "recorrencia": descricao_regra,
+            }
+            outbox_service.enfileirar_email(
+                db,
+                destinatario=email_destino,
+                assunto="Novo Agendamento Recorrente",
+                template_name="agendamento.html",
+                context=context
+            )
+        await db.commit()
+        cache_respostas.invalidar("agendamentos")
+        print(f"Série de agendamentos criada com ID: {db_recorrencia.id}")
+
+        return {
+            "msg": "Série de agendamentos criada e e-mails enfileirados",
+            "id": db_recorrencia.id,
+            "proximas": [ocorrencia.isoformat() for ocorrencia in primeiras[:5]],
+            "conflitos": conflitos,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        print(f"Erro ao criar série de agendamentos: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao criar série de agendamentos: {str(e)}")
+
+@router.get("/{recorrencia_id}", response_model=recorrencia_schema.RecorrenciaResponse)
+async def obter_recorrencia(recorrencia_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Obter a regra de uma série
+    """
+    try:
+        db_recorrencia = await carregar_recorrencia(db, recorrencia_id)
+        if db_recorrencia is None:
+            raise HTTPException(status_code=404, detail="Série não encontrada")
+        return recorrencia_schema.RecorrenciaResponse.from_orm(db_recorrencia)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Erro ao buscar série: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar série: {str(e)}")
+
+@router.delete("/{recorrencia_id}")
+async def excluir_recorrencia(
+    recorrencia_id: int,
+    a_partir_de: Optional[date] = Query(None, description="Primeiro dia removido (a série termina no dia anterior); sem ele a série inteira é excluída"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Exclui a série, ou a encerra a partir de um dia. As ocorrências já gravadas
+    como agendamentos no trecho removido também são excluídas.
+    """
+    try:
+        db_recorrencia = await carregar_recorrencia(db, recorrencia_id)
+        if db_recorrencia is None:
+            raise HTTPException(status_code=404, detail="Série não encontrada")
+
+        encerrar = a_partir_de is not None and a_partir_de > db_recorrencia.inicio.date()
+        consulta = select(models.Agendamento).where(models.Agendamento.recorrencia_id == recorrencia_id)
+        if encerrar:
+            consulta = consulta.where(models.Agendamento.ocorrencia_dia >= a_partir_de)
+        materializados = (await db.execute(consulta)).scalars().all()
+        for agendamento in materializados:
+            await db.run_sync(metricas_service.registrar_agendamento, agendamento, -1)
+            await db.delete(agendamento)
+
+        if encerrar:
+            ultimo_dia = a_partir_de - timedelta(days=1)
+            if db_recorrencia.ate is None or db_recorrencia.ate > ultimo_dia:
+                db_recorrencia.ate = ultimo_dia
+        else:
+            await db.delete(db_recorrencia)
+        await db.commit()
+        cache_respostas.invalidar("agendamentos")
+
+        mensagem = f"Série encerrada em {a_partir_de.isoformat()}" if encerrar else "Série excluída com sucesso"
+        return {"message": mensagem, "id": recorrencia_id, "agendamentos_excluidos": len(materializados)}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        print(f"Erro ao excluir série {recorrencia_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao excluir série: {str(e)}")
+
+@router.put("/{recorrencia_id}/ocorrencias/{dia}", response_model=agendamento_schema.AgendamentoResponse)
+async def editar_ocorrencia(
+    recorrencia_id: int,
+    dia: date,
+    agendamento_data: agendamento_schema.AgendamentoUpdate,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Edita uma ocorrência da série: na primeira edição ela é gravada como
+    agendamento (materializada) e a alteração é aplicada na mesma transação;
+    depois disso a expansão da série pula o dia.
+    """
+    try:
+        db_recorrencia = await carregar_recorrencia(db, recorrencia_id)
+        if db_recorrencia is None:
+            raise HTTPException(status_code=404, detail="Série não encontrada")
+
+        materializada = await buscar_materializada(db, recorrencia_id, dia)
+        if materializada is None:
+            data_hora = recorrencia_service.ocorrencia_do_dia(db_recorrencia, dia)
+            if data_hora is None:
+                raise HTTPException(status_code=404, detail="A série não tem ocorrência neste dia")
+            materializada = recorrencia_service.materializar_ocorrencia(db, db_recorrencia, dia, data_hora)
+            await db.flush()
+            await db.run_sync(metricas_service.registrar_agendamento, materializada)
+            print(f"Ocorrência {dia.isoformat()} da série {recorrencia_id} materializada como agendamento {materializada.id}")
+
+    except HTTPException:
+        raise
+    except IntegrityError as e:
+        await db.rollback()
+        raise erro_sobreposicao(e)
+    except Exception as e:
+        await db.rollback()
+        print(f"Erro ao materializar ocorrência {dia.isoformat()} da série {recorrencia_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao editar ocorrência: {str(e)}")
+
+    return await atualizar_agendamento(materializada.id, agendamento_data, response, db)
+
+@router.delete("/{recorrencia_id}/ocorrencias/{dia}")
+async def excluir_ocorrencia(recorrencia_id: int, dia: date, db: AsyncSession = Depends(get_db)):
+    """
+    Retira uma ocorrência da série (o dia entra nas exceções)
+    """
+    try:
+        db_recorrencia = await carregar_recorrencia(db, recorrencia_id)
+        if db_recorrencia is None:
+            raise HTTPException(status_code=404, detail="Série não encontrada")
+
+        materializada = await buscar_materializada(db, recorrencia_id, dia)
+        if materializada is None and recorrencia_service.ocorrencia_do_dia(db_recorrencia, dia) is None:
+            raise HTTPException(status_code=404, detail="A série não tem ocorrência neste dia")
+        if materializada is not None:
+            await db.run_sync(metricas_service.registrar_agendamento, materializada, -1)
+            await db.delete(materializada)
+        await db.run_sync(recorrencia_service.adicionar_excecao, recorrencia_id, dia)
+        await db.commit()
+        cache_respostas.invalidar("agendamentos")
+
+        return {"message": "Ocorrência excluída com sucesso", "id": recorrencia_id, "dia": dia.isoformat()}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        print(f"Erro ao excluir ocorrência {dia} da série {recorrencia_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao excluir ocorrência: {str(e)}")
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, root_validator, validator
 from datetime import datetime, date, time
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 
 class AgendamentoCreate(BaseModel):
     titulo: str = Field(..., min_length=1, max_length=255, description="Título do agendamento")
@@ -13,6 +13,8 @@ class AgendamentoCreate(BaseModel):
     duracao_em_minutos: Optional[int] = Field(default=60, ge=1, le=1440, description="Duração em minutos")
     valor: Optional[float] = Field(default=None, ge=0, description="Valor do agendamento")
     concluido: Optional[bool] = Field(default=False, description="Se foi concluído")
+    profissional_responsavel_id: Optional[int] = Field(default=None, description="Funcionário responsável")
+    permitir_conflito: bool = Field(default=False, description="Grava mesmo que algum participante já esteja ocupado no horário")
 
 
 
@@ -43,8 +45,8 @@ class AgendamentoResponse(BaseModel):
     participantes: List[ParticipanteResponse] = []
     valor: Optional[float] = None
     concluido: Optional[bool] = False
-
-
+    recorrencia_id: Optional[int] = None
+    ocorrencia_dia: Optional[date] = None
 
     
     class Config:
@@ -64,6 +66,28 @@ class AgendamentoList(BaseModel):
     class Config:
         from_attributes = True
 
+class AgendamentoItemListagem(BaseModel):
+    """Item de GET /agendamentos/ (montado por agendamento_service.itens_da_listagem)"""
+    id: Union[int, str]  # "r<série>-<dia>" nas ocorrências das séries
+    titulo: str
+    data_hora: datetime
+    tipo_sessao: str
+    status: str
+    observacoes: Optional[str] = None
+    duracao_em_minutos: Optional[int] = None
+    local: Optional[str] = None
+    valor: Optional[float] = None
+    concluido: Optional[bool] = False
+    participantes: List[ParticipanteResponse] = []
+    data_criacao: Optional[datetime] = None
+    data_atualizacao: Optional[datetime] = None
+    participantes_count: int = 0
+    duracao_formatada: str
+    status_cor: str
+    recorrencia_id: Optional[int] = None
+    ocorrencia_dia: Optional[date] = None
+    ocorrencia_virtual: bool = False
+
 class AgendamentoUpdate(BaseModel):
     titulo: Optional[str] = Field(None, min_length=1, max_length=255)
     data: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
@@ -76,6 +100,8 @@ class AgendamentoUpdate(BaseModel):
     status: Optional[str] = None
     valor: Optional[float] = Field(None, ge=0)
     concluido: Optional[bool] = None
+    profissional_responsavel_id: Optional[int] = None
+    permitir_conflito: bool = False
 
 
 
@@ -152,6 +178,53 @@ class AgendamentoStats(BaseModel):
             }
         }
 
+class FiltrosAgendamento(BaseModel):
+    """Critérios combináveis da listagem de agendamentos (aplicados juntos, em AND)"""
+    data_inicio: Optional[date] = Field(None, description="A partir desta data")
+    data_fim: Optional[date] = Field(None, description="Até esta data, inclusive")
+    status: List[str] = Field(default=[], description="Qualquer um destes status")
+    tipo_sessao: List[str] = Field(default=[], description="Qualquer um destes tipos de sessão")
+    profissional_responsavel_id: Optional[int] = Field(None, description="Funcionário responsável")
+    participante_id: Optional[int] = Field(None, description="Cadastro entre os participantes")
+    valor_min: Optional[float] = Field(None, ge=0, description="Valor mínimo")
+    valor_max: Optional[float] = Field(None, ge=0, description="Valor máximo")
+    concluido: Optional[bool] = Field(None, description="Concluído ou pendente")
+    participantes_min: Optional[int] = Field(None, ge=0, description="Número mínimo de participantes")
+    participantes_max: Optional[int] = Field(None, ge=0, description="Número máximo de participantes")
+
+    @validator('status', 'tipo_sessao', pre=True)
+    def separar_valores(cls, value):
+        # Aceita ?status=a&status=b e ?status=a,b
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        return [item.strip() for valor in value for item in valor.split(',') if item.strip()]
+
+    @validator('data_fim')
+    def validar_periodo(cls, value, values):
+        inicio = values.get('data_inicio')
+        if value and inicio and value < inicio:
+            raise ValueError('data_fim deve ser igual ou posterior a data_inicio')
+        return value
+
+    @validator('valor_max')
+    def validar_valores(cls, value, values):
+        minimo = values.get('valor_min')
+        if value is not None and minimo is not None and value < minimo:
+            raise ValueError('valor_max deve ser maior ou igual a valor_min')
+        return value
+
+    @validator('participantes_max')
+    def validar_participantes(cls, value, values):
+        minimo = values.get('participantes_min')
+        if value is not None and minimo is not None and value < minimo:
+            raise ValueError('participantes_max deve ser maior ou igual a participantes_min')
+        return value
+
+    def vazio(self) -> bool:
+        return not self.model_dump(exclude_defaults=True)
+
 from enum import Enum
 
 class FiltroAgendamento(str, Enum):
@@ -167,6 +240,46 @@ class FiltroAgendamento(str, Enum):
     CONFIRMADO = "confirmado"
     REALIZADO = "realizado"
     CANCELADO = "cancelado"
+    PENDENTE = "pendente"
+    CONCLUIDO = "concluido"
+
+# Status aceitos pelas operações em massa (os de models.CORES_STATUS)
+STATUS_AGENDAMENTO = ("agendado", "confirmado", "realizado", "cancelado", "adiado")
+
+class AgendamentosLote(BaseModel):
+    """
+    Operação em massa sobre agendamentos. ids, filtro e filtros selecionam as
+    linhas (aplicados juntos, em AND); ao menos um deles é obrigatório.
+    """
+    operacao: str = Field(..., pattern=r"^(status|concluido|reagendar|excluir)$", description="status, concluido, reagendar ou excluir")
+    ids: List[int] = Field(default=[], max_length=1000, description="Agendamentos a alterar")
+    filtro: Optional[FiltroAgendamento] = Field(None, description="Filtro rápido da listagem (hoje, semana, pendente...)")
+    filtros: Optional[FiltrosAgendamento] = Field(None, description="Critérios combináveis da listagem")
+    status: Optional[str] = Field(None, description="Novo status (operacao=status)")
+    concluido: Optional[bool] = Field(None, description="Novo valor de concluido (operacao=concluido)")
+    deslocamento_minutos: Optional[int] = Field(None, ge=-525600, le=525600, description="Minutos somados a data_hora (operacao=reagendar; negativo antecipa)")
+    notificar: bool = Field(default=True, description="Enfileira um e-mail por participante com os agendamentos alterados")
+
+    @root_validator(skip_on_failure=True)
+    def validar_operacao(cls, values):
+        filtros = values.get('filtros')
+        if not values.get('ids') and values.get('filtro') in (None, FiltroAgendamento.TODOS) and (filtros is None or filtros.vazio()):
+            raise ValueError('Informe ids, filtro ou filtros para selecionar os agendamentos')
+        operacao = values.get('operacao')
+        if operacao == 'status' and values.get('status') not in STATUS_AGENDAMENTO:
+            raise ValueError(f"status deve ser um de: {', '.join(STATUS_AGENDAMENTO)}")
+        if operacao == 'concluido' and values.get('concluido') is None:
+            raise ValueError('Informe concluido para operacao=concluido')
+        if operacao == 'reagendar' and not values.get('deslocamento_minutos'):
+            raise ValueError('Informe deslocamento_minutos (diferente de zero) para operacao=reagendar')
+        return values
+
+class ResultadoLote(BaseModel):
+    operacao: str
+    afetados: int
+    ids: List[int] = []
+    nao_encontrados: List[int] = Field(default=[], description="ids informados que não existem ou não atendem aos filtros")
+    emails_enfileirados: int = 0
 
 class OperacaoResponse(BaseModel):
     """Schema para respostas de operações simples"""
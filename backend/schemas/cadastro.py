@@ -32,6 +32,17 @@ class Cadastro(BaseModel):
             }
         }
 
+class CadastroItemListagem(BaseModel):
+    """Item de GET /cadastros/ (montado por cadastro_service.itens_da_listagem)"""
+    id: int
+    nome: str
+    email: str
+    telefone: Optional[str] = None
+    data_nascimento: Optional[date] = None
+    endereco: Optional[str] = None
+    data_criacao: Optional[datetime.datetime] = None
+    data_atualizacao: Optional[datetime.datetime] = None
+
 class CadastroPaginado(BaseModel):
     """Schema para resposta paginada de cadastros"""
     cadastros: List[Dict[str, Any]] = Field(..., description="Lista de cadastros")
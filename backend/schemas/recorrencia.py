@@ -0,0 +1,61 @@
+from pydantic import BaseModel, Field, validator
+from datetime import datetime, date
+from typing import Optional, List
+
+from backend.schemas.agendamento import AgendamentoCreate, ParticipanteResponse
+
+
+class RecorrenciaCreate(AgendamentoCreate):
+    """Série de agendamentos: data/hora da primeira ocorrência mais a regra de repetição"""
+    frequencia: str = Field(..., pattern=r"^(semanal|mensal)$", description="semanal ou mensal")
+    intervalo: int = Field(default=1, ge=1, le=52, description="A cada quantas semanas/meses")
+    dias_semana: List[int] = Field(default=[], description="Dias das ocorrências semanais (0 = segunda ... 6 = domingo); vazio = dia da primeira data")
+    ate: Optional[date] = Field(None, description="Último dia da série, inclusive")
+    contagem: Optional[int] = Field(None, ge=1, le=500, description="Número de ocorrências")
+    excecoes: List[date] = Field(default=[], description="Dias sem ocorrência")
+
+    @validator('dias_semana')
+    def validar_dias_semana(cls, value, values):
+        if any(dia < 0 or dia > 6 for dia in value):
+            raise ValueError('dias_semana aceita valores de 0 (segunda) a 6 (domingo)')
+        if value and values.get('frequencia') == 'mensal':
+            raise ValueError('dias_semana só se aplica à frequência semanal')
+        return sorted(set(value))
+
+    @validator('ate')
+    def validar_ate(cls, value, values):
+        data = values.get('data')
+        if value and data and value < date.fromisoformat(data):
+            raise ValueError('ate deve ser igual ou posterior à data da primeira ocorrência')
+        return value
+
+    @validator('contagem')
+    def validar_contagem(cls, value, values):
+        if value is not None and values.get('ate') is not None:
+            raise ValueError('Informe ate ou contagem, não os dois')
+        return value
+
+
+class RecorrenciaResponse(BaseModel):
+    id: int
+    titulo: str
+    inicio: datetime
+    frequencia: str
+    intervalo: int
+    dias_semana: List[int] = []
+    ate: Optional[date] = None
+    contagem: Optional[int] = None
+    excecoes: List[date] = []
+    tipo_sessao: str
+    status: str
+    observacoes: Optional[str] = None
+    duracao_em_minutos: Optional[int] = None
+    local: Optional[str] = None
+    profissional_responsavel_id: Optional[int] = None
+    valor: Optional[float] = None
+    participantes: List[ParticipanteResponse] = []
+    data_criacao: datetime
+    data_atualizacao: datetime
+
+    class Config:
+        from_attributes = True
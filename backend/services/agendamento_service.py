@@ -0,0 +1,376 @@
+import heapq
+from datetime import date, datetime, timedelta
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, bindparam, delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from backend.database import models
+from backend.services import recorrencia_service
+from backend.services.estatisticas_service import agregar_contagens
+
+# Colunas de cada dia na resposta do calendário
+COLUNAS_CALENDARIO = ("id", "titulo", "data_hora", "duracao", "status", "status_cor", "participantes")
+
+# Colunas lidas pela listagem, em tuplas (sem instanciar o modelo); ordem usada em itens_da_listagem
+COLUNAS_LISTAGEM = (
+    models.Agendamento.id,
+    models.Agendamento.titulo,
+    models.Agendamento.data_hora,
+    models.Agendamento.tipo_sessao,
+    models.Agendamento.status,
+    models.Agendamento.observacoes,
+    models.Agendamento.duracao_em_minutos,
+    models.Agendamento.local,
+    models.Agendamento.valor,
+    models.Agendamento.concluido,
+    models.Agendamento.data_criacao,
+    models.Agendamento.data_atualizacao,
+    models.Agendamento.recorrencia_id,
+    models.Agendamento.participantes_count,
+    models.Agendamento.participantes_resumo,
+)
+
+
+def periodos_referencia(hoje=None) -> Dict[str, datetime]:
+    """
+    Limites de hoje, da semana (iniciando no domingo) e do mês corrente
+    """
+    hoje = hoje or datetime.now().date()
+    dias_desde_domingo = hoje.weekday() + 1 if hoje.weekday() != 6 else 0
+
+    return {
+        "inicio_hoje": datetime.combine(hoje, datetime.min.time()),
+        "fim_hoje": datetime.combine(hoje + timedelta(days=1), datetime.min.time()),
+        "inicio_semana": datetime.combine(hoje - timedelta(days=dias_desde_domingo), datetime.min.time()),
+        "inicio_mes": datetime.combine(hoje.replace(day=1), datetime.min.time()),
+    }
+
+
+def inicio_proximo_mes(hoje=None) -> datetime:
+    inicio_mes = periodos_referencia(hoje)["inicio_mes"]
+    return (inicio_mes + timedelta(days=32)).replace(day=1)
+
+
+def estatisticas_agendamentos(db, hoje=None) -> Dict[str, Any]:
+    """
+    Estatísticas de agendamentos calculadas em uma única consulta agregada
+
+    As ocorrências ainda não materializadas das séries entram nas contagens só
+    na janela consultada: do início da semana (ou do mês, o que vier antes) até
+    o fim do mês corrente, sem expandir as séries desde o começo.
+    """
+    periodos = periodos_referencia(hoje)
+    data_hora = models.Agendamento.data_hora
+
+    agregado = agregar_contagens(
+        db,
+        models.Agendamento,
+        janelas={
+            "hoje": and_(data_hora >= periodos["inicio_hoje"], data_hora < periodos["fim_hoje"]),
+            "esta_semana": data_hora >= periodos["inicio_semana"],
+            "este_mes": data_hora >= periodos["inicio_mes"],
+        },
+        dimensoes={
+            "status": models.Agendamento.status,
+            "tipo_sessao": models.Agendamento.tipo_sessao,
+        },
+    )
+
+    por_status = agregado["por"]["status"]
+    por_tipo_sessao = agregado["por"]["tipo_sessao"]
+    janelas = agregado["janelas"]
+
+    inicio_janela = min(periodos["inicio_semana"], periodos["inicio_mes"])
+    for ocorrencia in recorrencia_service.ocorrencias_virtuais(db, inicio_janela, inicio_proximo_mes(hoje)):
+        data_hora_ocorrencia = ocorrencia.data_hora
+        agregado["total"] += 1
+        if periodos["inicio_hoje"] <= data_hora_ocorrencia < periodos["fim_hoje"]:
+            janelas["hoje"] += 1
+        if data_hora_ocorrencia >= periodos["inicio_semana"]:
+            janelas["esta_semana"] += 1
+        if data_hora_ocorrencia >= periodos["inicio_mes"]:
+            janelas["este_mes"] += 1
+        status = ocorrencia.regra.status
+        tipo_sessao = ocorrencia.regra.tipo_sessao
+        por_status[status] = por_status.get(status, 0) + 1
+        por_tipo_sessao[tipo_sessao] = por_tipo_sessao.get(tipo_sessao, 0) + 1
+
+    return {
+        "total": agregado["total"],
+        "hoje": janelas["hoje"],
+        "esta_semana": janelas["esta_semana"],
+        "este_mes": janelas["este_mes"],
+        "reunioes": por_tipo_sessao.get("reuniao", 0),
+        "consultas": por_tipo_sessao.get("consulta", 0),
+        "eventos": por_tipo_sessao.get("evento", 0),
+        "agendados": por_status.get("agendado", 0),
+        "confirmados": por_status.get("confirmado", 0),
+        "por_status": por_status,
+        "por_tipo_sessao": por_tipo_sessao,
+    }
+
+
+def calendario_agendamentos(db, inicio: date, fim: date) -> Dict[str, Any]:
+    """
+    Agendamentos de inicio a fim (inclusive) agrupados por dia, em formato colunar:
+    {"dias": {"AAAA-MM-DD": {"id": [...], "titulo": [...], ...}}, "total": n}
+
+    Uma única varredura do índice de data_hora; a contagem de participantes é a
+    coluna participantes_count. As ocorrências das séries no intervalo entram com id "r<série>-<dia>".
+    """
+    agendamento = models.Agendamento
+    janela_inicio = datetime.combine(inicio, datetime.min.time())
+    janela_fim = datetime.combine(fim + timedelta(days=1), datetime.min.time())
+
+    linhas = db.execute(
+        select(
+            agendamento.id,
+            agendamento.titulo,
+            agendamento.data_hora,
+            agendamento.duracao_em_minutos,
+            agendamento.status,
+            agendamento.participantes_count.label("participantes"),
+        )
+        .where(
+            agendamento.data_hora >= janela_inicio,
+            agendamento.data_hora < janela_fim,
+        )
+        .order_by(agendamento.data_hora, agendamento.id)
+    ).all()
+    ocorrencias = recorrencia_service.ocorrencias_virtuais(db, janela_inicio, janela_fim, com_participantes=True)
+
+    # (id, titulo, data_hora, duracao, status, participantes), já em ordem de data_hora
+    gravados = (
+        (linha.id, linha.titulo, linha.data_hora, linha.duracao_em_minutos, linha.status, linha.participantes)
+        for linha in linhas
+    )
+    das_series = (
+        (
+            recorrencia_service.id_ocorrencia(ocorrencia.regra.id, ocorrencia.data_hora.date()),
+            ocorrencia.regra.titulo,
+            ocorrencia.data_hora,
+            ocorrencia.regra.duracao_em_minutos,
+            ocorrencia.regra.status,
+            len(ocorrencia.regra.participantes),
+        )
+        for ocorrencia in ocorrencias
+    )
+
+    dias: Dict[str, Dict[str, List[Any]]] = {}
+    for id_, titulo, data_hora, duracao, status, quantidade in heapq.merge(gravados, das_series, key=itemgetter(2)):
+        chave = data_hora.date().isoformat()
+        dia = dias.get(chave)
+        if dia is None:
+            dia = dias[chave] = {coluna: [] for coluna in COLUNAS_CALENDARIO}
+        dia["id"].append(id_)
+        dia["titulo"].append(titulo)
+        dia["data_hora"].append(data_hora.isoformat())
+        dia["duracao"].append(duracao)
+        dia["status"].append(status)
+        dia["status_cor"].append(models.cor_do_status(status))
+        dia["participantes"].append(quantidade)
+
+    return {
+        "inicio": inicio.isoformat(),
+        "fim": fim.isoformat(),
+        "dias": dias,
+        "total": len(linhas) + len(ocorrencias),
+    }
+
+
+def ocorrencias_da_listagem(db, filtro: str, filtros=None) -> List[recorrencia_service.Ocorrencia]:
+    """
+    Ocorrências das séries que atendem aos filtros da listagem, da mais recente
+    para a mais antiga. A janela vem do filtro rápido e de data_inicio/data_fim;
+    sem limite superior ela vai até hoje + RECORRENCIA_HORIZONTE_DIAS.
+    """
+    condicoes = recorrencia_service.condicoes_regra(filtro, filtros)
+    if condicoes is None:
+        return []
+
+    periodos = periodos_referencia()
+    inicio: Optional[datetime] = None
+    fim: Optional[datetime] = None
+    if filtro == "hoje":
+        inicio, fim = periodos["inicio_hoje"], periodos["fim_hoje"]
+    elif filtro == "semana":
+        inicio = periodos["inicio_semana"]
+    elif filtro == "mes":
+        inicio = periodos["inicio_mes"]
+
+    if filtros is not None and filtros.data_inicio:
+        data_inicio = datetime.combine(filtros.data_inicio, datetime.min.time())
+        inicio = max(inicio, data_inicio) if inicio else data_inicio
+    if filtros is not None and filtros.data_fim:
+        data_fim = datetime.combine(filtros.data_fim + timedelta(days=1), datetime.min.time())
+        fim = min(fim, data_fim) if fim else data_fim
+    if fim is None:
+        fim = periodos["fim_hoje"] + timedelta(days=recorrencia_service.HORIZONTE_DIAS)
+    if inicio is not None and inicio >= fim:
+        return []
+
+    ocorrencias = recorrencia_service.ocorrencias_virtuais(db, inicio, fim, *condicoes, com_participantes=True)
+    ocorrencias.reverse()
+    return ocorrencias
+
+
+def intercalar_com_ocorrencias(agendamentos: List[Any], ocorrencias: List[Any]) -> List[Any]:
+    """Une agendamentos e ocorrências, ambos em data_hora decrescente, mantendo a ordem"""
+    return list(heapq.merge(agendamentos, ocorrencias, key=attrgetter("data_hora"), reverse=True))
+
+
+def participantes_por_agendamento(db, agendamentos_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Participantes de vários agendamentos em uma consulta: {agendamento_id: [participante, ...]}"""
+    if not agendamentos_ids:
+        return {}
+    participacoes = models.agendamento_participantes.c
+    cadastro = models.Cadastro
+    linhas = db.execute(
+        select(participacoes.agendamento_id, cadastro.id, cadastro.nome, cadastro.email, cadastro.telefone)
+        .join(cadastro, cadastro.id == participacoes.participante_id)
+        .where(participacoes.agendamento_id.in_(agendamentos_ids))
+        .order_by(participacoes.agendamento_id, cadastro.id)
+    ).all()
+    por_agendamento: Dict[int, List[Dict[str, Any]]] = {}
+    for agendamento_id, id_, nome, email, telefone in linhas:
+        por_agendamento.setdefault(agendamento_id, []).append(
+            {"id": id_, "nome": nome, "email": email, "telefone": telefone}
+        )
+    return por_agendamento
+
+
+def validar_participantes(db, participantes_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    """
+    Cadastros existentes entre `participantes_ids`, em uma consulta só com as
+    colunas de ParticipanteResponse (sem objetos do ORM), ordenados por id.
+    Ids inexistentes são ignorados, como antes.
+    """
+    participantes_ids = set(participantes_ids)
+    if not participantes_ids:
+        return []
+    cadastro = models.Cadastro
+    linhas = db.execute(
+        select(cadastro.id, cadastro.nome, cadastro.email, cadastro.telefone)
+        .where(cadastro.id.in_(participantes_ids))
+        .order_by(cadastro.id)
+    ).all()
+    return [dict(linha._mapping) for linha in linhas]
+
+
+def gravar_participantes(db, agendamento_id: int, participantes_ids: Iterable[int], atuais: Iterable[int] = ()) -> None:
+    """
+    Grava na tabela de associação só a diferença entre `atuais` e
+    `participantes_ids` (já validados): um DELETE dos removidos e um INSERT de
+    várias linhas dos incluídos, com ON CONFLICT DO NOTHING para o que outra
+    transação já tenha gravado. Não passa pelo relacionamento do ORM nem faz
+    commit; o resumo fica com Agendamento.definir_resumo_participantes.
+    """
+    participacoes = models.agendamento_participantes
+    novos, atuais = set(participantes_ids), set(atuais)
+    removidos = sorted(atuais - novos)
+    incluidos = sorted(novos - atuais)
+    if removidos:
+        db.execute(
+            delete(participacoes).where(
+                participacoes.c.agendamento_id == agendamento_id,
+                participacoes.c.participante_id.in_(removidos),
+            )
+        )
+    if incluidos:
+        db.execute(
+            insert(participacoes)
+            .values([{"agendamento_id": agendamento_id, "participante_id": id_} for id_ in incluidos])
+            .on_conflict_do_nothing()
+        )
+
+
+def ids_com_resumo_incompleto(linhas: List[Any]) -> List[int]:
+    """Agendamentos da página com mais participantes do que o resumo guarda"""
+    return [
+        linha.id for linha in linhas
+        if not isinstance(linha, recorrencia_service.Ocorrencia)
+        and linha.participantes_count > len(linha.participantes_resumo)
+    ]
+
+
+def recalcular_participantes(db, agendamentos_ids: Iterable[int]) -> None:
+    """
+    Refaz participantes_count e participantes_resumo a partir da tabela de
+    associação, para alterações feitas fora de Agendamento.definir_participantes
+    (cadastro editado ou excluído, gravações em massa). Não faz commit.
+    """
+    agendamentos_ids = sorted(set(agendamentos_ids))
+    if not agendamentos_ids:
+        return
+    participantes = participantes_por_agendamento(db, agendamentos_ids)
+    tabela = models.Agendamento.__table__
+    db.execute(
+        update(tabela)
+        .where(tabela.c.id == bindparam("b_id"))
+        .values(participantes_count=bindparam("b_count"), participantes_resumo=bindparam("b_resumo")),
+        [
+            {
+                "b_id": agendamento_id,
+                "b_count": len(participantes.get(agendamento_id, [])),
+                "b_resumo": models.resumo_participantes(participantes.get(agendamento_id, [])),
+            }
+            for agendamento_id in agendamentos_ids
+        ],
+    )
+
+
+def agendamentos_dos_participantes(db, cadastros_ids: Iterable[int]) -> List[int]:
+    """Agendamentos em que algum dos cadastros participa"""
+    participacoes = models.agendamento_participantes.c
+    return list(db.execute(
+        select(participacoes.agendamento_id)
+        .where(participacoes.participante_id.in_(list(cadastros_ids)))
+        .distinct()
+    ).scalars())
+
+
+def recalcular_participantes_dos_cadastros(db, cadastros_ids: Iterable[int]) -> None:
+    """Atualiza o resumo dos agendamentos de cadastros cujos dados mudaram"""
+    recalcular_participantes(db, agendamentos_dos_participantes(db, cadastros_ids))
+
+
+def itens_da_listagem(linhas: List[Any], participantes: Dict[int, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Itens da listagem a partir das tuplas de COLUNAS_LISTAGEM (e das ocorrências
+    das séries), já no formato de AgendamentoItemListagem. Datas ficam como
+    datetime; a serialização (orjson) as converte para ISO 8601.
+
+    Os participantes vêm do resumo da linha; `participantes` só precisa ter os
+    agendamentos de ids_com_resumo_incompleto.
+    """
+    itens = []
+    for linha in linhas:
+        if isinstance(linha, recorrencia_service.Ocorrencia):
+            itens.append(recorrencia_service.ocorrencia_como_dict(linha))
+            continue
+        (id_, titulo, data_hora, tipo_sessao, status, observacoes, duracao, local,
+         valor, concluido, data_criacao, data_atualizacao, recorrencia_id,
+         participantes_count, participantes_resumo) = linha
+        do_agendamento = participantes.get(id_, participantes_resumo)
+        itens.append({
+            "id": id_,
+            "titulo": titulo,
+            "data_hora": data_hora,
+            "tipo_sessao": tipo_sessao,
+            "status": status,
+            "observacoes": observacoes,
+            "duracao_em_minutos": duracao,
+            "local": local,
+            "valor": valor,
+            "concluido": concluido,
+            "participantes": do_agendamento,
+            "data_criacao": data_criacao,
+            "data_atualizacao": data_atualizacao,
+            "participantes_count": participantes_count,
+            "duracao_formatada": models.formatar_duracao(duracao),
+            "status_cor": models.cor_do_status(status),
+            "recorrencia_id": recorrencia_id,
+        })
+    return itens
@@ -0,0 +1,231 @@
+"""
+Autocomplete de cadastros (seleção de participantes).
+
+Os cadastros ficam em um índice de prefixos em memória: uma lista ordenada de
+chaves normalizadas (nome completo, cada palavra do nome e email) consultada com
+bisect, O(log n) por busca. As rotas de cadastro atualizam a entrada alterada no
+próprio índice (atualizar/remover) e passam a versão do namespace "cadastros"
+do cache de respostas antes e depois da escrita, então o índice avança junto.
+Quando a versão muda por outro caminho (importação em massa, escritas de outros
+workers com o cache em Redis) uma única reconstrução roda em segundo plano, e as buscas continuam no índice atual enquanto isso
+(ou no banco, antes do primeiro índice). Nenhuma requisição espera a reconstrução.
+
+Consultas ao banco idênticas que chegam ao mesmo tempo são coalescidas: as
+requisições concorrentes aguardam a mesma tarefa.
+
+Acima de AUTOCOMPLETE_MAX_CADASTROS a busca vai direto ao banco (prefixo sobre
+as expressões de busca_service, servido pelos índices pg_trgm no modo trigram).
+"""
+import asyncio
+import os
+from bisect import bisect_left, bisect_right
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from backend.database import models
+from backend.database.database import abrir_sessao
+from backend.services import busca_service
+from backend.utils.cache import cache_respostas
+from backend.utils.contagem import estimar_por_estatisticas
+
+AUTOCOMPLETE_MAX_CADASTROS = int(os.getenv("AUTOCOMPLETE_MAX_CADASTROS", "200000"))
+
+
+def chaves_do_cadastro(nome: Optional[str], email: Optional[str]) -> List[str]:
+    """Chaves normalizadas de um cadastro: nome completo, cada sobrenome e email"""
+    nome_normalizado = busca_service.normalizar_termo(nome or "")
+    chaves = [nome_normalizado]
+    # Sobrenomes também encontram a pessoa ("silva" -> "João Silva")
+    chaves.extend(nome_normalizado.split()[1:])
+    if email:
+        chaves.append(email.lower())
+    return chaves
+
+
+class IndicePrefixos:
+    """Chaves normalizadas ordenadas (listas paralelas chaves/ids, por (chave, id)) para busca por prefixo"""
+
+    def __init__(self, registros: Iterable[Tuple[int, str, str]]):
+        self.cadastros: Dict[int, Tuple[str, str]] = {}
+        entradas: List[Tuple[str, int]] = []
+        for cadastro_id, nome, email in registros:
+            self.cadastros[cadastro_id] = (nome, email)
+            entradas.extend((chave, cadastro_id) for chave in chaves_do_cadastro(nome, email))
+        entradas.sort()
+        self.chaves = [chave for chave, _ in entradas]
+        self.ids = [cadastro_id for _, cadastro_id in entradas]
+
+    def _posicao(self, chave: str, cadastro_id: int) -> int:
+        """Onde (chave, cadastro_id) está ou entraria mantendo a ordem"""
+        inicio = bisect_left(self.chaves, chave)
+        fim = bisect_right(self.chaves, chave, inicio)
+        return bisect_left(self.ids, cadastro_id, inicio, fim)
+
+    def remover(self, cadastro_id: int) -> None:
+        """Tira o cadastro do índice (sem efeito se ele não estiver lá)"""
+        dados = self.cadastros.pop(cadastro_id, None)
+        if dados is None:
+            return
+        for chave in set(chaves_do_cadastro(*dados)):
+            posicao = self._posicao(chave, cadastro_id)
+            while posicao < len(self.chaves) and self.chaves[posicao] == chave and self.ids[posicao] == cadastro_id:
+                del self.chaves[posicao]
+                del self.ids[posicao]
+
+    def atualizar(self, cadastro_id: int, nome: str, email: Optional[str]) -> None:
+        """Inclui o cadastro ou troca as chaves dele pelas dos dados novos"""
+        self.remover(cadastro_id)
+        self.cadastros[cadastro_id] = (nome, email)
+        for chave in chaves_do_cadastro(nome, email):
+            posicao = self._posicao(chave, cadastro_id)
+            self.chaves.insert(posicao, chave)
+            self.ids.insert(posicao, cadastro_id)
+
+    def __len__(self) -> int:
+        return len(self.cadastros)
+
+    def buscar(self, termo: str, limite: int) -> List[Dict[str, Any]]:
+        prefixo = busca_service.normalizar_termo(termo)
+        resultados: List[Dict[str, Any]] = []
+        vistos = set()
+        posicao = bisect_left(self.chaves, prefixo)
+        while posicao < len(self.chaves) and len(resultados) < limite:
+            if not self.chaves[posicao].startswith(prefixo):
+                break
+            cadastro_id = self.ids[posicao]
+            if cadastro_id not in vistos:
+                vistos.add(cadastro_id)
+                nome, email = self.cadastros[cadastro_id]
+                resultados.append({"id": cadastro_id, "nome": nome, "email": email})
+            posicao += 1
+        return resultados
+
+
+class AutocompleteCadastros:
+    def __init__(self, max_cadastros: int = AUTOCOMPLETE_MAX_CADASTROS):
+        self.max_cadastros = max_cadastros
+        self.indice: Optional[IndicePrefixos] = None
+        self.versao: Optional[str] = None
+        # Versão em que a tabela passou do limite (busca vai ao banco até a próxima escrita)
+        self.versao_grande: Optional[str] = None
+        self._em_andamento: Dict[Any, asyncio.Future] = {}
+        self._reconstrucao: Optional[asyncio.Future] = None
+        # Versão que o índice em reconstrução terá (avança com as escritas reaplicadas)
+        self._versao_alvo: Optional[str] = None
+        # Alterações feitas durante a reconstrução, reaplicadas no índice novo
+        self._durante_reconstrucao: Optional[List[Tuple[int, Optional[Tuple[str, Optional[str]]]]]] = None
+
+    async def _uma_vez(self, chave, fabrica: Callable[[], Awaitable[Any]]) -> Any:
+        """Executa fabrica() uma vez por chave; chamadas concorrentes aguardam o mesmo resultado"""
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is None:
+            tarefa = asyncio.ensure_future(fabrica())
+            self._em_andamento[chave] = tarefa
+            tarefa.add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+        # shield: o cancelamento de uma requisição não interrompe as outras que aguardam
+        return await asyncio.shield(tarefa)
+
+    def _agendar_reconstrucao(self, versao: str) -> None:
+        """Uma reconstrução por vez, fora da requisição; a próxima busca confere a versão de novo"""
+        if self._reconstrucao is not None and not self._reconstrucao.done():
+            return
+        self._reconstrucao = asyncio.ensure_future(self._reconstruir(versao))
+        self._reconstrucao.add_done_callback(self._fim_da_reconstrucao)
+
+    def _fim_da_reconstrucao(self, tarefa: asyncio.Future) -> None:
+        self._durante_reconstrucao = None
+        if not tarefa.cancelled() and tarefa.exception() is not None:
+            print(f"Erro ao reconstruir o índice de autocomplete: {tarefa.exception()}")
+
+    async def _reconstruir(self, versao: str) -> None:
+        self._durante_reconstrucao = []
+        self._versao_alvo = versao
+        async with abrir_sessao() as db:
+            estimativa = await db.run_sync(estimar_por_estatisticas, models.Cadastro.__tablename__)
+            if estimativa is not None and estimativa > self.max_cadastros:
+                self.indice, self.versao_grande = None, versao
+                return
+            resultado = await db.execute(
+                select(models.Cadastro.id, models.Cadastro.nome, models.Cadastro.email)
+                .limit(self.max_cadastros + 1)
+            )
+            registros = resultado.all()
+
+        if len(registros) > self.max_cadastros:
+            self.indice, self.versao_grande = None, versao
+            return
+        indice = IndicePrefixos(registros)
+        for cadastro_id, dados in self._durante_reconstrucao:
+            if dados is None:
+                indice.remover(cadastro_id)
+            else:
+                indice.atualizar(cadastro_id, *dados)
+        self.indice = indice
+        self.versao, self.versao_grande = self._versao_alvo, None
+        print(f"Índice de autocomplete reconstruído: {len(self.indice)} cadastros")
+
+    def _acompanhar_escrita(self, versao_anterior: Optional[str], versao_nova: Optional[str]) -> None:
+        """
+        O índice já tem a escrita: se estava na versão anterior a ela, passa para
+        a nova sem reconstruir. Se estava atrás (outra escrita no meio), a versão
+        não avança e a próxima busca reconstrói.
+        """
+        if versao_nova is None:
+            return
+        if self.indice is not None and self.versao == versao_anterior:
+            self.versao = versao_nova
+        if self._durante_reconstrucao is not None and self._versao_alvo == versao_anterior:
+            self._versao_alvo = versao_nova
+
+    def atualizar(
+        self, cadastro_id: int, nome: str, email: Optional[str],
+        versao_anterior: Optional[str] = None, versao_nova: Optional[str] = None,
+    ) -> None:
+        """
+        Cadastro criado ou alterado neste processo (chamado pelas rotas após o
+        commit, com a versão de "cadastros" antes e depois de invalidar o cache)
+        """
+        if self.indice is not None:
+            self.indice.atualizar(cadastro_id, nome, email)
+        if self._durante_reconstrucao is not None:
+            self._durante_reconstrucao.append((cadastro_id, (nome, email)))
+        self._acompanhar_escrita(versao_anterior, versao_nova)
+
+    def remover(self, cadastro_id: int, versao_anterior: Optional[str] = None, versao_nova: Optional[str] = None) -> None:
+        """Cadastro excluído neste processo"""
+        if self.indice is not None:
+            self.indice.remover(cadastro_id)
+        if self._durante_reconstrucao is not None:
+            self._durante_reconstrucao.append((cadastro_id, None))
+        self._acompanhar_escrita(versao_anterior, versao_nova)
+
+    async def _buscar_no_banco(self, termo: str, limite: int) -> List[Dict[str, Any]]:
+        if busca_service.usa_trigram():
+            condicao = busca_service.NOME_NORMALIZADO.startswith(
+                busca_service.normalizar_termo(termo), autoescape=True
+            )
+        else:
+            condicao = models.Cadastro.nome.istartswith(termo.strip(), autoescape=True)
+        async with abrir_sessao() as db:
+            resultado = await db.execute(
+                select(models.Cadastro.id, models.Cadastro.nome, models.Cadastro.email)
+                .where(condicao)
+                .order_by(models.Cadastro.nome, models.Cadastro.id)
+                .limit(limite)
+            )
+            return [dict(linha._mapping) for linha in resultado.all()]
+
+    async def buscar(self, termo: str, limite: int) -> List[Dict[str, Any]]:
+        versao = cache_respostas.versao("cadastros")
+        if versao != self.versao and versao != self.versao_grande:
+            self._agendar_reconstrucao(versao)
+
+        if self.indice is not None:
+            return self.indice.buscar(termo, limite)
+
+        chave = ("banco", versao, busca_service.normalizar_termo(termo), limite)
+        return await self._uma_vez(chave, lambda: self._buscar_no_banco(termo, limite))
+
+
+autocomplete_cadastros = AutocompleteCadastros()
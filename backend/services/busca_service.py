@@ -0,0 +1,90 @@
+"""
+Busca textual de cadastros.
+
+Dois modos, escolhidos por BUSCA_CADASTROS:
+    ilike    ILIKE '%termo%' direto nas colunas (sem índice; funciona em qualquer banco)
+    trigram  mesmas buscas sobre expressões cobertas pelos índices GIN pg_trgm da
+             migração 0002: nome sem acentos e minúsculo, email minúsculo e só os
+             dígitos do telefone; resultados ordenados por similaridade
+
+O modo trigram exige a migração 0002 (aplicada na inicialização da API).
+"""
+import os
+import re
+import unicodedata
+from typing import Optional
+
+from sqlalchemy import String, func, literal_column, or_
+
+from backend.database import models
+
+BUSCA_ILIKE = "ilike"
+BUSCA_TRIGRAM = "trigram"
+BUSCA_CADASTROS = os.getenv("BUSCA_CADASTROS", BUSCA_TRIGRAM).lower()
+
+# Com menos dígitos que isso o termo não é tratado como telefone
+MINIMO_DIGITOS_TELEFONE = 3
+
+# Expressões idênticas às dos índices da migração 0002
+NOME_NORMALIZADO = func.lower(func.f_unaccent(models.Cadastro.nome))
+EMAIL_NORMALIZADO = func.lower(models.Cadastro.email)
+# Coluna gerada criada pela migração (fora do modelo para não quebrar bancos sem ela)
+TELEFONE_DIGITOS = literal_column("cadastros.telefone_digitos", String)
+
+
+def normalizar_termo(termo: str) -> str:
+    """Minúsculo e sem acentos, como lower(f_unaccent(...)) no banco"""
+    decomposto = unicodedata.normalize("NFKD", termo.strip().lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def apenas_digitos(termo: str) -> str:
+    return re.sub(r"\D", "", termo)
+
+
+def usa_trigram() -> bool:
+    return BUSCA_CADASTROS == BUSCA_TRIGRAM
+
+
+def condicao_nome(termo: str):
+    if usa_trigram():
+        return NOME_NORMALIZADO.contains(normalizar_termo(termo), autoescape=True)
+    return models.Cadastro.nome.ilike(f"%{termo}%")
+
+
+def condicao_email(termo: str):
+    if usa_trigram():
+        return EMAIL_NORMALIZADO.contains(termo.strip().lower(), autoescape=True)
+    return models.Cadastro.email.ilike(f"%{termo}%")
+
+
+def condicao_telefone(termo: str):
+    if usa_trigram():
+        digitos = apenas_digitos(termo)
+        if len(digitos) < MINIMO_DIGITOS_TELEFONE:
+            return None
+        return TELEFONE_DIGITOS.contains(digitos, autoescape=True)
+    return models.Cadastro.telefone.ilike(f"%{termo}%")
+
+
+def condicao_busca(termo: str):
+    """Termo livre em nome, email ou telefone (None quando o termo está vazio)"""
+    if not termo or not termo.strip():
+        return None
+    condicoes = [condicao_nome(termo), condicao_email(termo), condicao_telefone(termo)]
+    return or_(*[c for c in condicoes if c is not None])
+
+
+def ordem_relevancia(termo: str) -> Optional[list]:
+    """
+    Ordenação por similaridade com o termo no modo trigram (None no modo ilike,
+    em que a listagem mantém a ordem padrão)
+    """
+    if not usa_trigram() or not termo or not termo.strip():
+        return None
+    normalizado = normalizar_termo(termo)
+    relevancia = func.greatest(
+        func.word_similarity(normalizado, NOME_NORMALIZADO),
+        func.similarity(EMAIL_NORMALIZADO, normalizado),
+    )
+    return [relevancia.desc(), models.Cadastro.id.desc()]
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import and_
+
+from backend.database import models
+from backend.services.estatisticas_service import agregar_contagens
+
+# Colunas lidas pela listagem, em tuplas (sem instanciar o modelo); ordem usada em itens_da_listagem
+COLUNAS_LISTAGEM = (
+    models.Cadastro.id,
+    models.Cadastro.nome,
+    models.Cadastro.email,
+    models.Cadastro.telefone,
+    models.Cadastro.data_nascimento,
+    models.Cadastro.endereco,
+    models.Cadastro.data_criacao,
+)
+
+
+def estatisticas_cadastros(db, hoje=None) -> Dict[str, Any]:
+    """
+    Total de cadastros e novos cadastros no mês atual e no anterior, em uma consulta
+    """
+    hoje = hoje or datetime.now().date()
+    inicio_mes = datetime(hoje.year, hoje.month, 1)
+    mes_passado = (inicio_mes - timedelta(days=1)).replace(day=1)
+    data_criacao = models.Cadastro.data_criacao
+
+    agregado = agregar_contagens(
+        db,
+        models.Cadastro,
+        janelas={
+            "este_mes": data_criacao >= inicio_mes,
+            "mes_anterior": and_(data_criacao >= mes_passado, data_criacao < inicio_mes),
+        },
+    )
+
+    este_mes = agregado["janelas"]["este_mes"]
+    mes_anterior = agregado["janelas"]["mes_anterior"]
+
+    return {
+        "total": agregado["total"],
+        "este_mes": este_mes,
+        "mes_anterior": mes_anterior,
+        "crescimento": (
+            ((este_mes - mes_anterior) / mes_anterior * 100)
+            if mes_anterior > 0
+            else 0
+        ),
+    }
+
+
+def itens_da_listagem(linhas: List[Any]) -> List[Dict[str, Any]]:
+    """Itens da listagem a partir das tuplas de COLUNAS_LISTAGEM, no formato de CadastroItemListagem"""
+    return [
+        {
+            "id": id_,
+            "nome": nome,
+            "email": email,
+            "telefone": telefone,
+            "data_nascimento": data_nascimento,
+            "endereco": endereco,
+            "data_criacao": data_criacao,
+            # Cadastro não tem data_atualizacao; a chave continua na resposta por compatibilidade
+            "data_atualizacao": None,
+        }
+        for id_, nome, email, telefone, data_nascimento, endereco, data_criacao in linhas
+    ]
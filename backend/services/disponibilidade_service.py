@@ -0,0 +1,249 @@
+"""
+Conflitos de horário e horários livres de profissionais e participantes.
+
+Cada agendamento ocupa [data_hora, data_hora + duracao_em_minutos). Agendamentos
+cancelados não ocupam a agenda.
+
+Para o profissional responsável a regra também é garantida pelo banco (restrição
+de exclusão GiST da migração 0005); para participantes a checagem é feita aqui,
+na escrita, e pode ser dispensada com permitir_conflito. As ocorrências ainda não
+materializadas das séries (recorrencia_service) também ocupam a agenda, mas só
+são vistas aqui.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import exists, func, literal_column, or_, select
+
+from backend.database import models
+from backend.services import recorrencia_service
+
+DURACAO_PADRAO = 60
+# Limite de duracao_em_minutos nos schemas; permite usar o índice de data_hora
+# na busca por sobreposição (nada que começou antes de inicio - DURACAO_MAXIMA o alcança)
+DURACAO_MAXIMA = 1440
+STATUS_LIVRES = ("cancelado",)
+
+Intervalo = Tuple[datetime, datetime]
+
+
+def fim_agendamento():
+    """Expressão SQL do fim de cada agendamento (mesma da restrição de exclusão)"""
+    duracao = func.coalesce(models.Agendamento.duracao_em_minutos, DURACAO_PADRAO)
+    return models.Agendamento.data_hora + duracao * literal_column("interval '1 minute'")
+
+
+def _sobrepoe(inicio: datetime, fim: datetime):
+    return [
+        models.Agendamento.data_hora < fim,
+        models.Agendamento.data_hora > inicio - timedelta(minutes=DURACAO_MAXIMA),
+        fim_agendamento() > inicio,
+        models.Agendamento.status.notin_(STATUS_LIVRES),
+    ]
+
+
+def ocupacoes(
+    db,
+    inicio: datetime,
+    fim: datetime,
+    profissionais_ids: Iterable[int] = (),
+    participantes_ids: Iterable[int] = (),
+    ignorar_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Agendamentos que se sobrepõem a [inicio, fim) envolvendo algum dos profissionais
+    (como responsável) ou dos participantes: uma consulta por papel.
+    Cada item traz o agendamento e a pessoa envolvida.
+
+    Recebe a Session síncrona; nas rotas assíncronas use `await db.run_sync(...)`.
+    """
+    profissionais_ids = list(profissionais_ids)
+    participantes_ids = list(participantes_ids)
+    consultas = []
+    colunas = (
+        models.Agendamento.id,
+        models.Agendamento.titulo,
+        models.Agendamento.data_hora,
+        fim_agendamento().label("fim"),
+    )
+
+    if profissionais_ids:
+        consultas.append(
+            select(
+                *colunas,
+                literal_column("'profissional'").label("papel"),
+                models.Agendamento.profissional_responsavel_id.label("pessoa_id"),
+            ).where(
+                models.Agendamento.profissional_responsavel_id.in_(profissionais_ids),
+                *_sobrepoe(inicio, fim),
+            )
+        )
+    if participantes_ids:
+        participacoes = models.agendamento_participantes.c
+        consultas.append(
+            select(
+                *colunas,
+                literal_column("'participante'").label("papel"),
+                participacoes.participante_id.label("pessoa_id"),
+            )
+            .join(models.agendamento_participantes, participacoes.agendamento_id == models.Agendamento.id)
+            .where(participacoes.participante_id.in_(participantes_ids), *_sobrepoe(inicio, fim))
+        )
+
+    if not consultas:
+        return []
+
+    resultados = []
+    for consulta in consultas:
+        if ignorar_id is not None:
+            consulta = consulta.where(models.Agendamento.id != ignorar_id)
+        resultados.extend(dict(linha._mapping) for linha in db.execute(consulta).all())
+    resultados.extend(ocupacoes_das_series(db, inicio, fim, profissionais_ids, participantes_ids))
+    resultados.sort(key=lambda item: (item["data_hora"], str(item["id"])))
+    return resultados
+
+
+def ocupacoes_das_series(
+    db,
+    inicio: datetime,
+    fim: datetime,
+    profissionais_ids: List[int],
+    participantes_ids: List[int],
+) -> List[Dict[str, Any]]:
+    """Ocorrências não materializadas das séries das pessoas que se sobrepõem a [inicio, fim)"""
+    regra = models.RecorrenciaAgendamento
+    participacoes = models.recorrencia_participantes.c
+    envolvidos = []
+    if profissionais_ids:
+        envolvidos.append(regra.profissional_responsavel_id.in_(profissionais_ids))
+    if participantes_ids:
+        envolvidos.append(
+            exists()
+            .where(participacoes.recorrencia_id == regra.id)
+            .where(participacoes.participante_id.in_(participantes_ids))
+        )
+
+    ocorrencias = recorrencia_service.ocorrencias_virtuais(
+        db,
+        inicio - timedelta(minutes=DURACAO_MAXIMA),
+        fim,
+        or_(*envolvidos),
+        regra.status.notin_(STATUS_LIVRES),
+        com_participantes=bool(participantes_ids),
+    )
+    resultados = []
+    for ocorrencia in ocorrencias:
+        serie = ocorrencia.regra
+        termino = ocorrencia.data_hora + timedelta(minutes=serie.duracao_em_minutos or DURACAO_PADRAO)
+        if termino <= inicio:
+            continue
+        item = {
+            "id": recorrencia_service.id_ocorrencia(serie.id, ocorrencia.data_hora.date()),
+            "titulo": serie.titulo,
+            "data_hora": ocorrencia.data_hora,
+            "fim": termino,
+        }
+        if serie.profissional_responsavel_id in profissionais_ids:
+            resultados.append({**item, "papel": "profissional", "pessoa_id": serie.profissional_responsavel_id})
+        if participantes_ids:
+            for participante in serie.participantes:
+                if participante.id in participantes_ids:
+                    resultados.append({**item, "papel": "participante", "pessoa_id": participante.id})
+    return resultados
+
+
+def mesclar_intervalos(intervalos: Iterable[Intervalo]) -> List[Intervalo]:
+    """Ordena e une intervalos sobrepostos ou encostados: O(n log n)"""
+    mesclados: List[Intervalo] = []
+    for inicio, fim in sorted(intervalos):
+        if mesclados and inicio <= mesclados[-1][1]:
+            if fim > mesclados[-1][1]:
+                mesclados[-1] = (mesclados[-1][0], fim)
+        else:
+            mesclados.append((inicio, fim))
+    return mesclados
+
+
+def horarios_livres(
+    ocupados: List[Intervalo],
+    inicio: date,
+    fim: date,
+    expediente_inicio: time,
+    expediente_fim: time,
+    duracao_minima: int,
+) -> List[Intervalo]:
+    """
+    Lacunas de pelo menos duracao_minima minutos dentro do expediente de cada dia,
+    dados os intervalos ocupados já mesclados e ordenados. Uma única passada:
+    os dias e os intervalos avançam juntos.
+    """
+    livres: List[Intervalo] = []
+    minimo = timedelta(minutes=duracao_minima)
+    posicao = 0
+    dia = inicio
+    while dia <= fim:
+        janela_inicio = datetime.combine(dia, expediente_inicio)
+        janela_fim = datetime.combine(dia, expediente_fim)
+        dia += timedelta(days=1)
+        if janela_fim <= janela_inicio:
+            continue
+
+        # Intervalos que terminaram antes da janela não voltam a interessar
+        while posicao < len(ocupados) and ocupados[posicao][1] <= janela_inicio:
+            posicao += 1
+
+        cursor = janela_inicio
+        atual = posicao
+        while atual < len(ocupados) and ocupados[atual][0] < janela_fim:
+            ocupado_inicio, ocupado_fim = ocupados[atual]
+            if ocupado_inicio - cursor >= minimo:
+                livres.append((cursor, ocupado_inicio))
+            cursor = max(cursor, ocupado_fim)
+            atual += 1
+        if janela_fim - cursor >= minimo:
+            livres.append((cursor, janela_fim))
+    return livres
+
+
+def calcular_disponibilidade(
+    db,
+    inicio: date,
+    fim: date,
+    profissionais_ids: Iterable[int],
+    participantes_ids: Iterable[int],
+    expediente_inicio: time,
+    expediente_fim: time,
+    duracao_minima: int,
+) -> Dict[str, Any]:
+    """
+    Horários em que todas as pessoas informadas estão livres, de inicio a fim (inclusive).
+
+    Recebe a Session síncrona; nas rotas assíncronas use `await db.run_sync(...)`.
+    """
+    janela_inicio = datetime.combine(inicio, datetime.min.time())
+    janela_fim = datetime.combine(fim + timedelta(days=1), datetime.min.time())
+    agenda = ocupacoes(db, janela_inicio, janela_fim, profissionais_ids, participantes_ids)
+
+    ocupados = mesclar_intervalos((item["data_hora"], item["fim"]) for item in agenda)
+    livres = horarios_livres(ocupados, inicio, fim, expediente_inicio, expediente_fim, duracao_minima)
+
+    return {
+        "inicio": inicio.isoformat(),
+        "fim": fim.isoformat(),
+        "ocupados": [{"inicio": a.isoformat(), "fim": b.isoformat()} for a, b in ocupados],
+        "livres": [{"inicio": a.isoformat(), "fim": b.isoformat()} for a, b in livres],
+    }
+
+
+def descrever_conflitos(conflitos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "agendamento_id": item["id"],
+            "titulo": item["titulo"],
+            "inicio": item["data_hora"].isoformat(),
+            "fim": item["fim"].isoformat(),
+            "papel": item["papel"],
+            "pessoa_id": item["pessoa_id"],
+        }
+        for item in conflitos
+    ]
@@ -0,0 +1,53 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+
+
+def agregar_contagens(
+    db,
+    modelo,
+    janelas: Optional[Dict[str, Any]] = None,
+    dimensoes: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Conta as linhas de um modelo em uma única consulta.
+
+    janelas: nome -> condição SQL, contada com COUNT(*) FILTER (WHERE ...)
+    dimensoes: nome -> coluna, contada para cada valor presente (GROUP BY)
+
+    Retorna {"total": int, "janelas": {nome: int}, "por": {dimensao: {valor: int}}}
+
+    Recebe a Session síncrona; nas rotas assíncronas use `await db.run_sync(...)`.
+    """
+    janelas = janelas or {}
+    dimensoes = dimensoes or {}
+
+    colunas_dimensao = [coluna.label(f"dim_{nome}") for nome, coluna in dimensoes.items()]
+    colunas_janela = [
+        func.count().filter(condicao).label(f"jan_{nome}")
+        for nome, condicao in janelas.items()
+    ]
+
+    query = db.query(*colunas_dimensao, func.count().label("total"), *colunas_janela).select_from(modelo)
+    if dimensoes:
+        query = query.group_by(*dimensoes.values())
+
+    resultado = {
+        "total": 0,
+        "janelas": {nome: 0 for nome in janelas},
+        "por": {nome: {} for nome in dimensoes},
+    }
+
+    # Com GROUP BY cada linha é uma combinação de valores das dimensões;
+    # os totais gerais e por dimensão saem da soma dessas linhas.
+    for linha in query.all():
+        valores = linha._mapping
+        resultado["total"] += valores["total"]
+        for nome in janelas:
+            resultado["janelas"][nome] += valores[f"jan_{nome}"]
+        for nome in dimensoes:
+            contagens = resultado["por"][nome]
+            valor = valores[f"dim_{nome}"]
+            contagens[valor] = contagens.get(valor, 0) + valores["total"]
+
+    return resultado
@@ -0,0 +1,262 @@
+"""
+Importação em massa de cadastros a partir de um corpo CSV ou NDJSON em streaming.
+
+O corpo é lido em pedaços, as linhas são validadas com CadastroCreate em lotes
+de tamanho fixo e cada lote vira um único INSERT ... ON CONFLICT (email), de modo
+que a memória usada não depende do tamanho do arquivo.
+"""
+import codecs
+import csv
+import json
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert
+
+from backend.database import models
+from backend.services import agendamento_service
+from backend.schemas.cadastro import CadastroCreate
+
+FORMATO_CSV = "csv"
+FORMATO_NDJSON = "ndjson"
+MODO_IGNORAR = "ignorar"
+MODO_ATUALIZAR = "atualizar"
+
+# Maior linha (e maior registro CSV com quebras de linha entre aspas) aceita
+IMPORTACAO_REGISTRO_MAX = int(os.getenv("IMPORTACAO_REGISTRO_MAX", "65536"))
+
+CAMPOS_CADASTRO = ("nome", "email", "telefone", "data_nascimento", "endereco")
+# Campos que o arquivo pode omitir: no modo atualizar não apagam o valor já gravado
+CAMPOS_OPCIONAIS = tuple(campo for campo in CAMPOS_CADASTRO if not CadastroCreate.model_fields[campo].is_required())
+
+# (número da linha no arquivo, dados brutos ou mensagem de erro de leitura)
+Registro = Tuple[int, Any]
+
+
+async def _linhas_texto(pedacos: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    """
+    Decodifica os pedaços em UTF-8 e entrega uma linha de texto por vez (sem o \\n).
+    Linhas com mais de IMPORTACAO_REGISTRO_MAX caracteres são descartadas sem
+    ficar em memória e entregues como None, para o chamador rejeitar só a linha.
+    """
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+    resto = ""
+    descartando = False
+    async for pedaco in pedacos:
+        resto += decodificador.decode(pedaco)
+        *linhas, resto = resto.split("\n")
+        for linha in linhas:
+            if descartando or len(linha) > IMPORTACAO_REGISTRO_MAX:
+                descartando = False
+                yield None
+                continue
+            yield linha.rstrip("\r")
+        if len(resto) > IMPORTACAO_REGISTRO_MAX:
+            descartando, resto = True, ""
+    resto += decodificador.decode(b"", final=True)
+    if descartando or len(resto) > IMPORTACAO_REGISTRO_MAX:
+        yield None
+    elif resto:
+        yield resto.rstrip("\r")
+
+
+def _linha_longa(numero: int) -> Registro:
+    return numero, f"Linha com mais de {IMPORTACAO_REGISTRO_MAX} caracteres"
+
+
+async def registros_ndjson(pedacos: AsyncIterator[bytes]) -> AsyncIterator[Registro]:
+    """Um objeto JSON por linha; linhas em branco são ignoradas"""
+    numero = 0
+    async for linha in _linhas_texto(pedacos):
+        numero += 1
+        if linha is None:
+            yield _linha_longa(numero)
+            continue
+        if not linha.strip():
+            continue
+        try:
+            dados = json.loads(linha)
+        except ValueError as e:
+            yield numero, f"JSON inválido: {e}"
+            continue
+        if not isinstance(dados, dict):
+            yield numero, "Cada linha deve ser um objeto JSON"
+            continue
+        yield numero, dados
+
+
+def termina_entre_aspas(linha: str, separador: str, entre_aspas: bool = False) -> bool:
+    """
+    Se a linha termina dentro de um campo entre aspas, seguindo as regras do
+    módulo csv: só abre aspas o campo que começa com ", "" dentro dele é uma
+    aspa literal e aspas no meio de um campo sem aspas (5'10", O"Brien) não
+    abrem nada.
+    """
+    inicio_de_campo = not entre_aspas
+    i = 0
+    while i < len(linha):
+        caractere = linha[i]
+        if entre_aspas:
+            if caractere == '"':
+                if linha[i + 1:i + 2] == '"':
+                    i += 1
+                else:
+                    entre_aspas = False
+        elif caractere == separador:
+            inicio_de_campo = True
+            i += 1
+            continue
+        elif caractere == '"' and inicio_de_campo:
+            entre_aspas = True
+        inicio_de_campo = False
+        i += 1
+    return entre_aspas
+
+
+async def registros_csv(pedacos: AsyncIterator[bytes]) -> AsyncIterator[Registro]:
+    """
+    CSV com cabeçalho na primeira linha (separador , ou ;).
+    Campos entre aspas podem conter quebras de linha: as linhas físicas são
+    acumuladas enquanto um campo entre aspas estiver aberto, até
+    IMPORTACAO_REGISTRO_MAX caracteres; passando disso (aspas não fechadas) o
+    registro é rejeitado e a leitura recomeça na linha seguinte.
+    """
+    cabecalho: Optional[List[str]] = None
+    separador = ","
+    numero = 0
+    inicio = 0
+    partes: List[str] = []
+    tamanho = 0
+    entre_aspas = False
+
+    async for linha in _linhas_texto(pedacos):
+        numero += 1
+        if linha is None:
+            if partes:
+                yield inicio, "Aspas não fechadas"
+                partes, tamanho, entre_aspas = [], 0, False
+            yield _linha_longa(numero)
+            continue
+        if not partes:
+            inicio = numero
+            if cabecalho is None and linha.strip():
+                separador = ";" if linha.count(";") > linha.count(",") else ","
+        partes.append(linha)
+        tamanho += len(linha) + 1
+        entre_aspas = termina_entre_aspas(linha, separador, entre_aspas)
+        if entre_aspas:
+            if tamanho > IMPORTACAO_REGISTRO_MAX:
+                yield inicio, f"Aspas não fechadas: registro com mais de {IMPORTACAO_REGISTRO_MAX} caracteres"
+                partes, tamanho, entre_aspas = [], 0, False
+            continue
+
+        texto = "\n".join(partes)
+        partes, tamanho = [], 0
+        if not texto.strip():
+            continue
+
+        try:
+            valores = next(csv.reader([texto], delimiter=separador))
+        except csv.Error as e:
+            yield inicio, f"CSV inválido: {e}"
+            continue
+        if cabecalho is None:
+            cabecalho = [campo.strip().lower() for campo in valores]
+            continue
+        if len(valores) != len(cabecalho):
+            yield inicio, f"Esperadas {len(cabecalho)} colunas, encontradas {len(valores)}"
+            continue
+        yield inicio, dict(zip(cabecalho, valores))
+
+    if partes:
+        yield inicio, "Aspas não fechadas no fim do arquivo"
+
+
+def validar_registro(dados: Dict[str, Any]) -> Dict[str, Any]:
+    """Aplica CadastroCreate; campos vazios do CSV contam como ausentes"""
+    dados = {
+        campo: (valor.strip() if isinstance(valor, str) else valor)
+        for campo, valor in dados.items()
+        if campo in CAMPOS_CADASTRO
+    }
+    dados = {campo: valor for campo, valor in dados.items() if valor not in ("", None)}
+    return CadastroCreate(**dados).model_dump()
+
+
+def descrever_erro_validacao(erro: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in detalhe['loc']) or 'registro'}: {detalhe['msg']}"
+        for detalhe in erro.errors()
+    )
+
+
+def inserir_lote(db, linhas: List[Dict[str, Any]], modo: str) -> Tuple[List[datetime], int]:
+    """
+    Grava um lote com um único INSERT ... ON CONFLICT (email).
+    No modo atualizar, campos opcionais ausentes ou vazios no arquivo mantêm o valor gravado.
+    Retorna (data_criacao dos cadastros novos, quantidade de cadastros atualizados).
+    Cadastros atualizados têm o resumo de participantes dos seus agendamentos refeito.
+
+    Recebe a Session síncrona; nas rotas assíncronas use `await db.run_sync(inserir_lote, ...)`.
+    """
+    if not linhas:
+        return [], 0
+
+    stmt = insert(models.Cadastro).values(linhas)
+    if modo == MODO_ATUALIZAR:
+        colunas = models.Cadastro.__table__.c
+        valores = {
+            campo: func.coalesce(stmt.excluded[campo], colunas[campo]) if campo in CAMPOS_OPCIONAIS else stmt.excluded[campo]
+            for campo in CAMPOS_CADASTRO
+            if campo != "email"
+        }
+        # O onupdate da coluna não vale para o ON CONFLICT
+        valores["data_atualizacao"] = func.now()
+        stmt = stmt.on_conflict_do_update(index_elements=["email"], set_=valores)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["email"])
+
+    # xmax = 0 distingue as linhas inseridas das atualizadas pelo ON CONFLICT
+    stmt = stmt.returning(
+        models.Cadastro.id, models.Cadastro.data_criacao, literal_column("xmax = 0").label("inserido"),
+    )
+    resultado = db.execute(stmt).all()
+
+    criados = [linha.data_criacao for linha in resultado if linha.inserido]
+    atualizados = [linha.id for linha in resultado if not linha.inserido]
+    if atualizados:
+        agendamento_service.recalcular_participantes_dos_cadastros(db, atualizados)
+    return criados, len(resultado) - len(criados)
+
+
+def separar_lote(registros: Iterable[Registro]) -> Tuple[List[Dict[str, Any]], List[int], List[Dict[str, Any]]]:
+    """
+    Valida um lote de registros lidos.
+    Retorna (linhas válidas, números de linha correspondentes, erros).
+    E-mails repetidos dentro do lote mantêm a primeira ocorrência.
+    """
+    validas: List[Dict[str, Any]] = []
+    numeros: List[int] = []
+    erros: List[Dict[str, Any]] = []
+    emails = set()
+
+    for numero, dados in registros:
+        if isinstance(dados, str):
+            erros.append({"linha": numero, "erro": dados})
+            continue
+        try:
+            linha = validar_registro(dados)
+        except ValidationError as e:
+            erros.append({"linha": numero, "email": dados.get("email"), "erro": descrever_erro_validacao(e)})
+            continue
+        if linha["email"] in emails:
+            erros.append({"linha": numero, "email": linha["email"], "erro": "E-mail repetido no arquivo"})
+            continue
+        emails.add(linha["email"])
+        validas.append(linha)
+        numeros.append(numero)
+
+    return validas, numeros, erros
@@ -0,0 +1,221 @@
+"""
+Métricas diárias do dashboard (tabela metricas_diarias).
+
+As escritas de cadastros e agendamentos chamam as funções registrar_* na mesma
+transação, e o dashboard lê O(dias) linhas em vez de varrer as tabelas.
+
+Reconstrução completa (ou a partir de uma data):
+    python -m backend.services.metricas_service
+    python -m backend.services.metricas_service --desde 2024-01-01
+"""
+import argparse
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Date, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+
+from backend.database import models
+
+METRICA_CADASTROS = "cadastros"
+METRICA_AGENDAMENTOS = "agendamentos"
+METRICA_STATUS = "status"
+METRICA_TIPO_SESSAO = "tipo_sessao"
+
+Chave = Tuple[date, str, str]
+
+
+def _dia(data_criacao: Optional[datetime]) -> date:
+    return data_criacao.date() if data_criacao else date.today()
+
+
+def aplicar_deltas(db, deltas: Dict[Chave, Tuple[int, float]]) -> None:
+    """
+    Soma os deltas (quantidade, valor) nas linhas de metricas_diarias com um
+    único INSERT ... ON CONFLICT DO UPDATE
+    """
+    linhas = [
+        {"dia": dia, "metrica": metrica, "chave": chave, "quantidade": quantidade, "valor_total": valor}
+        for (dia, metrica, chave), (quantidade, valor) in deltas.items()
+        if quantidade or valor
+    ]
+    if not linhas:
+        return
+
+    stmt = insert(models.MetricaDiaria).values(linhas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["dia", "metrica", "chave"],
+        set_={
+            "quantidade": models.MetricaDiaria.quantidade + stmt.excluded.quantidade,
+            "valor_total": models.MetricaDiaria.valor_total + stmt.excluded.valor_total,
+            # O onupdate da coluna não vale para o ON CONFLICT; o ETag do dashboard depende dela
+            "data_atualizacao": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+def _deltas_agendamento(deltas, dia: date, status, tipo_sessao, valor, sinal: int) -> None:
+    valor = (valor or 0) * sinal
+    for chave in (
+        (dia, METRICA_AGENDAMENTOS, ""),
+        (dia, METRICA_STATUS, status or ""),
+        (dia, METRICA_TIPO_SESSAO, tipo_sessao or ""),
+    ):
+        quantidade, soma = deltas[chave]
+        deltas[chave] = (quantidade + sinal, soma + valor)
+
+
+def registrar_agendamento(db, agendamento, sinal: int = 1) -> None:
+    """Conta (sinal=1) ou descarta (sinal=-1) um agendamento nas métricas do dia de criação"""
+    deltas = defaultdict(lambda: (0, 0.0))
+    _deltas_agendamento(
+        deltas, _dia(agendamento.data_criacao),
+        agendamento.status, agendamento.tipo_sessao, agendamento.valor, sinal,
+    )
+    aplicar_deltas(db, deltas)
+
+
+def registrar_alteracao_agendamento(db, antes: Dict[str, Any], agendamento) -> None:
+    """Move a contagem entre status/tipo_sessao e ajusta o valor após uma atualização"""
+    if (
+        antes["status"] == agendamento.status
+        and antes["tipo_sessao"] == agendamento.tipo_sessao
+        and (antes["valor"] or 0) == (agendamento.valor or 0)
+    ):
+        return
+
+    dia = _dia(agendamento.data_criacao)
+    deltas = defaultdict(lambda: (0, 0.0))
+    _deltas_agendamento(deltas, dia, antes["status"], antes["tipo_sessao"], antes["valor"], -1)
+    _deltas_agendamento(deltas, dia, agendamento.status, agendamento.tipo_sessao, agendamento.valor, 1)
+    aplicar_deltas(db, deltas)
+
+
+def registrar_agendamentos_lote(db, removidos: Iterable[Any] = (), incluidos: Iterable[Any] = ()) -> None:
+    """
+    Descarta `removidos` e conta `incluidos` (linhas com data_criacao, status,
+    tipo_sessao e valor) com um único INSERT, para as operações em massa
+    """
+    deltas = defaultdict(lambda: (0, 0.0))
+    for sinal, linhas in ((-1, removidos), (1, incluidos)):
+        for agendamento in linhas:
+            _deltas_agendamento(
+                deltas, _dia(agendamento.data_criacao),
+                agendamento.status, agendamento.tipo_sessao, agendamento.valor, sinal,
+            )
+    aplicar_deltas(db, deltas)
+
+
+def registrar_cadastros(db, dias: Iterable[Optional[datetime]], sinal: int = 1) -> None:
+    """Conta (ou descarta) cadastros pelo dia de criação de cada um"""
+    deltas = defaultdict(lambda: (0, 0.0))
+    for data_criacao in dias:
+        chave = (_dia(data_criacao), METRICA_CADASTROS, "")
+        deltas[chave] = (deltas[chave][0] + sinal, 0.0)
+    aplicar_deltas(db, deltas)
+
+
+def somar_metricas(db, janelas: Dict[str, Optional[date]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Soma as métricas diárias em cada janela (nome -> data inicial; None = desde sempre)
+    em uma única consulta.
+
+    Retorna {metrica: {chave: {janela: {"quantidade": int, "valor_total": float}}}}
+    """
+    tabela = models.MetricaDiaria
+    colunas = []
+    for nome, inicio in janelas.items():
+        quantidade = func.sum(tabela.quantidade)
+        valor = func.sum(tabela.valor_total)
+        if inicio is not None:
+            quantidade = quantidade.filter(tabela.dia >= inicio)
+            valor = valor.filter(tabela.dia >= inicio)
+        colunas.append(func.coalesce(quantidade, 0).label(f"q_{nome}"))
+        colunas.append(func.coalesce(valor, 0).label(f"v_{nome}"))
+
+    query = db.query(tabela.metrica, tabela.chave, *colunas).group_by(tabela.metrica, tabela.chave)
+    inicios = list(janelas.values())
+    if inicios and None not in inicios:
+        query = query.filter(tabela.dia >= min(inicios))
+
+    resultado: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+    for linha in query.all():
+        valores = linha._mapping
+        resultado[linha.metrica][linha.chave] = {
+            nome: {"quantidade": int(valores[f"q_{nome}"]), "valor_total": float(valores[f"v_{nome}"])}
+            for nome in janelas
+        }
+    return resultado
+
+
+def reconstruir_metricas(db, desde: Optional[date] = None) -> int:
+    """
+    Recalcula metricas_diarias a partir das tabelas de origem (todas as datas ou a
+    partir de `desde`). Retorna o número de linhas geradas.
+    """
+    tabela = models.MetricaDiaria.__table__
+    apagar = tabela.delete()
+    if desde is not None:
+        apagar = apagar.where(tabela.c.dia >= desde)
+    db.execute(apagar)
+
+    agendamento = models.Agendamento
+    cadastro = models.Cadastro
+    colunas_destino = ["dia", "metrica", "chave", "quantidade", "valor_total"]
+    geradas = 0
+
+    def inserir(modelo, metrica: str, chave_coluna=None, com_valor: bool = False):
+        dia = cast(modelo.data_criacao, Date)
+        chave = func.coalesce(chave_coluna, "") if chave_coluna is not None else literal("")
+        valor = func.coalesce(func.sum(modelo.valor), 0) if com_valor else literal(0.0)
+        origem = select(dia, literal(metrica), chave, func.count(), valor).group_by(dia)
+        if chave_coluna is not None:
+            origem = origem.group_by(chave_coluna)
+        if desde is not None:
+            origem = origem.where(modelo.data_criacao >= datetime.combine(desde, datetime.min.time()))
+        return db.execute(tabela.insert().from_select(colunas_destino, origem)).rowcount or 0
+
+    geradas += inserir(cadastro, METRICA_CADASTROS)
+    geradas += inserir(agendamento, METRICA_AGENDAMENTOS, com_valor=True)
+    geradas += inserir(agendamento, METRICA_STATUS, agendamento.status, com_valor=True)
+    geradas += inserir(agendamento, METRICA_TIPO_SESSAO, agendamento.tipo_sessao, com_valor=True)
+    return geradas
+
+
+def garantir_metricas(db) -> None:
+    """Reconstrói as métricas na primeira execução (tabela vazia mas com dados de origem)"""
+    if db.query(models.MetricaDiaria.dia).first() is not None:
+        return
+    if db.query(models.Cadastro.id).first() is None and db.query(models.Agendamento.id).first() is None:
+        return
+    geradas = reconstruir_metricas(db)
+    db.commit()
+    print(f"Métricas diárias reconstruídas: {geradas} linhas")
+
+
+def main():
+    from backend.database.database import SessionLocal
+    from backend.utils.cache import cache_respostas
+
+    parser = argparse.ArgumentParser(description="Reconstrói a tabela metricas_diarias")
+    parser.add_argument("--desde", type=date.fromisoformat, default=None, help="Data inicial (AAAA-MM-DD)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        geradas = reconstruir_metricas(db, args.desde)
+        db.commit()
+        # Respostas do dashboard guardadas no cache compartilhado deixam de valer
+        cache_respostas.invalidar("dashboard")
+        print(f"Métricas diárias reconstruídas: {geradas} linhas")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Operações em massa sobre agendamentos (POST /api/agendamentos/bulk).
+
+As linhas selecionadas são travadas e lidas com um único SELECT ... FOR UPDATE
+(os valores anteriores alimentam as métricas e os e-mails) e alteradas com um
+único UPDATE/DELETE ... WHERE id IN (...), na transação da rota. Cada
+participante recebe um só e-mail com todos os seus agendamentos alterados.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, select, update
+
+from backend.database import models
+from backend.services import metricas_service, outbox_service, recorrencia_service
+from backend.services.agendamento_service import participantes_por_agendamento
+
+TEMPLATE_LOTE = "agendamentos_alterados.html"
+
+ASSUNTOS = {
+    "status": "Agendamentos atualizados",
+    "reagendar": "Agendamentos reagendados",
+    "excluir": "Agendamentos cancelados",
+}
+
+MENSAGENS = {
+    "status": "O status dos seguintes agendamentos foi alterado:",
+    "reagendar": "Os seguintes agendamentos mudaram de horário:",
+    "excluir": "Os seguintes agendamentos foram cancelados:",
+}
+
+# Valores anteriores lidos (e travados) antes da alteração
+COLUNAS_ANTES = (
+    models.Agendamento.id,
+    models.Agendamento.titulo,
+    models.Agendamento.data_hora,
+    models.Agendamento.local,
+    models.Agendamento.status,
+    models.Agendamento.tipo_sessao,
+    models.Agendamento.valor,
+    models.Agendamento.data_criacao,
+    models.Agendamento.recorrencia_id,
+    models.Agendamento.ocorrencia_dia,
+)
+
+
+def executar_lote(db, dados, condicao) -> Dict[str, Any]:
+    """
+    Aplica a operação de `dados` (AgendamentosLote) aos agendamentos que atendem
+    a `condicao`. Não faz commit. Retorna o corpo de ResultadoLote.
+    """
+    agendamento = models.Agendamento
+    linhas = db.execute(
+        select(*COLUNAS_ANTES).where(condicao).order_by(agendamento.id).with_for_update()
+    ).all()
+    ids = [linha.id for linha in linhas]
+    resultado = {
+        "operacao": dados.operacao,
+        "afetados": len(ids),
+        "ids": ids,
+        "nao_encontrados": sorted(set(dados.ids) - set(ids)),
+        "emails_enfileirados": 0,
+    }
+    if not ids:
+        return resultado
+
+    participantes = {}
+    if dados.notificar and dados.operacao in ASSUNTOS:
+        participantes = participantes_por_agendamento(db, ids)
+
+    if dados.operacao == "excluir":
+        _excluir(db, linhas, ids)
+    else:
+        valores: Dict[str, Any] = {"data_atualizacao": datetime.now()}
+        if dados.operacao == "status":
+            valores["status"] = dados.status
+        elif dados.operacao == "concluido":
+            valores["concluido"] = dados.concluido
+        else:
+            valores["data_hora"] = agendamento.data_hora + timedelta(minutes=dados.deslocamento_minutos)
+        db.execute(
+            update(agendamento)
+            .where(agendamento.id.in_(ids))
+            .values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+        if dados.operacao == "status":
+            metricas_service.registrar_agendamentos_lote(
+                db,
+                removidos=linhas,
+                incluidos=[SimpleNamespace(**{**linha._asdict(), "status": dados.status}) for linha in linhas],
+            )
+
+    if participantes:
+        resultado["emails_enfileirados"] = enfileirar_notificacoes(db, dados, linhas, participantes)
+    return resultado
+
+
+def _excluir(db, linhas: List[Any], ids: List[int]) -> None:
+    """Remove as associações e os agendamentos; ocorrências materializadas viram exceções da série"""
+    metricas_service.registrar_agendamentos_lote(db, removidos=linhas)
+
+    dias_por_regra = defaultdict(list)
+    for linha in linhas:
+        if linha.recorrencia_id is not None and linha.ocorrencia_dia is not None:
+            dias_por_regra[linha.recorrencia_id].append(linha.ocorrencia_dia)
+    recorrencia_service.adicionar_excecoes(db, dias_por_regra)
+
+    participacoes = models.agendamento_participantes
+    db.execute(delete(participacoes).where(participacoes.c.agendamento_id.in_(ids)))
+    db.execute(
+        delete(models.Agendamento)
+        .where(models.Agendamento.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def descrever_alteracao(dados, linha) -> Dict[str, Any]:
+    """Item do e-mail: o agendamento como fica depois da operação"""
+    data_hora = linha.data_hora
+    if dados.operacao == "reagendar":
+        data_hora = linha.data_hora + timedelta(minutes=dados.deslocamento_minutos)
+        alteracao = f"Novo horário (antes: {linha.data_hora.strftime('%d/%m/%Y %H:%M')})"
+    elif dados.operacao == "status":
+        alteracao = f"Status: {dados.status}"
+    else:
+        alteracao = "Cancelado"
+    return {
+        "titulo": linha.titulo,
+        "data_hora": data_hora.strftime("%d/%m/%Y %H:%M"),
+        "local": linha.local,
+        "alteracao": alteracao,
+    }
+
+
+def enfileirar_notificacoes(db, dados, linhas: List[Any], participantes: Dict[int, List[Dict[str, Any]]]) -> int:
+    """Um e-mail por destinatário listando todos os seus agendamentos alterados"""
+    por_destinatario: Dict[str, Dict[str, Any]] = {}
+    for linha in linhas:
+        item = descrever_alteracao(dados, linha)
+        for participante in participantes.get(linha.id, []):
+            email_destino = (participante["email"] or "").strip()
+            if not email_destino:
+                continue
+            destinatario = por_destinatario.setdefault(
+                email_destino, {"nome": participante["nome"], "agendamentos": []}
+            )
+            destinatario["agendamentos"].append(item)
+
+    for email_destino, contexto in por_destinatario.items():
+        outbox_service.enfileirar_email(
+            db,
+            destinatario=email_destino,
+            assunto=ASSUNTOS[dados.operacao],
+            template_name=TEMPLATE_LOTE,
+            context={**contexto, "mensagem": MENSAGENS[dados.operacao]},
+        )
+    return len(por_destinatario)
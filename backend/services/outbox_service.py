@@ -0,0 +1,451 @@
+"""
+Outbox de e-mails.
+
+As rotas gravam cada e-mail em emails_pendentes (enfileirar_email) na mesma
+transação da escrita que o originou: se o commit falha nada é enviado, e se o
+processo da API cai depois do commit a mensagem continua na fila.
+
+O worker (python -m backend.services.outbox_service) reserva lotes com
+FOR UPDATE SKIP LOCKED, então vários workers podem rodar juntos. Cada lote é
+entregue por uma única conexão SMTP autenticada, respeitando um limite de
+envios por minuto; falhas temporárias são reagendadas com backoff exponencial
+e recusas definitivas (5xx) ou o esgotamento das tentativas marcam a mensagem
+como falhou. A entrega é "pelo menos uma vez": se o worker cai no meio de um
+lote, a reserva expira e as mensagens ainda não confirmadas voltam à fila.
+
+Com o pacote aiosmtplib instalado o worker envia de forma assíncrona, por um
+pool de EMAIL_CONEXOES conexões mantidas entre os lotes (backend/utils/smtp_pool)
+e com timeout por mensagem; sem ele, usa o smtplib com uma conexão por lote.
+
+Os dois caminhos contam vazão, falhas, timeouts e reconexões (MetricasEnvio);
+cada worker grava esse resumo em workers_email a cada EMAIL_METRICAS_SEGUNDOS,
+e o /health/emails da API o devolve junto com o estado da fila.
+"""
+import argparse
+import asyncio
+import os
+import smtplib
+import socket
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from backend.database import models
+from backend.utils.email import (
+    MetricasEnvio,
+    RenderizadorLote,
+    abrir_conexao_smtp,
+    erro_permanente,
+    montar_mensagem,
+    precompilar_templates,
+)
+
+EMAIL_LOTE = int(os.getenv("EMAIL_LOTE", "20"))
+EMAIL_LIMITE_POR_MINUTO = int(os.getenv("EMAIL_LIMITE_POR_MINUTO", "30"))
+EMAIL_MAX_TENTATIVAS = int(os.getenv("EMAIL_MAX_TENTATIVAS", "6"))
+EMAIL_BACKOFF_SEGUNDOS = int(os.getenv("EMAIL_BACKOFF_SEGUNDOS", "30"))
+EMAIL_BACKOFF_MAXIMO = int(os.getenv("EMAIL_BACKOFF_MAXIMO", "3600"))
+# Tempo de posse de um lote reservado; depois disso outro worker pode retomá-lo
+EMAIL_RESERVA_SEGUNDOS = int(os.getenv("EMAIL_RESERVA_SEGUNDOS", "300"))
+# Intervalo entre as gravações das métricas de envio do worker em workers_email
+EMAIL_METRICAS_SEGUNDOS = float(os.getenv("EMAIL_METRICAS_SEGUNDOS", "15"))
+
+STATUS_PENDENTE = "pendente"
+STATUS_ENVIADO = "enviado"
+STATUS_FALHOU = "falhou"
+
+# Contadores de MetricasEnvio.resumo() somados entre os workers no /health/emails
+CONTADORES_ENVIO = ("enviadas", "falhas_temporarias", "falhas_permanentes", "timeouts", "conexoes_abertas", "reconexoes")
+
+
+def enfileirar_email(db, destinatario: str, assunto: str, template_name: str, context: dict) -> None:
+    """
+    Adiciona o e-mail à sessão; ele só passa a existir com o commit da transação
+    da rota. Funciona com a sessão síncrona e com a assíncrona (não faz I/O).
+    """
+    db.add(
+        models.EmailPendente(
+            destinatario=destinatario,
+            assunto=assunto,
+            template=template_name,
+            contexto=context,
+            status=STATUS_PENDENTE,
+            tentativas=0,
+            proxima_tentativa=datetime.now(),
+        )
+    )
+
+
+def calcular_backoff(tentativas: int) -> timedelta:
+    """30s, 1min, 2min, 4min... até EMAIL_BACKOFF_MAXIMO"""
+    segundos = EMAIL_BACKOFF_SEGUNDOS * 2 ** max(tentativas - 1, 0)
+    return timedelta(seconds=min(segundos, EMAIL_BACKOFF_MAXIMO))
+
+
+def reservar_lote(db, tamanho: int = EMAIL_LOTE, agora: Optional[datetime] = None) -> List[Any]:
+    """
+    Reserva até `tamanho` mensagens vencidas: conta a tentativa e empurra
+    proxima_tentativa para o fim da reserva, em um único UPDATE ... RETURNING.
+    O chamador faz o commit antes de começar a enviar.
+    """
+    agora = agora or datetime.now()
+    email = models.EmailPendente
+    vencidas = (
+        select(email.id)
+        .where(email.status == STATUS_PENDENTE, email.proxima_tentativa <= agora)
+        .order_by(email.proxima_tentativa, email.id)
+        .limit(tamanho)
+        .with_for_update(skip_locked=True)
+    )
+    return db.execute(
+        update(email)
+        .where(email.id.in_(vencidas.scalar_subquery()))
+        .values(
+            tentativas=email.tentativas + 1,
+            proxima_tentativa=agora + timedelta(seconds=EMAIL_RESERVA_SEGUNDOS),
+        )
+        .returning(email.id, email.destinatario, email.assunto, email.template, email.contexto, email.tentativas)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def registrar_resultado(db, email_id: int, tentativas: int, erro: Optional[Exception] = None) -> None:
+    """Confirma o envio ou reagenda/encerra a mensagem conforme o erro (commit por mensagem)"""
+    email = models.EmailPendente
+    agora = datetime.now()
+    if erro is None:
+        valores = {"status": STATUS_ENVIADO, "enviado_em": agora, "ultimo_erro": None}
+    elif erro_permanente(erro) or tentativas >= EMAIL_MAX_TENTATIVAS:
+        valores = {"status": STATUS_FALHOU, "ultimo_erro": str(erro)}
+    else:
+        valores = {"proxima_tentativa": agora + calcular_backoff(tentativas), "ultimo_erro": str(erro)}
+    db.execute(update(email).where(email.id == email_id).values(**valores).execution_options(synchronize_session=False))
+    db.commit()
+
+
+class LimiteTaxa:
+    """Janela deslizante de um minuto: no máximo `por_minuto` envios (0 = sem limite)"""
+
+    def __init__(self, por_minuto: int, relogio: Callable[[], float] = time.monotonic, dormir: Callable[[float], None] = time.sleep):
+        self.por_minuto = por_minuto
+        self.relogio = relogio
+        self.dormir = dormir
+        self.envios = deque()
+
+    def reservar(self) -> float:
+        """Reserva o horário do próximo envio e devolve quantos segundos esperar por ele"""
+        if self.por_minuto <= 0:
+            return 0.0
+        agora = self.relogio()
+        while self.envios and agora - self.envios[0] >= 60:
+            self.envios.popleft()
+        espera = 0.0
+        if len(self.envios) >= self.por_minuto:
+            espera = 60 - (agora - self.envios[0])
+            self.envios.popleft()
+        self.envios.append(agora + espera)
+        return espera
+
+    def aguardar(self) -> None:
+        espera = self.reservar()
+        if espera > 0:
+            self.dormir(espera)
+
+
+def entregar_lote(
+    mensagens: List[Any],
+    registrar: Callable[[Any, Optional[Exception]], None],
+    limite: Optional[LimiteTaxa] = None,
+    conectar: Callable[[], Any] = abrir_conexao_smtp,
+    metricas: Optional[MetricasEnvio] = None,
+) -> int:
+    """
+    Envia as mensagens (id, destinatario, assunto, template, contexto) por uma
+    única conexão SMTP, reconectando uma vez se o servidor derrubá-la, e chama
+    registrar(mensagem, erro) para cada uma. Os e-mails de um mesmo agendamento
+    têm a parte comum renderizada uma vez só. Não depende do banco.
+    Retorna quantas foram enviadas.
+    """
+    metricas = metricas or MetricasEnvio()
+    enviadas = 0
+    smtp = None
+    renderizador = RenderizadorLote()
+    try:
+        for mensagem in mensagens:
+            try:
+                html_content = renderizador.renderizar(mensagem.template, mensagem.contexto)
+                email = montar_mensagem(mensagem.destinatario, mensagem.assunto, html_content)
+                if limite is not None:
+                    limite.aguardar()
+                inicio = metricas.relogio()
+                if smtp is None:
+                    smtp = conectar()
+                    metricas.incrementar("conexoes_abertas")
+                try:
+                    smtp.send_message(email)
+                except smtplib.SMTPServerDisconnected:
+                    metricas.incrementar("reconexoes")
+                    smtp = conectar()
+                    metricas.incrementar("conexoes_abertas")
+                    smtp.send_message(email)
+            except Exception as e:
+                print(f"Falha ao enviar e-mail {mensagem.id} para {mensagem.destinatario}: {e}")
+                metricas.registrar_falha(e)
+                if not erro_permanente(e):
+                    # Conexão em estado desconhecido: a próxima mensagem abre outra
+                    smtp = _fechar(smtp)
+                registrar(mensagem, e)
+                continue
+            enviadas += 1
+            metricas.registrar_envio(metricas.relogio() - inicio)
+            registrar(mensagem, None)
+    finally:
+        _fechar(smtp)
+    return enviadas
+
+
+def _fechar(smtp) -> None:
+    if smtp is None:
+        return None
+    try:
+        smtp.quit()
+    except Exception:
+        smtp.close()
+    return None
+
+
+async def entregar_lote_async(
+    mensagens: List[Any],
+    registrar: Callable[[Any, Optional[Exception]], None],
+    pool,
+    limite: Optional[LimiteTaxa] = None,
+) -> int:
+    """
+    Como entregar_lote, mas com os envios simultâneos do PoolSMTP. Os resultados
+    são registrados depois que o lote inteiro termina. Retorna quantas foram enviadas.
+    """
+    renderizador = RenderizadorLote()
+
+    async def entregar(mensagem):
+        try:
+            html_content = renderizador.renderizar(mensagem.template, mensagem.contexto)
+            email = montar_mensagem(mensagem.destinatario, mensagem.assunto, html_content)
+            if limite is not None:
+                await asyncio.sleep(limite.reservar())
+            await pool.enviar(email)
+        except Exception as e:
+            print(f"Falha ao enviar e-mail {mensagem.id} para {mensagem.destinatario}: {e}")
+            return e
+        return None
+
+    erros = await asyncio.gather(*(entregar(mensagem) for mensagem in mensagens))
+    for mensagem, erro in zip(mensagens, erros):
+        registrar(mensagem, erro)
+    return sum(1 for erro in erros if erro is None)
+
+
+def processar_fila(
+    db, tamanho: int = EMAIL_LOTE, limite: Optional[LimiteTaxa] = None, metricas: Optional[MetricasEnvio] = None,
+) -> int:
+    """
+    Reserva e entrega um lote. Retorna quantas mensagens foram reservadas
+    (0 = fila vazia). Recebe a Session síncrona.
+    """
+    lote = reservar_lote(db, tamanho)
+    db.commit()
+    if not lote:
+        return 0
+    metricas = metricas or MetricasEnvio()
+    enviadas = entregar_lote(
+        lote,
+        lambda mensagem, erro: registrar_resultado(db, mensagem.id, mensagem.tentativas, erro),
+        limite,
+        metricas=metricas,
+    )
+    print(f"Lote de e-mails: {enviadas} enviados de {len(lote)} | {metricas.resumo()}")
+    return len(lote)
+
+
+async def processar_fila_async(db, pool, tamanho: int = EMAIL_LOTE, limite: Optional[LimiteTaxa] = None) -> int:
+    """processar_fila com o pool assíncrono; o banco continua na Session síncrona do worker"""
+    lote = reservar_lote(db, tamanho)
+    db.commit()
+    if not lote:
+        return 0
+    enviadas = await entregar_lote_async(
+        lote,
+        lambda mensagem, erro: registrar_resultado(db, mensagem.id, mensagem.tentativas, erro),
+        pool,
+        limite,
+    )
+    print(f"Lote de e-mails: {enviadas} enviados de {len(lote)} | {pool.metricas.resumo()}")
+    return len(lote)
+
+
+def identificar_worker() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def publicar_metricas(db, worker: str, iniciado_em: datetime, metricas: dict, agora: Optional[datetime] = None) -> None:
+    """
+    Grava as métricas de envio do worker (MetricasEnvio.resumo) em workers_email,
+    de onde o /health/emails as lê; workers sem sinal há mais de um dia saem da tabela
+    """
+    agora = agora or datetime.now()
+    registro = models.WorkerEmail
+    stmt = insert(registro).values(worker=worker, iniciado_em=iniciado_em, atualizado_em=agora, metricas=metricas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["worker"],
+        set_={"atualizado_em": stmt.excluded.atualizado_em, "metricas": stmt.excluded.metricas},
+    )
+    db.execute(stmt)
+    db.execute(delete(registro).where(registro.atualizado_em < agora - timedelta(days=1)))
+    db.commit()
+
+
+def metricas_workers(db, agora: Optional[datetime] = None) -> dict:
+    """
+    Métricas publicadas pelos workers e a soma dos contadores. Um worker fica
+    inativo sem sinal por EMAIL_RESERVA_SEGUNDOS (o tempo em que um lote dele
+    ainda estaria reservado); só os ativos entram em envios_por_minuto.
+    """
+    agora = agora or datetime.now()
+    registro = models.WorkerEmail
+    linhas = db.execute(
+        select(registro.worker, registro.iniciado_em, registro.atualizado_em, registro.metricas).order_by(registro.worker)
+    ).all()
+    workers = []
+    total = {contador: 0 for contador in CONTADORES_ENVIO}
+    total["envios_por_minuto"] = 0.0
+    for linha in linhas:
+        ultimo_sinal = (agora - linha.atualizado_em).total_seconds()
+        ativo = ultimo_sinal <= EMAIL_RESERVA_SEGUNDOS
+        for contador in CONTADORES_ENVIO:
+            total[contador] += linha.metricas.get(contador, 0)
+        if ativo:
+            total["envios_por_minuto"] = round(total["envios_por_minuto"] + linha.metricas.get("envios_por_minuto", 0.0), 2)
+        workers.append({
+            "worker": linha.worker,
+            "ativo": ativo,
+            "iniciado_em": linha.iniciado_em.isoformat(),
+            "ultimo_sinal_segundos": round(max(ultimo_sinal, 0.0), 1),
+            **linha.metricas,
+        })
+    return {"total": total, "workers": workers}
+
+
+def estatisticas_fila(db, agora: Optional[datetime] = None) -> dict:
+    """Estado da fila lido do banco, para acompanhar o worker de outro processo"""
+    agora = agora or datetime.now()
+    email = models.EmailPendente
+    pendente = email.status == STATUS_PENDENTE
+    linha = db.execute(
+        select(
+            func.count().filter(pendente).label("pendentes"),
+            func.count().filter(pendente, email.tentativas > 0).label("reagendadas"),
+            func.count().filter(email.status == STATUS_FALHOU).label("falharam"),
+            func.count().filter(email.enviado_em >= agora - timedelta(hours=1)).label("enviadas_ultima_hora"),
+            func.min(email.proxima_tentativa).filter(pendente).label("mais_antiga"),
+        )
+    ).one()
+    atraso = (agora - linha.mais_antiga).total_seconds() if linha.mais_antiga else 0.0
+    return {
+        "pendentes": linha.pendentes,
+        "reagendadas": linha.reagendadas,
+        "falharam": linha.falharam,
+        "enviadas_ultima_hora": linha.enviadas_ultima_hora,
+        "atraso_segundos": round(max(atraso, 0.0), 1),
+        "envio": metricas_workers(db, agora),
+    }
+
+
+async def executar_worker(
+    db, args, processar: Callable[[], Awaitable[int]], publicar: Optional[Callable[[], None]] = None,
+) -> None:
+    """Processa lotes até a fila esvaziar (--uma-vez) ou para sempre, publicando as métricas a cada EMAIL_METRICAS_SEGUNDOS"""
+    publicado_em = None
+    while True:
+        try:
+            reservadas = await processar()
+        except Exception as e:
+            db.rollback()
+            print(f"Erro no worker de e-mails: {e}")
+            reservadas = 0
+        if publicar is not None and (publicado_em is None or time.monotonic() - publicado_em >= EMAIL_METRICAS_SEGUNDOS):
+            _publicar(db, publicar)
+            publicado_em = time.monotonic()
+        if reservadas:
+            continue
+        if args.uma_vez:
+            break
+        await asyncio.sleep(args.intervalo)
+
+
+def _publicar(db, publicar: Callable[[], None]) -> None:
+    try:
+        publicar()
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao publicar as métricas do worker de e-mails: {e}")
+
+
+def main():
+    from backend.database.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Worker da fila de e-mails (tabela emails_pendentes)")
+    parser.add_argument("--uma-vez", action="store_true", help="Esvazia a fila e termina")
+    parser.add_argument("--intervalo", type=float, default=5.0, help="Espera, em segundos, quando a fila está vazia")
+    parser.add_argument("--lote", type=int, default=EMAIL_LOTE, help="Mensagens por lote")
+    args = parser.parse_args()
+
+    limite = LimiteTaxa(EMAIL_LIMITE_POR_MINUTO)
+    print(f"{precompilar_templates()} template(s) de e-mail compilados")
+    try:
+        from backend.utils.smtp_pool import PoolSMTP
+    except ImportError:
+        PoolSMTP = None
+        print("Pacote 'aiosmtplib' não instalado; enviando com smtplib, uma conexão por lote")
+
+    db = SessionLocal()
+    worker = identificar_worker()
+    iniciado_em = datetime.now()
+
+    async def executar():
+        if PoolSMTP is None:
+            metricas = MetricasEnvio()
+
+            async def processar():
+                return processar_fila(db, args.lote, limite, metricas)
+        else:
+            pool = PoolSMTP()
+            metricas = pool.metricas
+
+            def processar():
+                return processar_fila_async(db, pool, args.lote, limite)
+
+        def publicar():
+            publicar_metricas(db, worker, iniciado_em, metricas.resumo())
+
+        try:
+            await executar_worker(db, args, processar, publicar)
+        finally:
+            if PoolSMTP is not None:
+                await pool.fechar()
+            _publicar(db, publicar)
+            print(f"Métricas de envio: {metricas.resumo()}")
+
+    print(f"Worker de e-mails iniciado (lote {args.lote}, até {EMAIL_LIMITE_POR_MINUTO} envios/min)")
+    try:
+        asyncio.run(executar())
+    except KeyboardInterrupt:
+        print("Worker de e-mails encerrado")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
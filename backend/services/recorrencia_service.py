@@ -0,0 +1,293 @@
+"""
+Séries de agendamentos (recorrências) expandidas sob demanda.
+
+A regra fica uma única vez em recorrencias_agendamento e as ocorrências não são
+gravadas: cada consulta (listagem, calendário, estatísticas, disponibilidade)
+expande só as que caem na janela pedida. Uma ocorrência vira linha em
+agendamentos apenas quando é editada (recorrencia_id + ocorrencia_dia) e, a
+partir daí, a expansão pula aquele dia; dias cancelados ficam em excecoes.
+Assim armazenamento e escrita não crescem com o tamanho da série.
+"""
+import calendar
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import exists, func, or_, select, text, update
+
+from backend.database import carregamento, models
+
+FREQUENCIAS = ("semanal", "mensal")
+NOMES_DIAS = ("seg", "ter", "qua", "qui", "sex", "sáb", "dom")
+# Janelas abertas (listagem sem data_fim, filtro "semana"...) são fechadas neste horizonte
+HORIZONTE_DIAS = int(os.getenv("RECORRENCIA_HORIZONTE_DIAS", "90"))
+# Trava de segurança por expansão (janelas já são limitadas pelas rotas)
+LIMITE_EXPANSAO = 5000
+
+
+class Ocorrencia(NamedTuple):
+    """Ocorrência ainda não materializada de uma série"""
+    regra: Any
+    data_hora: datetime
+
+
+def _semanal(inicio: datetime, intervalo: int, dias_semana, desde: Optional[datetime]) -> Iterator[datetime]:
+    dias = sorted(set(dias_semana)) if dias_semana else [inicio.weekday()]
+    semana = inicio.date() - timedelta(days=inicio.weekday())
+    if desde is not None and desde > inicio:
+        # Salta para a última semana da série que começa antes da janela
+        saltos = ((desde.date() - semana).days // 7) // intervalo
+        semana += timedelta(weeks=saltos * intervalo)
+    while True:
+        for dia in dias:
+            ocorrencia = datetime.combine(semana + timedelta(days=dia), inicio.time())
+            if ocorrencia >= inicio:
+                yield ocorrencia
+        semana += timedelta(weeks=intervalo)
+
+
+def _mensal(inicio: datetime, intervalo: int, desde: Optional[datetime]) -> Iterator[datetime]:
+    indice = 0
+    if desde is not None and desde > inicio:
+        meses = (desde.year - inicio.year) * 12 + desde.month - inicio.month
+        indice = meses // intervalo
+    while True:
+        meses = inicio.month - 1 + indice * intervalo
+        ano, mes = inicio.year + meses // 12, meses % 12 + 1
+        # Meses sem o dia (ex.: 31) não têm ocorrência, como no RRULE
+        if inicio.day <= calendar.monthrange(ano, mes)[1]:
+            yield inicio.replace(year=ano, month=mes)
+        indice += 1
+
+
+def expandir(regra, inicio: Optional[datetime], fim: datetime) -> List[datetime]:
+    """
+    Datas/horas das ocorrências da regra em [inicio, fim), sem as exceções
+    (inicio None = desde o começo da série).
+
+    Sem contagem a expansão salta direto para a janela, então o custo depende do
+    tamanho da janela e não do da série; com contagem é preciso contar desde a
+    primeira ocorrência (limitada pela própria contagem).
+    """
+    if regra.ate is not None:
+        fim = min(fim, datetime.combine(regra.ate + timedelta(days=1), time.min))
+    desde = None if regra.contagem else inicio
+    intervalo = regra.intervalo or 1
+    if regra.frequencia == "mensal":
+        gerador = _mensal(regra.inicio, intervalo, desde)
+    else:
+        gerador = _semanal(regra.inicio, intervalo, regra.dias_semana, desde)
+
+    excecoes = set(regra.excecoes or ())
+    ocorrencias = []
+    for numero, ocorrencia in enumerate(gerador, start=1):
+        if ocorrencia >= fim or numero > LIMITE_EXPANSAO:
+            break
+        if regra.contagem and numero > regra.contagem:
+            break
+        if (inicio is None or ocorrencia >= inicio) and ocorrencia.date() not in excecoes:
+            ocorrencias.append(ocorrencia)
+    return ocorrencias
+
+
+def ocorrencia_do_dia(regra, dia: date) -> Optional[datetime]:
+    """Data/hora da ocorrência da série no dia (None se a série não ocorre nele)"""
+    ocorrencias = expandir(regra, datetime.combine(dia, time.min), datetime.combine(dia + timedelta(days=1), time.min))
+    return ocorrencias[0] if ocorrencias else None
+
+
+def id_ocorrencia(regra_id: int, dia: date) -> str:
+    """Identificador estável de uma ocorrência não materializada (ex.: r12-2025-03-10)"""
+    return f"r{regra_id}-{dia.isoformat()}"
+
+
+def regras_na_janela(db, inicio: Optional[datetime], fim: datetime, *condicoes, com_participantes: bool = False):
+    """Séries que podem ter ocorrências em [inicio, fim)"""
+    regra = models.RecorrenciaAgendamento
+    consulta = select(regra).where(regra.inicio < fim, *condicoes)
+    if inicio is not None:
+        consulta = consulta.where(or_(regra.ate.is_(None), regra.ate >= inicio.date()))
+    if com_participantes:
+        consulta = consulta.options(carregamento.participantes_da_recorrencia())
+    return db.execute(consulta).scalars().all()
+
+
+def dias_materializados(db, regras_ids: List[int], inicio: Optional[datetime], fim: datetime) -> Set[Tuple[int, date]]:
+    """(recorrencia_id, ocorrencia_dia) das ocorrências que já viraram agendamentos"""
+    agendamento = models.Agendamento
+    consulta = select(agendamento.recorrencia_id, agendamento.ocorrencia_dia).where(
+        agendamento.recorrencia_id.in_(regras_ids),
+        agendamento.ocorrencia_dia <= fim.date(),
+    )
+    if inicio is not None:
+        consulta = consulta.where(agendamento.ocorrencia_dia >= inicio.date())
+    return {(linha.recorrencia_id, linha.ocorrencia_dia) for linha in db.execute(consulta).all()}
+
+
+def ocorrencias_virtuais(db, inicio: Optional[datetime], fim: datetime, *condicoes, com_participantes: bool = False) -> List[Ocorrencia]:
+    """
+    Ocorrências não materializadas das séries em [inicio, fim), ordenadas por
+    data_hora. `condicoes` filtram as regras (colunas de RecorrenciaAgendamento).
+
+    Recebe a Session síncrona; nas rotas assíncronas use `await db.run_sync(...)`.
+    """
+    regras = regras_na_janela(db, inicio, fim, *condicoes, com_participantes=com_participantes)
+    if not regras:
+        return []
+    materializados = dias_materializados(db, [regra.id for regra in regras], inicio, fim)
+
+    ocorrencias = [
+        Ocorrencia(regra, data_hora)
+        for regra in regras
+        for data_hora in expandir(regra, inicio, fim)
+        if (regra.id, data_hora.date()) not in materializados
+    ]
+    ocorrencias.sort(key=lambda ocorrencia: (ocorrencia.data_hora, ocorrencia.regra.id))
+    return ocorrencias
+
+
+def condicoes_regra(filtro: str, filtros=None) -> Optional[List[Any]]:
+    """
+    Critérios da listagem traduzidos para as colunas da regra. None quando nenhuma
+    ocorrência virtual pode atender (elas nunca estão concluídas).
+    """
+    regra = models.RecorrenciaAgendamento
+    condicoes = []
+    if filtro == "concluido":
+        return None
+    if filtro in ("reuniao", "consulta", "evento"):
+        condicoes.append(regra.tipo_sessao == filtro)
+    elif filtro in ("agendado", "confirmado", "realizado", "cancelado"):
+        condicoes.append(regra.status == filtro)
+
+    if filtros is not None:
+        if filtros.concluido:
+            return None
+        if filtros.status:
+            condicoes.append(regra.status.in_(filtros.status))
+        if filtros.tipo_sessao:
+            condicoes.append(regra.tipo_sessao.in_(filtros.tipo_sessao))
+        if filtros.profissional_responsavel_id is not None:
+            condicoes.append(regra.profissional_responsavel_id == filtros.profissional_responsavel_id)
+        if filtros.participante_id is not None:
+            participacoes = models.recorrencia_participantes.c
+            condicoes.append(
+                exists()
+                .where(participacoes.recorrencia_id == regra.id)
+                .where(participacoes.participante_id == filtros.participante_id)
+            )
+        if filtros.valor_min is not None:
+            condicoes.append(regra.valor >= filtros.valor_min)
+        if filtros.valor_max is not None:
+            condicoes.append(regra.valor <= filtros.valor_max)
+        if filtros.participantes_min is not None or filtros.participantes_max is not None:
+            participacoes = models.recorrencia_participantes.c
+            quantidade = (
+                select(func.count())
+                .where(participacoes.recorrencia_id == regra.id)
+                .correlate(regra)
+                .scalar_subquery()
+            )
+            if filtros.participantes_min is not None:
+                condicoes.append(quantidade >= filtros.participantes_min)
+            if filtros.participantes_max is not None:
+                condicoes.append(quantidade <= filtros.participantes_max)
+    return condicoes
+
+
+def ocorrencia_como_dict(ocorrencia: Ocorrencia) -> Dict[str, Any]:
+    """Ocorrência no mesmo formato dos itens da listagem de agendamentos"""
+    regra = ocorrencia.regra
+    participantes = [
+        {"id": p.id, "nome": p.nome, "email": p.email, "telefone": p.telefone}
+        for p in regra.participantes
+    ]
+    dia = ocorrencia.data_hora.date()
+    return {
+        "id": id_ocorrencia(regra.id, dia),
+        "titulo": regra.titulo,
+        "data_hora": ocorrencia.data_hora.isoformat(),
+        "tipo_sessao": regra.tipo_sessao,
+        "status": regra.status,
+        "observacoes": regra.observacoes,
+        "duracao_em_minutos": regra.duracao_em_minutos,
+        "local": regra.local,
+        "valor": regra.valor,
+        "concluido": False,
+        "participantes": participantes,
+        "data_criacao": regra.data_criacao.isoformat() if regra.data_criacao else None,
+        "data_atualizacao": regra.data_atualizacao.isoformat() if regra.data_atualizacao else None,
+        "participantes_count": len(participantes),
+        "duracao_formatada": models.formatar_duracao(regra.duracao_em_minutos),
+        "status_cor": models.cor_do_status(regra.status),
+        "recorrencia_id": regra.id,
+        "ocorrencia_dia": dia.isoformat(),
+        "ocorrencia_virtual": True,
+    }
+
+
+def descrever_regra(regra) -> str:
+    """Texto curto da regra para e-mails (ex.: "Toda semana (seg, qua), até 30/06/2025")"""
+    intervalo = regra.intervalo or 1
+    if regra.frequencia == "mensal":
+        texto = "Todo mês" if intervalo == 1 else f"A cada {intervalo} meses"
+        texto += f" no dia {regra.inicio.day}"
+    else:
+        texto = "Toda semana" if intervalo == 1 else f"A cada {intervalo} semanas"
+        dias = sorted(set(regra.dias_semana)) if regra.dias_semana else [regra.inicio.weekday()]
+        texto += f" ({', '.join(NOMES_DIAS[dia] for dia in dias)})"
+    texto += f" às {regra.inicio.strftime('%H:%M')}"
+    if regra.ate:
+        texto += f", até {regra.ate.strftime('%d/%m/%Y')}"
+    elif regra.contagem:
+        texto += f", {regra.contagem} vezes"
+    return texto
+
+
+def adicionar_excecao(db, regra_id: int, dia: date) -> None:
+    """Retira o dia da série (sem reescrever a lista inteira nem repetir o dia)"""
+    regra = models.RecorrenciaAgendamento
+    db.execute(
+        update(regra)
+        .where(regra.id == regra_id, ~regra.excecoes.any(dia))
+        .values(excecoes=func.array_append(regra.excecoes, dia))
+    )
+
+
+def adicionar_excecoes(db, dias_por_regra: Dict[int, List[date]]) -> None:
+    """adicionar_excecao para várias séries de uma vez (um UPDATE executado em lote)"""
+    if not dias_por_regra:
+        return
+    db.execute(
+        text(
+            "UPDATE recorrencias_agendamento "
+            "SET excecoes = ARRAY(SELECT DISTINCT dia FROM unnest(excecoes || CAST(:dias AS date[])) AS dia ORDER BY dia) "
+            "WHERE id = :regra_id"
+        ),
+        [{"regra_id": regra_id, "dias": sorted(set(dias))} for regra_id, dias in dias_por_regra.items()],
+    )
+
+
+def materializar_ocorrencia(db, regra, dia: date, data_hora: datetime) -> models.Agendamento:
+    """
+    Grava a ocorrência do dia como agendamento, com os campos e participantes da
+    regra (a regra deve vir com os participantes carregados). Não faz commit.
+    """
+    agendamento = models.Agendamento(
+        titulo=regra.titulo,
+        usuario_id=regra.usuario_id,
+        data_hora=data_hora,
+        tipo_sessao=regra.tipo_sessao,
+        status=regra.status,
+        observacoes=regra.observacoes,
+        duracao_em_minutos=regra.duracao_em_minutos,
+        local=regra.local,
+        valor=regra.valor,
+        concluido=False,
+        profissional_responsavel_id=regra.profissional_responsavel_id,
+        recorrencia_id=regra.id,
+        ocorrencia_dia=dia,
+    )
+    agendamento.definir_participantes(regra.participantes)
+    db.add(agendamento)
+    return agendamento
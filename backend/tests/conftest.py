@@ -0,0 +1,97 @@
+"""
+Fixtures dos testes que usam o banco do .env pelas rotas: cada teste roda em
+uma transação desfeita no final e é pulado quando o banco não está disponível.
+"""
+import os
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Os testes nunca migram o banco do .env: isso é passo do deploy
+os.environ["MIGRAR_NA_INICIALIZACAO"] = "false"
+
+from backend.database import models
+from backend.database.database import SessaoSincronaAdaptada, engine, get_db
+
+
+class ContadorConsultas:
+    """Conta os comandos enviados ao banco pela conexão do teste (sem os savepoints do próprio teste)"""
+
+    def __init__(self, conexao):
+        self.comandos = []
+        event.listen(conexao, "before_cursor_execute", self._registrar)
+
+    def _registrar(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+            self.comandos.append(statement)
+
+    def medir(self, chamada):
+        self.comandos.clear()
+        resposta = chamada()
+        assert resposta.status_code == 200, resposta.text
+        return len(self.comandos)
+
+
+@pytest.fixture
+def ambiente():
+    pytest.importorskip("httpx")
+    try:
+        conexao = engine.connect()
+    except Exception as e:
+        pytest.skip(f"Banco indisponível: {e}")
+
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+    from backend.utils.cache import cache_respostas
+
+    transacao = conexao.begin()
+    # Os commits das rotas viram savepoints da transação externa
+    sessao = Session(bind=conexao, join_transaction_mode="create_savepoint", autoflush=False, expire_on_commit=False)
+
+    async def db_do_teste():
+        yield SessaoSincronaAdaptada(sessao)
+
+    app.dependency_overrides[get_db] = db_do_teste
+    try:
+        yield TestClient(app), sessao, ContadorConsultas(conexao), cache_respostas
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        cache_respostas.invalidar("agendamentos")
+        sessao.close()
+        transacao.rollback()
+        conexao.close()
+
+
+def criar_cadastros(sessao, quantidade):
+    sufixo = uuid4().hex[:8]
+    cadastros = [
+        models.Cadastro(nome=f"Pessoa {i}", email=f"consultas-{sufixo}-{i}@exemplo.com", telefone="11999990000")
+        for i in range(quantidade)
+    ]
+    sessao.add_all(cadastros)
+    sessao.flush()
+    return cadastros
+
+
+def criar_agendamento(sessao, dono, participantes, data_hora):
+    agendamento = models.Agendamento(
+        titulo="Contagem de consultas", usuario_id=dono.id, data_hora=data_hora,
+        tipo_sessao="reuniao", status="agendado", duracao_em_minutos=30, participantes=participantes,
+    )
+    sessao.add(agendamento)
+    sessao.flush()
+    return agendamento
+
+
+def criar_serie(sessao, dono, inicio, **campos):
+    serie = models.RecorrenciaAgendamento(
+        titulo="Série de teste", usuario_id=dono.id, inicio=inicio, frequencia="semanal",
+        intervalo=1, dias_semana=[], excecoes=[], tipo_sessao="reuniao", status="agendado",
+        duracao_em_minutos=60, **campos,
+    )
+    sessao.add(serie)
+    sessao.flush()
+    return serie
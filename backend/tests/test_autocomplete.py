@@ -0,0 +1,107 @@
+"""
+Índice de prefixos do autocomplete de cadastros, sem banco:
+    python -m pytest backend/tests/test_autocomplete.py
+"""
+import asyncio
+import random
+
+from backend.services.autocomplete_service import AutocompleteCadastros, IndicePrefixos
+from backend.utils.cache import cache_respostas
+
+CADASTROS = [
+    (1, "João Silva", "joao@exemplo.com"),
+    (2, "Maria Silva Souza", "maria@exemplo.com"),
+    (3, "Ana Beatriz", None),
+    (4, "Silvana Costa", "silvana@exemplo.com"),
+]
+
+
+def ids(resultados):
+    return [resultado["id"] for resultado in resultados]
+
+
+def test_busca_por_prefixo_do_nome_sobrenome_e_email():
+    indice = IndicePrefixos(CADASTROS)
+
+    assert ids(indice.buscar("joa", 10)) == [1]
+    # Sem acento e sem diferenciar maiúsculas, como no banco
+    assert ids(indice.buscar("  JOÃO ", 10)) == [1]
+    assert sorted(ids(indice.buscar("silva", 10))) == [1, 2, 4]
+    assert ids(indice.buscar("maria@", 10)) == [2]
+    assert indice.buscar("zzz", 10) == []
+
+
+def test_busca_respeita_o_limite_sem_repetir_cadastros():
+    indice = IndicePrefixos([(1, "Silva Silva Silva", "silva@exemplo.com"), (2, "Silvia", None)])
+
+    assert ids(indice.buscar("silv", 10)) == [1, 2]
+    assert len(indice.buscar("silv", 1)) == 1
+
+
+def test_atualizar_e_remover_equivalem_a_reconstruir():
+    indice = IndicePrefixos(CADASTROS)
+    atuais = {cadastro_id: (nome, email) for cadastro_id, nome, email in CADASTROS}
+    sorteio = random.Random(7)
+    nomes = ["Ana", "Bruno Silva", "Carla Souza Lima", "Silva Silva", "Érico"]
+
+    for passo in range(200):
+        cadastro_id = sorteio.randint(1, 12)
+        if sorteio.random() < 0.3:
+            indice.remover(cadastro_id)
+            atuais.pop(cadastro_id, None)
+        else:
+            dados = (sorteio.choice(nomes), sorteio.choice([None, f"p{passo}@exemplo.com"]))
+            indice.atualizar(cadastro_id, *dados)
+            atuais[cadastro_id] = dados
+
+    reconstruido = IndicePrefixos((cadastro_id, *dados) for cadastro_id, dados in atuais.items())
+    assert (indice.chaves, indice.ids, indice.cadastros) == (reconstruido.chaves, reconstruido.ids, reconstruido.cadastros)
+
+
+def test_remover_cadastro_ausente_nao_altera_o_indice():
+    indice = IndicePrefixos(CADASTROS)
+    antes = (list(indice.chaves), list(indice.ids))
+
+    indice.remover(99)
+
+    assert (indice.chaves, indice.ids) == antes
+
+
+def autocomplete_com_indice(monkeypatch):
+    """Índice já carregado na versão atual; as reconstruções agendadas são só anotadas"""
+    autocomplete = AutocompleteCadastros()
+    agendadas = []
+    monkeypatch.setattr(autocomplete, "_agendar_reconstrucao", agendadas.append)
+    autocomplete.indice = IndicePrefixos(CADASTROS)
+    autocomplete.versao = cache_respostas.versao("cadastros")
+    return autocomplete, agendadas
+
+
+def escrever_pela_rota(autocomplete, cadastro_id, nome):
+    versao_anterior = cache_respostas.versao("cadastros")
+    versoes = cache_respostas.invalidar("cadastros")
+    autocomplete.atualizar(cadastro_id, nome, None, versao_anterior, versoes["cadastros"])
+
+
+def test_escrita_local_avanca_a_versao_sem_reconstruir(monkeypatch):
+    autocomplete, agendadas = autocomplete_com_indice(monkeypatch)
+
+    escrever_pela_rota(autocomplete, 5, "Zeca Pagodinho")
+
+    assert ids(asyncio.run(autocomplete.buscar("zec", 10))) == [5]
+    assert agendadas == []
+
+    # Importação em massa ou escrita de outro worker: a versão muda sem passar pelo índice
+    cache_respostas.invalidar("cadastros")
+    asyncio.run(autocomplete.buscar("zec", 10))
+    assert agendadas == [cache_respostas.versao("cadastros")]
+
+
+def test_escrita_local_depois_de_uma_externa_mantem_a_reconstrucao(monkeypatch):
+    autocomplete, agendadas = autocomplete_com_indice(monkeypatch)
+
+    cache_respostas.invalidar("cadastros")
+    escrever_pela_rota(autocomplete, 5, "Zeca Pagodinho")
+    asyncio.run(autocomplete.buscar("zec", 10))
+
+    assert agendadas == [cache_respostas.versao("cadastros")]
@@ -0,0 +1,134 @@
+"""
+Cache de respostas: backends em memória e Redis (com um cliente falso), sem banco:
+    python -m pytest backend/tests/test_cache.py
+"""
+from types import SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+
+from backend.utils import cache
+from backend.utils.cache import CacheMemoria, CacheRedis, CacheRespostas
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def monotonic(self):
+        return self.agora
+
+
+class ClienteRedisFalso:
+    """Só o que CacheRedis usa do cliente redis: get/set(ex=)/delete, com valores em bytes"""
+
+    def __init__(self, relogio):
+        self.relogio = relogio
+        self.itens = {}
+        self.expiracoes = {}
+
+    def get(self, chave):
+        expira_em = self.expiracoes.get(chave)
+        if expira_em is not None and expira_em <= self.relogio.agora:
+            self.delete(chave)
+        return self.itens.get(chave)
+
+    def set(self, chave, valor, ex=None):
+        self.itens[chave] = valor.encode("utf-8") if isinstance(valor, str) else valor
+        if ex is None:
+            self.expiracoes.pop(chave, None)
+        else:
+            self.expiracoes[chave] = self.relogio.agora + ex
+
+    def delete(self, chave):
+        self.itens.pop(chave, None)
+        self.expiracoes.pop(chave, None)
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=relogio.monotonic))
+    return relogio
+
+
+def requisicao(caminho, parametros=b""):
+    return Request({"type": "http", "method": "GET", "path": caminho, "query_string": parametros, "headers": []})
+
+
+def test_redis_falso_get_set_ex_delete(relogio):
+    cliente = ClienteRedisFalso(relogio)
+    backend = CacheRedis(cliente)
+
+    backend.definir("a", "1", ttl=0.2)
+    backend.definir("b", "2")
+    # TTL fracionário vira segundos inteiros (mínimo 1), como o EX do Redis
+    assert cliente.expiracoes == {"a": relogio.agora + 1}
+    assert (backend.obter("a"), backend.obter("b")) == ("1", "2")
+
+    relogio.agora += 1
+    assert backend.obter("a") is None
+    backend.apagar("b")
+    assert backend.obter("b") is None
+
+
+def test_redis_compartilha_versoes_entre_processos(relogio):
+    cliente = ClienteRedisFalso(relogio)
+    um, outro = CacheRespostas(CacheRedis(cliente)), CacheRespostas(CacheRedis(cliente))
+    chave = um.chave("cadastros", requisicao("/api/cadastros/"))
+
+    um.definir(chave, {"total": 1})
+    assert outro.obter(chave) == {"total": 1}
+
+    outro.invalidar("cadastros")
+    assert um.chave("cadastros", requisicao("/api/cadastros/")) != chave
+
+
+def test_memoria_expira_pelo_ttl(relogio):
+    backend = CacheMemoria()
+    backend.definir("a", "1", ttl=30)
+    backend.definir("b", "2")
+
+    relogio.agora += 29.9
+    assert backend.obter("a") == "1"
+    relogio.agora += 0.1
+    assert backend.obter("a") is None
+    assert backend.obter("b") == "2"
+
+
+def test_memoria_descarta_o_menos_usado(relogio):
+    backend = CacheMemoria(max_itens=2)
+    backend.definir("a", "1")
+    backend.definir("b", "2")
+    backend.obter("a")
+    backend.definir("c", "3")
+
+    assert (backend.obter("a"), backend.obter("b"), backend.obter("c")) == ("1", None, "3")
+
+
+def test_chave_normaliza_os_parametros(relogio):
+    respostas = CacheRespostas(CacheMemoria())
+
+    chave = respostas.chave("agendamentos", requisicao("/api/agendamentos/", b"status=agendado&limit=10&tag=b&tag=a"))
+
+    assert chave == respostas.chave("agendamentos", requisicao("/api/agendamentos/", b"tag=a&limit=10&tag=b&status=agendado"))
+    assert chave != respostas.chave("agendamentos", requisicao("/api/agendamentos/", b"status=agendado&limit=20&tag=b&tag=a"))
+    assert chave != respostas.chave("agendamentos", requisicao("/api/agendamentos/calendario", b"status=agendado&limit=10&tag=b&tag=a"))
+    assert chave != respostas.chave("cadastros", requisicao("/api/agendamentos/", b"status=agendado&limit=10&tag=b&tag=a"))
+
+
+def test_invalidar_propaga_para_os_dependentes(relogio):
+    respostas = CacheRespostas(CacheMemoria())
+    antes = {namespace: respostas.versao(namespace) for namespace in cache.DEPENDENCIAS}
+
+    versoes = respostas.invalidar("cadastros")
+
+    assert set(versoes) == {"cadastros", "agendamentos", "dashboard"}
+    depois = {namespace: respostas.versao(namespace) for namespace in cache.DEPENDENCIAS}
+    assert {namespace for namespace in antes if antes[namespace] != depois[namespace]} == set(versoes)
+    assert depois["funcionarios"] == antes["funcionarios"]
+
+    chave = respostas.chave("dashboard", requisicao("/api/dashboard/summary"))
+    respostas.definir(chave, {"cadastros": 1})
+    respostas.invalidar("agendamentos")
+    assert respostas.obter(respostas.chave("dashboard", requisicao("/api/dashboard/summary"))) is None
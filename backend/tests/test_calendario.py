@@ -0,0 +1,67 @@
+"""
+Calendário de agendamentos com o banco do .env (transação desfeita no final):
+    python -m pytest backend/tests/test_calendario.py
+"""
+from datetime import date, datetime, timedelta
+
+from backend.routers import agendamento as rotas_agendamento
+from backend.services.agendamento_service import periodos_referencia
+from backend.services.recorrencia_service import id_ocorrencia
+from backend.tests.conftest import criar_agendamento, criar_cadastros, criar_serie
+
+
+def test_dias_em_colunas_com_ocorrencias_intercaladas(ambiente):
+    client, sessao, _, _ = ambiente
+    dono, outro = criar_cadastros(sessao, 2)
+    cedo = criar_agendamento(sessao, dono, [], datetime(2031, 8, 4, 10))
+    tarde = criar_agendamento(sessao, dono, [dono, outro], datetime(2031, 8, 4, 14))
+    quarta = criar_agendamento(sessao, dono, [dono], datetime(2031, 8, 6, 9))
+    tarde.definir_resumo_participantes([dono, outro])
+    # Semanal às segundas, 12h: uma ocorrência na semana, entre os dois gravados de 4/8
+    serie = criar_serie(sessao, dono, datetime(2031, 8, 4, 12))
+    serie.participantes = [dono, outro]
+    sessao.flush()
+
+    resposta = client.get("/api/agendamentos/calendario?inicio=2031-08-04&fim=2031-08-10")
+
+    assert resposta.status_code == 200, resposta.text
+    calendario = resposta.json()
+    assert calendario["total"] == 4
+    assert set(calendario["dias"]) == {"2031-08-04", "2031-08-06"}
+    segunda = calendario["dias"]["2031-08-04"]
+    assert segunda["id"] == [cedo.id, id_ocorrencia(serie.id, date(2031, 8, 4)), tarde.id]
+    assert segunda["data_hora"] == ["2031-08-04T10:00:00", "2031-08-04T12:00:00", "2031-08-04T14:00:00"]
+    assert segunda["participantes"] == [0, 2, 2]
+    assert segunda["duracao"] == [30, 60, 30]
+    # Colunas paralelas: todas com uma posição por agendamento
+    assert {len(coluna) for coluna in segunda.values()} == {3}
+    assert calendario["dias"]["2031-08-06"]["id"] == [quarta.id]
+
+
+def test_limites_do_intervalo(ambiente):
+    client, _, _, _ = ambiente
+    inicio = date(2031, 9, 1)
+    maximo = rotas_agendamento.CALENDARIO_MAX_DIAS
+
+    def calendario(fim):
+        return client.get(f"/api/agendamentos/calendario?inicio={inicio.isoformat()}&fim={fim.isoformat()}")
+
+    assert calendario(inicio + timedelta(days=maximo - 1)).status_code == 200
+    acima = calendario(inicio + timedelta(days=maximo))
+    assert acima.status_code == 400 and str(maximo) in acima.json()["detail"]
+    assert calendario(inicio - timedelta(days=1)).status_code == 400
+
+
+def test_semana_refaz_o_cache_da_semana_anterior(ambiente, monkeypatch):
+    client, _, _, _ = ambiente
+    atual = periodos_referencia()["inicio_semana"].date()
+    anterior = atual - timedelta(days=7)
+
+    # Resposta guardada no sábado passado; a chave do cache é a mesma nesta semana
+    monkeypatch.setattr(rotas_agendamento, "periodos_referencia", lambda: periodos_referencia(anterior + timedelta(days=6)))
+    assert client.get("/api/agendamentos/calendario/semana").json()["inicio"] == anterior.isoformat()
+    monkeypatch.setattr(rotas_agendamento, "periodos_referencia", periodos_referencia)
+
+    semana = client.get("/api/agendamentos/calendario/semana").json()
+
+    assert (semana["inicio"], semana["fim"]) == (atual.isoformat(), (atual + timedelta(days=6)).isoformat())
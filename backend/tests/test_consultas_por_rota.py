@@ -0,0 +1,77 @@
+"""
+Número de comandos SQL por rota: não pode crescer com o número de linhas da
+página nem com o de participantes (sem N+1, ver backend/database/carregamento.py).
+
+Requer o banco do .env com as migrações aplicadas; tudo roda dentro de uma
+transação desfeita no final (fixture ambiente, em conftest.py):
+    python -m pytest backend/tests/test_consultas_por_rota.py
+"""
+from datetime import datetime, timedelta
+
+from backend.database import models
+from backend.tests.conftest import criar_agendamento, criar_cadastros
+
+
+def test_listagem_nao_depende_do_tamanho_da_pagina(ambiente):
+    client, sessao, contador, cache = ambiente
+    pessoas = criar_cadastros(sessao, 5)
+    inicio = datetime(2031, 3, 3, 8)
+    for i in range(12):
+        criar_agendamento(sessao, pessoas[0], pessoas[: 1 + i % 5], inicio + timedelta(hours=i))
+
+    def listar(limit):
+        cache.invalidar("agendamentos")
+        return client.get(f"/api/agendamentos/?participante_id={pessoas[0].id}&limit={limit}")
+
+    assert len(listar(10).json()["agendamentos"]) == 10
+    assert contador.medir(lambda: listar(2)) == contador.medir(lambda: listar(10))
+
+
+def test_detalhe_e_edicao_nao_dependem_dos_participantes(ambiente):
+    client, sessao, contador, _ = ambiente
+    pessoas = criar_cadastros(sessao, 12)
+    um = criar_agendamento(sessao, pessoas[0], pessoas[:1], datetime(2031, 3, 10, 8))
+    oito = criar_agendamento(sessao, pessoas[0], pessoas[:8], datetime(2031, 3, 11, 8))
+    ids = [pessoa.id for pessoa in pessoas]
+    sessao.expunge_all()
+
+    assert contador.medir(lambda: client.get(f"/api/agendamentos/{um.id}")) == \
+        contador.medir(lambda: client.get(f"/api/agendamentos/{oito.id}"))
+
+    # Troca de participantes nos dois casos (um removido/um incluído contra quatro/quatro)
+    sessao.expunge_all()
+    edicao_pequena = contador.medir(lambda: client.put(f"/api/agendamentos/{um.id}", json={"participantes_ids": ids[1:2]}))
+    sessao.expunge_all()
+    resposta = client.put(f"/api/agendamentos/{oito.id}", json={"participantes_ids": ids[4:]})
+    assert sorted(p["id"] for p in resposta.json()["participantes"]) == ids[4:]
+    sessao.expunge_all()
+    edicao_grande = contador.medir(lambda: client.put(f"/api/agendamentos/{oito.id}", json={"participantes_ids": ids[:4] + ids[8:]}))
+    assert edicao_pequena == edicao_grande
+
+
+def test_criacao_nao_depende_dos_participantes(ambiente):
+    client, sessao, contador, _ = ambiente
+    pessoas = criar_cadastros(sessao, 8)
+    ids = [pessoa.id for pessoa in pessoas]
+    sessao.expunge_all()
+
+    def criar(participantes_ids, dia):
+        return client.post("/api/agendamentos/", json={
+            "titulo": "Contagem de consultas", "data": f"2031-04-{dia:02d}", "hora": "08:00",
+            "tipo_sessao": "reuniao", "participantes_ids": participantes_ids,
+        })
+
+    contador.comandos.clear()
+    resposta = criar(ids[:1], 1)
+    assert resposta.status_code == 201, resposta.text
+    com_um = len(contador.comandos)
+    contador.comandos.clear()
+    resposta = criar(ids + [0], 2)
+    assert resposta.status_code == 201, resposta.text
+    assert len(contador.comandos) == com_um
+
+    # Associações, contagem e resumo gravados sem passar pelo relacionamento
+    agendamento = sessao.get(models.Agendamento, resposta.json()["id"])
+    assert sorted(p.id for p in agendamento.participantes) == ids
+    assert agendamento.participantes_count == 8
+    assert [p["id"] for p in agendamento.participantes_resumo] == ids[:models.PARTICIPANTES_NO_RESUMO]
@@ -0,0 +1,45 @@
+"""
+Estratégia "cache" da contagem das listagens, sem banco:
+    python -m pytest backend/tests/test_contagem.py
+"""
+from backend.database import models
+from backend.utils import contagem
+from backend.utils.cache import CacheMemoria, cache_respostas
+
+
+class SessaoContando:
+    """Responde ao COUNT com um total fixo e conta as consultas"""
+
+    def __init__(self, total):
+        self.total = total
+        self.consultas = 0
+
+    def execute(self, consulta):
+        self.consultas += 1
+        return self
+
+    def scalar(self):
+        return self.total
+
+
+def test_contagem_em_cache_ate_a_proxima_escrita(monkeypatch):
+    monkeypatch.setattr(contagem, "_contagens_em_cache", CacheMemoria(max_itens=10))
+    db = SessaoContando(42)
+
+    assert contagem.contar_total(db, None, models.Cadastro, "ana", contagem.CONTAGEM_CACHE) == (42, "exata")
+    assert contagem.contar_total(db, None, models.Cadastro, "ana", contagem.CONTAGEM_CACHE) == (42, "cache")
+    assert db.consultas == 1
+
+    cache_respostas.invalidar("cadastros")
+    db.total = 43
+    assert contagem.contar_total(db, None, models.Cadastro, "ana", contagem.CONTAGEM_CACHE) == (43, "exata")
+
+
+def test_contagem_em_cache_limitada(monkeypatch):
+    monkeypatch.setattr(contagem, "_contagens_em_cache", CacheMemoria(max_itens=3))
+    db = SessaoContando(1)
+
+    for i in range(10):
+        contagem.contar_total(db, None, models.Cadastro, f"filtro {i}", contagem.CONTAGEM_CACHE)
+
+    assert len(contagem._contagens_em_cache._itens) == 3
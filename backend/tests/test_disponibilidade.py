@@ -0,0 +1,135 @@
+"""
+Sobreposição de horários: mesclagem e lacunas do expediente (sem banco) e os
+409 das rotas de agendamento, com o banco do .env (transação desfeita no final):
+    python -m pytest backend/tests/test_disponibilidade.py
+"""
+from datetime import date, datetime, time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from backend.database import models
+from backend.routers.agendamento import erro_sobreposicao
+from backend.services import disponibilidade_service
+from backend.services.disponibilidade_service import horarios_livres, mesclar_intervalos
+from backend.tests.conftest import criar_agendamento, criar_cadastros
+
+
+def h(dia, hora, minuto=0):
+    return datetime(2031, 5, dia, hora, minuto)
+
+
+def test_mesclar_une_sobrepostos_e_encostados():
+    intervalos = [(h(1, 13), h(1, 14)), (h(1, 9), h(1, 10)), (h(1, 10), h(1, 11)), (h(1, 9, 30), h(1, 9, 45))]
+
+    assert mesclar_intervalos(intervalos) == [(h(1, 9), h(1, 11)), (h(1, 13), h(1, 14))]
+    assert mesclar_intervalos([]) == []
+
+
+def test_livres_entre_os_ocupados_do_expediente():
+    ocupados = [(h(1, 7), h(1, 9)), (h(1, 12), h(1, 13)), (h(1, 17, 30), h(1, 19))]
+
+    assert horarios_livres(ocupados, date(2031, 5, 1), date(2031, 5, 1), time(8), time(18), 60) == [
+        (h(1, 9), h(1, 12)), (h(1, 13), h(1, 17, 30)),
+    ]
+
+
+def test_ocupado_que_atravessa_a_meia_noite():
+    ocupados = [(h(1, 17), h(3, 9))]
+
+    assert horarios_livres(ocupados, date(2031, 5, 1), date(2031, 5, 3), time(8), time(18), 60) == [
+        (h(1, 8), h(1, 17)), (h(3, 9), h(3, 18)),
+    ]
+
+
+def test_expediente_vazio_ou_invertido_nao_tem_horarios():
+    for expediente_inicio, expediente_fim in ((time(18), time(8)), (time(9), time(9))):
+        assert horarios_livres([], date(2031, 5, 1), date(2031, 5, 7), expediente_inicio, expediente_fim, 5) == []
+
+
+def test_duracao_minima_no_limite():
+    ocupados = [(h(1, 9), h(1, 10)), (h(1, 11), h(1, 12))]
+    dia = date(2031, 5, 1)
+
+    # Lacuna de exatamente 60 minutos entra; de 61, não
+    assert (h(1, 10), h(1, 11)) in horarios_livres(ocupados, dia, dia, time(9), time(12), 60)
+    assert horarios_livres(ocupados, dia, dia, time(9), time(12), 61) == []
+
+
+def test_erro_sobreposicao_so_mapeia_a_restricao_do_profissional():
+    violacao = IntegrityError("INSERT", {}, Exception(
+        'conflicting key value violates exclusion constraint "agendamentos_profissional_sem_sobreposicao"'
+    ))
+    outra = IntegrityError("INSERT", {}, Exception('insert or update on table "agendamentos" violates foreign key constraint'))
+
+    assert erro_sobreposicao(violacao).status_code == 409
+    assert erro_sobreposicao(outra).status_code == 400
+
+
+def criar_profissional(sessao, sufixo):
+    profissional = models.Funcionario(nome="Profissional", email=f"prof-{sufixo}@exemplo.com")
+    sessao.add(profissional)
+    sessao.flush()
+    return profissional
+
+
+def novo_agendamento(client, **campos):
+    corpo = {"titulo": "Novo", "data": "2031-05-05", "hora": "09:15", "duracao_em_minutos": 30, **campos}
+    return client.post("/api/agendamentos/", json=corpo)
+
+
+def test_sobreposicao_do_profissional_devolve_409(ambiente):
+    client, sessao, _, _ = ambiente
+    dono, = criar_cadastros(sessao, 1)
+    profissional = criar_profissional(sessao, dono.id)
+    existente = criar_agendamento(sessao, dono, [], h(5, 9))
+    existente.profissional_responsavel_id = profissional.id
+    sessao.flush()
+
+    # Nem permitir_conflito libera o profissional
+    resposta = novo_agendamento(client, profissional_responsavel_id=profissional.id, permitir_conflito=True)
+
+    assert resposta.status_code == 409, resposta.text
+    conflito, = resposta.json()["detail"]["conflitos"]
+    assert (conflito["agendamento_id"], conflito["papel"]) == (existente.id, "profissional")
+
+    # Encostados no início ou no fim do existente (09:00-09:30) não se sobrepõem
+    assert novo_agendamento(client, profissional_responsavel_id=profissional.id, hora="08:30").status_code == 201
+    assert novo_agendamento(client, profissional_responsavel_id=profissional.id, hora="09:30").status_code == 201
+
+
+def test_sobreposicao_de_participante_depende_de_permitir_conflito(ambiente):
+    client, sessao, _, _ = ambiente
+    dono, participante = criar_cadastros(sessao, 2)
+    existente = criar_agendamento(sessao, dono, [participante], h(5, 9))
+
+    bloqueado = novo_agendamento(client, participantes_ids=[participante.id])
+    assert bloqueado.status_code == 409, bloqueado.text
+    assert bloqueado.json()["detail"]["conflitos"][0]["papel"] == "participante"
+
+    permitido = novo_agendamento(client, participantes_ids=[participante.id], permitir_conflito=True)
+    assert permitido.status_code == 201, permitido.text
+    conflito, = permitido.json()["conflitos"]
+    assert (conflito["agendamento_id"], conflito["pessoa_id"]) == (existente.id, participante.id)
+
+
+def test_restricao_de_exclusao_vira_409(ambiente, monkeypatch):
+    client, sessao, _, _ = ambiente
+    existe = sessao.execute(text(
+        "SELECT 1 FROM pg_constraint WHERE conname = 'agendamentos_profissional_sem_sobreposicao'"
+    )).scalar()
+    if not existe:
+        pytest.skip("Restrição da migração 0005 não aplicada")
+    dono, = criar_cadastros(sessao, 1)
+    profissional = criar_profissional(sessao, dono.id)
+    existente = criar_agendamento(sessao, dono, [], h(5, 9))
+    existente.profissional_responsavel_id = profissional.id
+    sessao.flush()
+    # Gravação concorrente: a outra transação ainda não tinha confirmado na hora da checagem
+    monkeypatch.setattr(disponibilidade_service, "ocupacoes", lambda *args, **kwargs: [])
+
+    resposta = novo_agendamento(client, profissional_responsavel_id=profissional.id)
+
+    assert resposta.status_code == 409, resposta.text
+    assert resposta.json()["detail"]["conflitos"] == []
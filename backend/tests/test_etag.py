@@ -0,0 +1,66 @@
+"""
+ETags das rotas GET com o banco do .env (transação desfeita no final):
+    python -m pytest backend/tests/test_etag.py
+"""
+from datetime import datetime
+
+from backend.tests.conftest import criar_agendamento, criar_cadastros
+from backend.utils import etag
+
+
+def test_304_antes_da_consulta_das_linhas(ambiente):
+    client, sessao, contador, _ = ambiente
+    dono, = criar_cadastros(sessao, 1)
+    criar_agendamento(sessao, dono, [dono], datetime(2031, 7, 1, 8))
+    url = f"/api/agendamentos/?participante_id={dono.id}"
+
+    etag_atual = client.get(url).headers["ETag"]
+    contador.comandos.clear()
+    resposta = client.get(url, headers={"If-None-Match": etag_atual})
+
+    assert resposta.status_code == 304
+    assert resposta.headers["ETag"] == etag_atual
+    # Só o validador: max(data_atualizacao) e count(*) das tabelas de origem
+    assert len(contador.comandos) == 1
+    assert "max(" in contador.comandos[0] and "count(" in contador.comandos[0]
+
+
+def test_etag_acompanha_escritas_de_outros_processos(ambiente):
+    client, sessao, _, _ = ambiente
+    dono, = criar_cadastros(sessao, 1)
+    criar_agendamento(sessao, dono, [dono], datetime(2031, 7, 1, 8))
+    url = f"/api/agendamentos/?participante_id={dono.id}"
+
+    etag_antes = client.get(url).headers["ETag"]
+
+    # Escrita que não passa por esta API (outro worker, script): a versão do cache
+    # em memória não muda, mas o validador do banco sim, e o cache não é reaproveitado
+    criar_agendamento(sessao, dono, [dono], datetime(2031, 7, 2, 8))
+    resposta = client.get(url, headers={"If-None-Match": etag_antes})
+
+    assert resposta.status_code == 200
+    assert resposta.headers["ETag"] != etag_antes
+    assert len(resposta.json()["agendamentos"]) == 2
+
+
+def test_exclusao_troca_o_etag(ambiente):
+    client, sessao, _, _ = ambiente
+    dono, outro = criar_cadastros(sessao, 2)
+    url = f"/api/cadastros/{dono.id}"
+
+    etag_antes = client.get(url).headers["ETag"]
+    assert client.delete(f"/api/cadastros/{outro.id}").status_code == 200
+
+    assert client.get(url, headers={"If-None-Match": etag_antes}).status_code == 200
+
+
+def test_namespace_sem_tabelas_usa_o_hash_do_corpo(ambiente, monkeypatch):
+    client, _, _, _ = ambiente
+    monkeypatch.delitem(etag.TABELAS_ETAG, "dashboard")
+
+    primeira = client.get("/api/dashboard/summary")
+    assert primeira.status_code == 200
+    assert primeira.headers["ETag"] == etag.etag_do_corpo(primeira.content)
+
+    segunda = client.get("/api/dashboard/summary", headers={"If-None-Match": primeira.headers["ETag"]})
+    assert segunda.status_code == 304
@@ -0,0 +1,119 @@
+"""
+Leitura em streaming dos corpos CSV e NDJSON da importação de cadastros (sem
+banco) e gravação pelo POST /api/cadastros/bulk (pulada sem banco):
+    python -m pytest backend/tests/test_importacao.py
+"""
+import asyncio
+from datetime import date
+from uuid import uuid4
+
+import pytest
+
+from backend.database import models
+from backend.services import importacao_service
+
+
+async def _pedacos(conteudo: bytes, tamanho: int):
+    for inicio in range(0, len(conteudo), tamanho):
+        yield conteudo[inicio:inicio + tamanho]
+
+
+def ler(leitor, texto: str, tamanho: int = 7):
+    async def coletar():
+        return [registro async for registro in leitor(_pedacos(texto.encode("utf-8"), tamanho))]
+    return asyncio.run(coletar())
+
+
+@pytest.mark.parametrize("tamanho", [1, 7, 4096])
+def test_csv_com_quebra_de_linha_entre_aspas(tamanho):
+    texto = '﻿nome;email\r\n"Ana\nMaria";ana@exemplo.com\r\nBia;"bia@exemplo.com"\r\n'
+    assert ler(importacao_service.registros_csv, texto, tamanho) == [
+        (2, {"nome": "Ana\nMaria", "email": "ana@exemplo.com"}),
+        (4, {"nome": "Bia", "email": "bia@exemplo.com"}),
+    ]
+
+
+def test_csv_aspas_no_meio_do_campo_nao_juntam_linhas():
+    texto = 'nome,email,endereco\nO"Brien,o@exemplo.com,Rua 1\nAna,a@exemplo.com,"5\'10"" de altura"\nBia,b@exemplo.com,Rua 2\n'
+    assert ler(importacao_service.registros_csv, texto) == [
+        (2, {"nome": 'O"Brien', "email": "o@exemplo.com", "endereco": "Rua 1"}),
+        (3, {"nome": "Ana", "email": "a@exemplo.com", "endereco": "5'10\" de altura"}),
+        (4, {"nome": "Bia", "email": "b@exemplo.com", "endereco": "Rua 2"}),
+    ]
+
+
+def test_csv_aspas_nao_fechadas_rejeitam_so_o_registro(monkeypatch):
+    monkeypatch.setattr(importacao_service, "IMPORTACAO_REGISTRO_MAX", 40)
+    texto = "nome,email\n" + '"Ana,a@exemplo.com\n' + "x\n" * 30 + "Bia,b@exemplo.com\n"
+    registros = ler(importacao_service.registros_csv, texto)
+
+    assert registros[0][0] == 2 and "Aspas não fechadas" in registros[0][1]
+    assert registros[-1] == (33, {"nome": "Bia", "email": "b@exemplo.com"})
+
+
+def test_linha_longa_e_descartada_sem_perder_as_seguintes(monkeypatch):
+    monkeypatch.setattr(importacao_service, "IMPORTACAO_REGISTRO_MAX", 50)
+    texto = "nome,email\n" + "a" * 500 + "\nBia,b@exemplo.com\n"
+    registros = ler(importacao_service.registros_csv, texto)
+
+    assert registros == [
+        (2, "Linha com mais de 50 caracteres"),
+        (3, {"nome": "Bia", "email": "b@exemplo.com"}),
+    ]
+
+
+def test_csv_numero_de_colunas_errado():
+    registros = ler(importacao_service.registros_csv, "nome,email\nAna\n")
+    assert registros == [(2, "Esperadas 2 colunas, encontradas 1")]
+
+
+def test_ndjson_valida_cada_linha(monkeypatch):
+    monkeypatch.setattr(importacao_service, "IMPORTACAO_REGISTRO_MAX", 60)
+    texto = (
+        '{"nome": "Ana", "email": "a@exemplo.com"}\n'
+        "\n"
+        "{quebrado\n"
+        "[1, 2]\n"
+        + '{"nome": "' + "x" * 100 + '"}\n'
+        + '{"nome": "Bia", "email": "b@exemplo.com"}'
+    )
+    registros = ler(importacao_service.registros_ndjson, texto)
+
+    assert registros[0] == (1, {"nome": "Ana", "email": "a@exemplo.com"})
+    assert registros[1][0] == 3 and registros[1][1].startswith("JSON inválido")
+    assert registros[2] == (4, "Cada linha deve ser um objeto JSON")
+    assert registros[3] == (5, "Linha com mais de 60 caracteres")
+    assert registros[4] == (6, {"nome": "Bia", "email": "b@exemplo.com"})
+
+
+def test_atualizar_mantem_campos_opcionais_ausentes(ambiente):
+    client, sessao, _, _ = ambiente
+    sufixo = uuid4().hex[:8]
+    com_endereco = models.Cadastro(
+        nome="Ana", email=f"ana-{sufixo}@exemplo.com", telefone="11999990000",
+        data_nascimento=date(1990, 1, 2), endereco="Rua das Flores, 10",
+    )
+    em_branco = models.Cadastro(
+        nome="Bia", email=f"bia-{sufixo}@exemplo.com", telefone="11999990001",
+        data_nascimento=date(1991, 3, 4), endereco="Rua B, 20",
+    )
+    sessao.add_all([com_endereco, em_branco])
+    sessao.flush()
+
+    sem_coluna = f"nome,email,telefone,data_nascimento\nAna Souza,{com_endereco.email},11988880000,02/01/1990\n"
+    resposta = client.post("/api/cadastros/bulk?modo=atualizar", content=sem_coluna, headers={"Content-Type": "text/csv"})
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.json()["atualizados"] == 1
+
+    celula_vazia = (
+        "nome;email;telefone;data_nascimento;endereco\n"
+        f"Bia Lima;{em_branco.email};11988880001;04/03/1991;\n"
+        f"Ana Souza;{com_endereco.email};11988880000;02/01/1990;Rua Nova, 5\n"
+    )
+    resposta = client.post("/api/cadastros/bulk?modo=atualizar", content=celula_vazia, headers={"Content-Type": "text/csv"})
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.json()["atualizados"] == 2
+
+    sessao.expire_all()
+    assert (com_endereco.nome, com_endereco.telefone, com_endereco.endereco) == ("Ana Souza", "11988880000", "Rua Nova, 5")
+    assert (em_branco.nome, em_branco.endereco) == ("Bia Lima", "Rua B, 20")
@@ -0,0 +1,109 @@
+"""
+Confere com EXPLAIN que cada caminho de filtro da listagem de agendamentos
+pode ser servido pelos índices da migração 0003.
+
+Requer o banco do .env com as migrações aplicadas:
+    python -m pytest backend/tests/test_indices_agendamentos.py
+
+Com poucas linhas o planejador prefere varredura sequencial de qualquer forma,
+então cada consulta é explicada com enable_seqscan desligado: o teste verifica
+que existe um índice utilizável, não o plano escolhido para o volume atual.
+"""
+import json
+
+import pytest
+from sqlalchemy import select
+
+from backend.database import models
+from backend.database.database import SessionLocal
+from backend.routers.agendamento import condicao_filtro_agendamento, condicao_filtros_combinados
+from backend.schemas.agendamento import FiltrosAgendamento
+
+# filtro da listagem -> índice esperado no plano
+INDICES_POR_FILTRO = {
+    "todos": "ix_agendamentos_data_hora_id",
+    "hoje": "ix_agendamentos_data_hora_id",
+    "semana": "ix_agendamentos_data_hora_id",
+    "mes": "ix_agendamentos_data_hora_id",
+    "reuniao": "ix_agendamentos_tipo_sessao_data_hora",
+    "consulta": "ix_agendamentos_tipo_sessao_data_hora",
+    "agendado": "ix_agendamentos_status_data_hora",
+    "confirmado": "ix_agendamentos_status_data_hora",
+    "cancelado": "ix_agendamentos_status_data_hora",
+    "pendente": "ix_agendamentos_pendentes_data_hora",
+}
+
+
+@pytest.fixture
+def db():
+    sessao = SessionLocal()
+    try:
+        sessao.connection()
+    except Exception as e:
+        sessao.close()
+        pytest.skip(f"Banco indisponível: {e}")
+    try:
+        yield sessao
+    finally:
+        sessao.rollback()
+        sessao.close()
+
+
+def indices_do_plano(db, consulta):
+    """Nomes dos índices usados em qualquer nó do plano"""
+    # SET LOCAL vale até o rollback da fixture
+    db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+    compilada = consulta.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    plano = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compilada}").scalar()
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+
+    indices = set()
+    pendentes = [plano[0]["Plan"]]
+    while pendentes:
+        no = pendentes.pop()
+        if "Index Name" in no:
+            indices.add(no["Index Name"])
+        pendentes.extend(no.get("Plans", []))
+    return indices
+
+
+# critérios combináveis -> índices aceitos no plano (qualquer um deles)
+INDICES_POR_CRITERIO = [
+    ({"data_inicio": "2024-01-01", "data_fim": "2024-01-31"}, {"ix_agendamentos_data_hora_id"}),
+    ({"status": ["agendado", "confirmado"]}, {"ix_agendamentos_status_data_hora"}),
+    ({"tipo_sessao": ["consulta"], "data_inicio": "2024-01-01"}, {"ix_agendamentos_tipo_sessao_data_hora"}),
+    ({"profissional_responsavel_id": 1}, {"ix_agendamentos_profissional_data_hora"}),
+    # o EXISTS pode partir do participante ou sondar a chave primária por agendamento
+    ({"participante_id": 1}, {"ix_agendamento_participantes_participante_id", "agendamento_participantes_pkey"}),
+]
+
+
+@pytest.mark.parametrize("filtro,indice", sorted(INDICES_POR_FILTRO.items()))
+def test_filtro_da_listagem_usa_indice(db, filtro, indice):
+    consulta = select(models.Agendamento.id)
+    condicao = condicao_filtro_agendamento(filtro)
+    if condicao is not None:
+        consulta = consulta.where(condicao)
+    consulta = consulta.order_by(models.Agendamento.data_hora.desc(), models.Agendamento.id.desc()).limit(7)
+
+    assert indice in indices_do_plano(db, consulta)
+
+
+@pytest.mark.parametrize("criterios,indices", INDICES_POR_CRITERIO)
+def test_criterios_combinados_usam_indice(db, criterios, indices):
+    consulta = (
+        select(models.Agendamento.id)
+        .where(condicao_filtros_combinados(FiltrosAgendamento(**criterios)))
+        .order_by(models.Agendamento.data_hora.desc(), models.Agendamento.id.desc())
+        .limit(7)
+    )
+
+    assert indices & indices_do_plano(db, consulta)
+
+
+def test_busca_reversa_por_participante_usa_indice(db):
+    tabela = models.agendamento_participantes
+    consulta = select(tabela.c.agendamento_id).where(tabela.c.participante_id == 1)
+
+    assert "ix_agendamento_participantes_participante_id" in indices_do_plano(db, consulta)
@@ -0,0 +1,63 @@
+"""
+Itens das listagens montados a partir das tuplas e serializados com orjson, sem banco:
+    python -m pytest backend/tests/test_listagem_rapida.py
+"""
+import json
+from collections import namedtuple
+from datetime import date, datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from backend.database import models
+from backend.schemas.agendamento import AgendamentoItemListagem
+from backend.schemas.cadastro import CadastroItemListagem
+from backend.services import agendamento_service, cadastro_service
+from backend.utils.resposta_json import serializar
+
+
+def test_itens_de_agendamento_seguem_o_modelo_tipado():
+    resumo = [{"id": 1, "nome": "Ana", "email": "ana@exemplo.com", "telefone": None}]
+    linha = (
+        7, "Consulta", datetime(2025, 3, 3, 9, 0, 0, 250000), "consulta", "confirmado", None,
+        90, "Sala 2", 150.0, False, datetime(2025, 3, 1, 8), None, None, 1, resumo,
+    )
+
+    item, = agendamento_service.itens_da_listagem([linha], {})
+
+    assert AgendamentoItemListagem.model_validate(item).participantes_count == 1
+    assert (item["duracao_formatada"], item["status_cor"]) == ("1h 30min", "#10B981")
+    # Mesmo JSON que o caminho anterior (isoformat + json.dumps)
+    assert json.loads(serializar(item)) == json.loads(json.dumps(jsonable_encoder(item)))
+    assert json.loads(serializar(item))["data_hora"] == "2025-03-03T09:00:00.250000"
+
+
+def test_resumo_de_participantes_e_completado_so_quando_incompleto(monkeypatch):
+    monkeypatch.setattr(models, "PARTICIPANTES_NO_RESUMO", 2)
+    pessoas = [
+        models.Cadastro(id=i, nome=f"Pessoa {i}", email=f"p{i}@exemplo.com", telefone=None) for i in (9, 4, 6)
+    ]
+    agendamento = models.Agendamento(id=3, titulo="Reunião", data_hora=datetime(2025, 3, 3, 9), status="agendado")
+    agendamento.definir_participantes(pessoas)
+
+    assert agendamento.participantes_count == 3
+    assert [p["id"] for p in agendamento.participantes_resumo] == [4, 6]
+
+    Linha = namedtuple("Linha", [coluna.key for coluna in agendamento_service.COLUNAS_LISTAGEM])
+    valores = {coluna: getattr(agendamento, coluna, None) for coluna in Linha._fields}
+    incompleta = Linha(**valores)
+    completa = Linha(**{**valores, "id": 5, "participantes_count": 1, "participantes_resumo": [{"id": 1, "nome": "A", "email": None, "telefone": None}]})
+
+    assert agendamento_service.ids_com_resumo_incompleto([incompleta, completa]) == [3]
+    todos = {3: models.resumo_participantes(pessoas) + [{"id": 9, "nome": "Pessoa 9", "email": "p9@exemplo.com", "telefone": None}]}
+    itens = agendamento_service.itens_da_listagem([incompleta, completa], todos)
+    assert [len(item["participantes"]) for item in itens] == [3, 1]
+    assert [item["participantes_count"] for item in itens] == [3, 1]
+
+
+def test_itens_de_cadastro_seguem_o_modelo_tipado():
+    linha = (3, "Bia", "bia@exemplo.com", "11999990000", date(1990, 1, 15), None, datetime(2025, 1, 2, 3, 4, 5))
+
+    item, = cadastro_service.itens_da_listagem([linha])
+
+    assert CadastroItemListagem.model_validate(item).data_nascimento == date(1990, 1, 15)
+    assert json.loads(serializar(item)) == json.loads(json.dumps(jsonable_encoder(item)))
@@ -0,0 +1,67 @@
+"""
+POST /api/agendamentos/bulk: validação do corpo e, com o banco do .env, número
+de comandos constante e um e-mail por destinatário (transação desfeita no final):
+    python -m pytest backend/tests/test_operacoes_lote.py
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import func, select
+
+from backend.database import models
+from backend.schemas.agendamento import AgendamentosLote
+from backend.tests.conftest import criar_agendamento, criar_cadastros
+
+
+@pytest.mark.parametrize("corpo", [
+    {"operacao": "status", "status": "cancelado"},
+    {"operacao": "status", "ids": [1]},
+    {"operacao": "reagendar", "ids": [1]},
+    {"operacao": "arquivar", "ids": [1]},
+    {"operacao": "excluir", "filtro": "hojee"},
+    {"operacao": "excluir", "filtro": "todos"},
+    {"operacao": "excluir", "filtros": {"status": ","}},
+])
+def test_lote_exige_selecao_e_campo_da_operacao(corpo):
+    with pytest.raises(ValidationError):
+        AgendamentosLote(**corpo)
+
+
+def test_lote_aceita_filtro_sem_ids():
+    dados = AgendamentosLote(operacao="excluir", filtro="pendente")
+    assert dados.ids == [] and dados.notificar
+
+
+def test_lote_com_filtro_desconhecido_nao_altera_nada(ambiente):
+    client, sessao, _, _ = ambiente
+    pessoas = criar_cadastros(sessao, 1)
+    agendamento = criar_agendamento(sessao, pessoas[0], pessoas, datetime(2031, 5, 4, 8))
+
+    resposta = client.post("/api/agendamentos/bulk", json={"operacao": "excluir", "filtro": "hojee"})
+    assert resposta.status_code == 422
+    assert sessao.get(models.Agendamento, agendamento.id) is not None
+
+
+def test_lote_com_um_ou_muitos_agendamentos_usa_os_mesmos_comandos(ambiente):
+    client, sessao, contador, _ = ambiente
+    pessoas = criar_cadastros(sessao, 3)
+    inicio = datetime(2031, 5, 5, 8)
+    agendamentos = [criar_agendamento(sessao, pessoas[0], pessoas, inicio + timedelta(hours=i)) for i in range(9)]
+    ids = [agendamento.id for agendamento in agendamentos]
+    sessao.expunge_all()
+
+    def status(selecionados):
+        return client.post("/api/agendamentos/bulk", json={"operacao": "status", "status": "confirmado", "ids": selecionados})
+
+    assert contador.medir(lambda: status(ids[:1])) == contador.medir(lambda: status(ids[1:]))
+
+    emails_antes = sessao.scalar(select(func.count()).select_from(models.EmailPendente))
+    resposta = client.post("/api/agendamentos/bulk", json={"operacao": "excluir", "ids": ids + [0]})
+    assert resposta.status_code == 200, resposta.text
+    corpo = resposta.json()
+    assert corpo["afetados"] == 9 and corpo["nao_encontrados"] == [0]
+    # Três participantes: três e-mails, cada um com os nove agendamentos
+    assert corpo["emails_enfileirados"] == 3
+    assert sessao.scalar(select(func.count()).select_from(models.EmailPendente)) == emails_antes + 3
+    assert sessao.scalar(select(func.count()).select_from(models.Agendamento).where(models.Agendamento.id.in_(ids))) == 0
@@ -0,0 +1,171 @@
+"""
+Renderização e entrega dos lotes do outbox de e-mails, sem banco; a entrega
+usa um servidor SMTP local (aiosmtpd, pulado quando não está instalado). As
+métricas publicadas pelo worker usam o banco do .env (transação desfeita no final):
+    pip install aiosmtpd
+    python -m pytest backend/tests/test_outbox_email.py
+"""
+import asyncio
+import socket
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from jinja2 import DictLoader, Environment
+
+from backend.services.outbox_service import LimiteTaxa, entregar_lote, entregar_lote_async, publicar_metricas
+from backend.utils import email as email_utils
+from backend.utils.email import MetricasEnvio, RenderizadorLote, abrir_conexao_smtp, erro_permanente, render_template
+
+RECUSADO = "recusado@exemplo.com"
+
+
+class Caixa:
+    """Handler do aiosmtpd: guarda as mensagens e as sessões (uma por conexão)"""
+
+    def __init__(self):
+        self.sessoes = []
+        self.entregues = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if session not in self.sessoes:
+            self.sessoes.append(session)
+        if address == RECUSADO:
+            return "550 Caixa inexistente"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.entregues.extend(envelope.rcpt_tos)
+        return "250 Mensagem aceita"
+
+
+def porta_livre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+    monkeypatch.setattr(email_utils, "EMAIL_ADDRESS", "agenda@exemplo.com")
+    caixa = Caixa()
+    porta = porta_livre()
+    controller = aiosmtpd_controller.Controller(caixa, hostname="127.0.0.1", port=porta)
+    controller.start()
+    try:
+        yield caixa, porta
+    finally:
+        controller.stop()
+
+
+def mensagem(id, destinatario, nome="Pessoa"):
+    contexto = {"nome": nome, "titulo": "Reunião", "data_hora": "03/11/2026 10:00", "local": None, "descricao": None}
+    return SimpleNamespace(
+        id=id, destinatario=destinatario, assunto="Novo Agendamento",
+        template="agendamento.html", contexto=contexto, tentativas=1,
+    )
+
+
+def test_lote_usa_uma_conexao_e_separa_recusa_definitiva(servidor):
+    caixa, porta = servidor
+    conectar = lambda: abrir_conexao_smtp("127.0.0.1", porta, "nenhuma", "", "")
+    lote = [mensagem(1, "a@exemplo.com"), mensagem(2, RECUSADO), mensagem(3, "b@exemplo.com")]
+    resultados = {}
+    metricas = MetricasEnvio()
+
+    enviadas = entregar_lote(lote, lambda m, erro: resultados.__setitem__(m.id, erro), conectar=conectar, metricas=metricas)
+
+    assert enviadas == 2
+    assert caixa.entregues == ["a@exemplo.com", "b@exemplo.com"]
+    assert len(caixa.sessoes) == 1
+    assert resultados[1] is None and resultados[3] is None
+    assert erro_permanente(resultados[2])
+    resumo = metricas.resumo()
+    assert (resumo["enviadas"], resumo["falhas_permanentes"], resumo["conexoes_abertas"]) == (2, 1, 1)
+
+
+def test_pool_assincrono_reaproveita_conexoes(servidor):
+    smtp_pool = pytest.importorskip("backend.utils.smtp_pool")
+    caixa, porta = servidor
+    pool = smtp_pool.PoolSMTP(
+        tamanho=2, conectar=lambda: smtp_pool.abrir_conexao_smtp_async("127.0.0.1", porta, "nenhuma", "", ""),
+    )
+    lote = [mensagem(i, f"p{i}@exemplo.com") for i in range(6)] + [mensagem(6, RECUSADO)]
+    resultados = {}
+
+    async def entregar():
+        try:
+            return await entregar_lote_async(lote, lambda m, erro: resultados.__setitem__(m.id, erro), pool)
+        finally:
+            await pool.fechar()
+
+    assert asyncio.run(entregar()) == 6
+    assert sorted(caixa.entregues) == sorted(f"p{i}@exemplo.com" for i in range(6))
+    assert len(caixa.sessoes) <= 2
+    # Recusa definitiva convertida para o smtplib; a conexão continua no pool
+    assert erro_permanente(resultados[6])
+    metricas = pool.metricas.resumo()
+    assert (metricas["enviadas"], metricas["falhas_permanentes"], metricas["conexoes_abertas"]) == (6, 1, len(caixa.sessoes))
+
+
+def test_limite_por_minuto_espera_a_janela():
+    agora = [0.0]
+    esperas = []
+
+    def dormir(segundos):
+        esperas.append(segundos)
+        agora[0] += segundos
+
+    limite = LimiteTaxa(2, relogio=lambda: agora[0], dormir=dormir)
+    for instante in (0, 10, 20, 75):
+        agora[0] = max(agora[0], instante)
+        limite.aguardar()
+
+    assert esperas == [40.0]
+    # Depois da espera a janela volta a ter folga: o envio em 75s não espera
+    assert len(limite.envios) == 2
+
+
+def test_parte_comum_renderizada_uma_vez(monkeypatch):
+    lote = [mensagem(1, "a@exemplo.com", "Ana"), mensagem(2, "b@exemplo.com", "Bruno <b>"), mensagem(3, "c@exemplo.com", "")]
+    esperado = [render_template(m.template, m.contexto) for m in lote]
+    renderizacoes = []
+    original = email_utils.render_template
+    monkeypatch.setattr(email_utils, "render_template", lambda *args: renderizacoes.append(args) or original(*args))
+
+    renderizador = RenderizadorLote()
+    assert [renderizador.renderizar(m.template, m.contexto) for m in lote] == esperado
+    # Ana e Bruno compartilham a parte comum; o nome vazio tem a própria renderização
+    assert len(renderizacoes) == 2
+
+
+def test_campo_transformado_pelo_template_renderiza_inteiro(monkeypatch):
+    monkeypatch.setattr(email_utils, "template_env", Environment(
+        loader=DictLoader({"t.html": "Olá {{ nome|upper }} - {{ titulo }}"})
+    ))
+    renderizador = RenderizadorLote()
+
+    assert renderizador.renderizar("t.html", {"nome": "ana", "titulo": "X"}) == "Olá ANA - X"
+    assert renderizador.renderizar("t.html", {"nome": "bia", "titulo": "X"}) == "Olá BIA - X"
+
+
+def test_health_emails_devolve_as_metricas_dos_workers(ambiente):
+    client, sessao, _, _ = ambiente
+    agora = datetime.now()
+    resumo = {**MetricasEnvio().resumo(), "enviadas": 40, "falhas_temporarias": 3, "timeouts": 1, "envios_por_minuto": 12.5}
+    publicar_metricas(sessao, "teste-a:1", agora - timedelta(hours=2), resumo, agora)
+    publicar_metricas(sessao, "teste-b:2", agora - timedelta(hours=3), {**resumo, "enviadas": 2}, agora - timedelta(hours=1))
+    # Republicar atualiza a mesma linha
+    publicar_metricas(sessao, "teste-a:1", agora - timedelta(hours=2), {**resumo, "enviadas": 50}, agora)
+
+    envio = client.get("/health/emails").json()["envio"]
+
+    workers = {worker["worker"]: worker for worker in envio["workers"] if worker["worker"].startswith("teste-")}
+    assert workers["teste-a:1"]["ativo"] and workers["teste-a:1"]["enviadas"] == 50
+    assert not workers["teste-b:2"]["ativo"]
+    assert envio["total"]["enviadas"] >= 52 and envio["total"]["falhas_temporarias"] >= 6
+    # Só os workers ativos entram na vazão
+    assert envio["total"]["envios_por_minuto"] >= 12.5
+
@@ -0,0 +1,99 @@
+"""
+Cursor da paginação por chave (data_hora desc, id desc): codificação sem banco;
+percorrer a listagem com a fixture ambiente usa o banco do .env:
+    python -m pytest backend/tests/test_paginacao.py
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.tests.conftest import criar_agendamento, criar_cadastros
+from backend.utils.paginacao import (
+    DIRECAO_ANTERIOR,
+    DIRECAO_PROXIMA,
+    CursorInvalido,
+    codificar_cursor,
+    decodificar_cursor,
+)
+
+
+def cursor_de(dados) -> str:
+    return base64.urlsafe_b64encode(json.dumps(dados).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("direcao", [DIRECAO_PROXIMA, DIRECAO_ANTERIOR])
+def test_cursor_ida_e_volta(direcao):
+    data_hora = datetime(2025, 3, 3, 9, 30, 15, 123456)
+    cursor = codificar_cursor(data_hora, 42, direcao)
+
+    assert "=" not in cursor
+    assert decodificar_cursor(cursor) == (data_hora, 42, direcao)
+
+
+def test_cursor_sem_direcao_segue_para_a_proxima():
+    assert decodificar_cursor(cursor_de({"d": "2025-03-03T09:00:00", "i": 7})) == (datetime(2025, 3, 3, 9), 7, DIRECAO_PROXIMA)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "!!!",
+    "bm8tanNvbg",  # "no-json"
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    cursor_de([1, 2, 3]),
+    cursor_de({"i": 1}),
+    cursor_de({"d": "2025-03-03T09:00:00"}),
+    cursor_de({"d": "ontem", "i": 1}),
+    cursor_de({"d": 20250303, "i": 1}),
+    cursor_de({"d": "2025-03-03T09:00:00+00:00", "i": 1}),
+    cursor_de({"d": "2025-03-03T09:00:00", "i": "1; DROP TABLE agendamentos"}),
+    cursor_de({"d": "2025-03-03T09:00:00", "i": True}),
+    cursor_de({"d": "2025-03-03T09:00:00", "i": 1.5}),
+    cursor_de({"d": "2025-03-03T09:00:00", "i": 2**31}),
+    cursor_de({"d": "2025-03-03T09:00:00", "i": 1, "p": "lado"}),
+])
+def test_cursor_malformado_ou_adulterado(cursor):
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor(cursor)
+
+
+def test_cursor_percorre_horarios_empatados_sem_pular_nem_repetir(ambiente):
+    client, sessao, _, _ = ambiente
+    dono, = criar_cadastros(sessao, 1)
+    inicio = datetime(2031, 8, 1, 8)
+    # Três agendamentos no mesmo horário em cada um de três horários
+    for hora in range(3):
+        for _ in range(3):
+            criar_agendamento(sessao, dono, [dono], inicio + timedelta(hours=hora))
+    url = f"/api/agendamentos/?participante_id={dono.id}&paginacao=cursor&limit=2&contagem=nenhuma"
+
+    esperado = [item["id"] for item in client.get(f"/api/agendamentos/?participante_id={dono.id}&limit=50").json()["agendamentos"]]
+    paginas, cursor = [], None
+    while True:
+        corpo = client.get(url + (f"&cursor={cursor}" if cursor else "")).json()
+        paginas.append([item["id"] for item in corpo["agendamentos"]])
+        cursor = corpo["proximoCursor"]
+        if cursor is None:
+            break
+        assert corpo["temProxima"]
+
+    assert [id_ for pagina in paginas for id_ in pagina] == esperado
+    assert len(esperado) == 9 and len(paginas) == 5
+
+    # De volta pelas páginas anteriores, a partir da última
+    anteriores, cursor = [], corpo["cursorAnterior"]
+    while cursor is not None:
+        corpo = client.get(url + f"&cursor={cursor}").json()
+        anteriores.append([item["id"] for item in corpo["agendamentos"]])
+        cursor = corpo["cursorAnterior"]
+    assert anteriores == paginas[-2::-1]
+
+
+def test_cursor_adulterado_na_rota_devolve_400(ambiente):
+    client, _, _, _ = ambiente
+    adulterado = cursor_de({"d": "2025-03-03T09:00:00", "i": "x"})
+
+    resposta = client.get(f"/api/agendamentos/?paginacao=cursor&cursor={adulterado}")
+
+    assert resposta.status_code == 400
@@ -0,0 +1,105 @@
+"""
+Expansão das séries de agendamentos (recorrencia_service.expandir), sem banco;
+os testes com a fixture ambiente usam o banco do .env (transação desfeita no final):
+    python -m pytest backend/tests/test_recorrencias.py
+"""
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from backend.database import models
+from backend.services import agendamento_service
+from backend.services.recorrencia_service import expandir, ocorrencia_do_dia
+from backend.tests.conftest import criar_cadastros, criar_serie
+
+
+def regra(**campos):
+    padrao = {"intervalo": 1, "dias_semana": [], "ate": None, "contagem": None, "excecoes": []}
+    return SimpleNamespace(**{**padrao, **campos})
+
+
+def test_semanal_em_varios_dias():
+    serie = regra(inicio=datetime(2025, 1, 1, 10), frequencia="semanal", dias_semana=[0, 2])
+
+    assert expandir(serie, None, datetime(2025, 1, 14)) == [
+        datetime(2025, 1, 1, 10),
+        datetime(2025, 1, 6, 10),
+        datetime(2025, 1, 8, 10),
+        datetime(2025, 1, 13, 10),
+    ]
+
+
+def test_janela_salta_direto_sem_mudar_o_resultado():
+    serie = regra(inicio=datetime(2020, 1, 6, 9), frequencia="semanal", intervalo=3, dias_semana=[1, 4])
+    janela = (datetime(2025, 6, 1), datetime(2026, 1, 1))
+    desde_o_inicio = [ocorrencia for ocorrencia in expandir(serie, None, janela[1]) if ocorrencia >= janela[0]]
+
+    assert expandir(serie, *janela) == desde_o_inicio
+
+
+def test_mensal_pula_meses_sem_o_dia():
+    serie = regra(inicio=datetime(2024, 1, 31, 8), frequencia="mensal")
+
+    assert expandir(serie, datetime(2024, 2, 1), datetime(2024, 7, 1)) == [
+        datetime(2024, 3, 31, 8),
+        datetime(2024, 5, 31, 8),
+    ]
+
+
+def test_contagem_inclui_excecoes():
+    serie = regra(
+        inicio=datetime(2024, 1, 31, 8), frequencia="mensal", intervalo=2,
+        contagem=3, excecoes=[date(2024, 3, 31)],
+    )
+
+    assert expandir(serie, None, datetime(2030, 1, 1)) == [datetime(2024, 1, 31, 8), datetime(2024, 5, 31, 8)]
+
+
+def test_ate_e_ocorrencia_do_dia():
+    serie = regra(inicio=datetime(2025, 1, 6, 9), frequencia="semanal", ate=date(2025, 1, 20))
+
+    assert len(expandir(serie, None, datetime(2030, 1, 1))) == 3
+    assert ocorrencia_do_dia(serie, date(2025, 1, 13)) == datetime(2025, 1, 13, 9)
+    assert ocorrencia_do_dia(serie, date(2025, 1, 14)) is None
+    assert ocorrencia_do_dia(serie, date(2025, 1, 27)) is None
+
+
+def test_estatisticas_expandem_so_a_janela_consultada(ambiente):
+    _, sessao, _, _ = ambiente
+    dono, = criar_cadastros(sessao, 1)
+    hoje = date(2031, 3, 12)
+    sem_series = agendamento_service.estatisticas_agendamentos(sessao, hoje)["total"]
+    serie = criar_serie(sessao, dono, datetime(2020, 1, 6, 9))
+
+    estatisticas = agendamento_service.estatisticas_agendamentos(sessao, hoje)
+
+    # Semanal: as ocorrências de 1º/03 a 31/03/2031, não as desde 2020
+    na_janela = expandir(serie, datetime(2031, 3, 1), datetime(2031, 4, 1))
+    assert estatisticas["total"] - sem_series == len(na_janela) == 5
+
+
+def test_ocorrencia_sobreposta_ao_profissional_devolve_409(ambiente):
+    client, sessao, _, _ = ambiente
+    existe = sessao.execute(text(
+        "SELECT 1 FROM pg_constraint WHERE conname = 'agendamentos_profissional_sem_sobreposicao'"
+    )).scalar()
+    if not existe:
+        pytest.skip("Restrição da migração 0005 não aplicada")
+    dono, = criar_cadastros(sessao, 1)
+    profissional = models.Funcionario(nome="Profissional", email=f"prof-{dono.id}@exemplo.com")
+    sessao.add(profissional)
+    sessao.flush()
+    serie = criar_serie(sessao, dono, datetime(2031, 6, 2, 9), profissional_responsavel_id=profissional.id)
+    sessao.add(models.Agendamento(
+        titulo="Ocupado", usuario_id=dono.id, data_hora=datetime(2031, 6, 9, 9, 30),
+        tipo_sessao="reuniao", status="agendado", duracao_em_minutos=30,
+        profissional_responsavel_id=profissional.id,
+    ))
+    sessao.flush()
+
+    resposta = client.put(f"/api/agendamentos/recorrencias/{serie.id}/ocorrencias/2031-06-09", json={"titulo": "Editada"})
+
+    assert resposta.status_code == 409, resposta.text
+
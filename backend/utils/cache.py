@@ -0,0 +1,193 @@
+"""
+Cache de respostas das rotas GET.
+
+As chaves incluem a versão do namespace (agendamentos, cadastros, ...); as
+rotas de escrita chamam invalidar(), que troca a versão e torna todas as
+chaves antigas inalcançáveis sem precisar listá-las ou apagá-las.
+
+Configuração (.env):
+    CACHE_BACKEND=memoria|redis   (padrão: memoria)
+    CACHE_TTL=30                  segundos de vida de cada resposta
+    CACHE_MAX_ITENS=1000          limite do LRU em memória
+    REDIS_URL=redis://localhost:6379/0
+"""
+import json
+import math
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+
+from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+
+load_dotenv()
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memoria")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+CACHE_MAX_ITENS = int(os.getenv("CACHE_MAX_ITENS", "1000"))
+CACHE_PREFIXO = os.getenv("CACHE_PREFIXO", "api")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Namespaces cujas respostas também mudam quando outro namespace é alterado
+# (a listagem de agendamentos traz nome/email dos participantes, o dashboard conta tudo).
+DEPENDENCIAS = {
+    "cadastros": ("agendamentos", "dashboard"),
+    "agendamentos": ("dashboard",),
+    "funcionarios": (),
+    "dashboard": (),
+}
+
+
+class CacheMemoria:
+    """LRU em processo com expiração por item"""
+
+    def __init__(self, max_itens: int = CACHE_MAX_ITENS):
+        self._itens: "OrderedDict[str, tuple[Optional[float], str]]" = OrderedDict()
+        self._max_itens = max_itens
+        self._lock = threading.Lock()
+
+    def obter(self, chave: str) -> Optional[str]:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if expira_em is not None and expira_em <= time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def definir(self, chave: str, valor: str, ttl: Optional[float] = None) -> None:
+        expira_em = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._itens[chave] = (expira_em, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self._max_itens:
+                self._itens.popitem(last=False)
+
+    def apagar(self, chave: str) -> None:
+        with self._lock:
+            self._itens.pop(chave, None)
+
+
+class CacheRedis:
+    """
+    Backend compatível com Redis. Aceita qualquer cliente com get/set(ex=)/delete,
+    então um cliente falso em memória pode substituir o Redis nos testes.
+    """
+
+    def __init__(self, cliente):
+        self._cliente = cliente
+
+    def obter(self, chave: str) -> Optional[str]:
+        valor = self._cliente.get(chave)
+        if isinstance(valor, bytes):
+            return valor.decode("utf-8")
+        return valor
+
+    def definir(self, chave: str, valor: str, ttl: Optional[float] = None) -> None:
+        if ttl:
+            self._cliente.set(chave, valor, ex=max(1, math.ceil(ttl)))
+        else:
+            self._cliente.set(chave, valor)
+
+    def apagar(self, chave: str) -> None:
+        self._cliente.delete(chave)
+
+
+class CacheRespostas:
+    """Cache de respostas JSON por rota + parâmetros, com invalidação por namespace"""
+
+    def __init__(self, backend, ttl: float = CACHE_TTL, prefixo: str = CACHE_PREFIXO):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefixo = prefixo
+
+    def _chave_versao(self, namespace: str) -> str:
+        return f"{self.prefixo}:versao:{namespace}"
+
+    def versao(self, namespace: str) -> str:
+        """Versão atual do namespace (criada na primeira consulta)"""
+        try:
+            versao = self.backend.obter(self._chave_versao(namespace))
+            if versao is None:
+                versao = secrets.token_hex(6)
+                self.backend.definir(self._chave_versao(namespace), versao)
+            return versao
+        except Exception as e:
+            print(f"Erro ao ler versão do cache '{namespace}': {e}")
+            return secrets.token_hex(6)
+
+    def invalidar(self, *namespaces: str) -> Dict[str, str]:
+        """Troca a versão dos namespaces (e dos que dependem deles); retorna as versões gravadas"""
+        afetados = set()
+        for namespace in namespaces:
+            afetados.add(namespace)
+            afetados.update(DEPENDENCIAS.get(namespace, ()))
+        versoes = {}
+        for namespace in afetados:
+            versao = secrets.token_hex(6)
+            try:
+                self.backend.definir(self._chave_versao(namespace), versao)
+                versoes[namespace] = versao
+            except Exception as e:
+                print(f"Erro ao invalidar cache '{namespace}': {e}")
+        return versoes
+
+    def chave(self, namespace: str, request) -> str:
+        """
+        Chave da requisição: namespace, versão, validador do banco lido por
+        verificar_etag (backend/utils/etag.py), rota e parâmetros normalizados (ordenados)
+        """
+        parametros = urlencode(sorted(request.query_params.multi_items()))
+        validador = getattr(request.state, "validador_etag", "")
+        return f"{self.prefixo}:{namespace}:{self.versao(namespace)}:{validador}:{request.url.path}?{parametros}"
+
+    def obter(self, chave: str) -> Optional[Any]:
+        try:
+            valor = self.backend.obter(chave)
+        except Exception as e:
+            print(f"Erro ao ler cache: {e}")
+            return None
+        return json.loads(valor) if valor is not None else None
+
+    def definir(self, chave: str, valor: Any) -> None:
+        try:
+            self.backend.definir(chave, json.dumps(jsonable_encoder(valor)), ttl=self.ttl)
+        except Exception as e:
+            print(f"Erro ao gravar cache: {e}")
+
+    def obter_serializado(self, chave: str) -> Optional[bytes]:
+        """Resposta guardada como JSON, para devolver sem decodificar"""
+        try:
+            valor = self.backend.obter(chave)
+        except Exception as e:
+            print(f"Erro ao ler cache: {e}")
+            return None
+        return valor.encode("utf-8") if isinstance(valor, str) else valor
+
+    def definir_serializado(self, chave: str, conteudo: bytes) -> None:
+        """Guarda o corpo JSON já serializado (ver backend/utils/resposta_json.py)"""
+        try:
+            self.backend.definir(chave, conteudo, ttl=self.ttl)
+        except Exception as e:
+            print(f"Erro ao gravar cache: {e}")
+
+
+def criar_cache() -> CacheRespostas:
+    if CACHE_BACKEND == "redis":
+        try:
+            import redis
+
+            return CacheRespostas(CacheRedis(redis.Redis.from_url(REDIS_URL)))
+        except ImportError:
+            print("Pacote 'redis' não instalado; usando cache em memória")
+    return CacheRespostas(CacheMemoria())
+
+
+cache_respostas = criar_cache()
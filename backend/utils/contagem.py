@@ -0,0 +1,85 @@
+import json
+import os
+from typing import Optional, Tuple
+
+from sqlalchemy import text
+
+from backend.utils.cache import CacheMemoria, cache_respostas
+
+CONTAGEM_EXATA = "exata"
+CONTAGEM_ESTIMADA = "estimada"
+CONTAGEM_CACHE = "cache"
+CONTAGEM_NENHUMA = "nenhuma"
+
+PADRAO_ESTRATEGIAS = "^(exata|estimada|cache|nenhuma)$"
+
+# Tempo de vida (segundos) das contagens guardadas pela estratégia "cache"
+CONTAGEM_CACHE_TTL = float(os.getenv("CONTAGEM_CACHE_TTL", "30"))
+# Filtros distintos guardados (LRU); os mais antigos saem primeiro
+CONTAGEM_CACHE_MAX_ITENS = int(os.getenv("CONTAGEM_CACHE_MAX_ITENS", "1000"))
+# Abaixo deste número de linhas estimadas vale mais a pena contar de verdade
+CONTAGEM_LIMITE_EXATA = int(os.getenv("CONTAGEM_LIMITE_EXATA", "1000"))
+
+# A chave leva a versão do namespace da tabela no cache de respostas: as rotas
+# de escrita que chamam cache_respostas.invalidar() descartam também as contagens
+_contagens_em_cache = CacheMemoria(max_itens=CONTAGEM_CACHE_MAX_ITENS)
+
+
+def contar_total(db, count_query, modelo, chave_filtro: str, estrategia: str) -> Tuple[Optional[int], str]:
+    """
+    Calcula o total de uma listagem paginada conforme a estratégia pedida.
+    Retorna (total, estrategia_usada); total é None na estratégia "nenhuma".
+
+    Recebe a Session síncrona; nas rotas assíncronas use `await db.run_sync(contar_total, ...)`.
+    """
+    tabela = modelo.__tablename__
+
+    if estrategia == CONTAGEM_NENHUMA:
+        return None, CONTAGEM_NENHUMA
+
+    if estrategia == CONTAGEM_CACHE:
+        chave = f"{tabela}:{cache_respostas.versao(tabela)}:{chave_filtro}"
+        em_cache = _contagens_em_cache.obter(chave)
+        if em_cache is not None:
+            return em_cache, CONTAGEM_CACHE
+        total = db.execute(count_query).scalar()
+        _contagens_em_cache.definir(chave, total, ttl=CONTAGEM_CACHE_TTL)
+        return total, CONTAGEM_EXATA
+
+    if estrategia == CONTAGEM_ESTIMADA:
+        try:
+            if chave_filtro:
+                estimativa = estimar_por_explain(db, count_query, modelo)
+            else:
+                estimativa = estimar_por_estatisticas(db, tabela)
+        except Exception as e:
+            print(f"Erro ao estimar contagem de {tabela}: {e}")
+            estimativa = None
+        if estimativa is not None and estimativa >= CONTAGEM_LIMITE_EXATA:
+            return estimativa, CONTAGEM_ESTIMADA
+
+    return db.execute(count_query).scalar(), CONTAGEM_EXATA
+
+
+def estimar_por_estatisticas(db, tabela: str) -> Optional[int]:
+    """Lê a estimativa de linhas mantida pelo ANALYZE/autovacuum em pg_class.reltuples"""
+    reltuples = db.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:tabela)"),
+        {"tabela": tabela},
+    ).scalar()
+    # Tabelas nunca analisadas retornam -1 (PostgreSQL 14+) ou 0
+    if reltuples is None or reltuples <= 0:
+        return None
+    return int(reltuples)
+
+
+def estimar_por_explain(db, count_query, modelo) -> Optional[int]:
+    """Usa a estimativa de linhas do planejador (EXPLAIN) para a consulta filtrada"""
+    consulta = count_query.with_only_columns(modelo.id)
+    # Valores embutidos no SQL: o formato de parâmetros varia entre psycopg2 e asyncpg
+    compilada = consulta.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    resultado = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compilada}").scalar()
+    if isinstance(resultado, str):
+        resultado = json.loads(resultado)
+    return int(resultado[0]["Plan"]["Plan Rows"])
+
@@ -1,8 +1,13 @@
+import json
 import os
+import re
 import smtplib
+import time
 from email.message import EmailMessage
+from pathlib import Path
+from typing import Any, Callable, Dict
 from dotenv import load_dotenv
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from fastapi import BackgroundTasks
 
 load_dotenv()
@@ -10,7 +15,35 @@ load_dotenv()
 EMAIL_ADDRESS = os.getenv("EMAIL_USER")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASS")
 
-template_env = Environment(loader=FileSystemLoader("backend/utils/templates"))
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+# ssl (SMTP_SSL, porta 465) | starttls (porta 587) | nenhuma (servidor local, ex.: aiosmtpd)
+SMTP_SEGURANCA = os.getenv("SMTP_SEGURANCA", "ssl")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+# Bytecode dos templates compilados, reaproveitado entre processos (vazio = diretório temporário do sistema)
+TEMPLATES_CACHE_DIR = os.getenv("TEMPLATES_CACHE_DIR") or None
+
+# Caminho absoluto: não depende do diretório de onde a API ou o worker foram iniciados
+template_env = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    bytecode_cache=FileSystemBytecodeCache(TEMPLATES_CACHE_DIR),
+    auto_reload=False,
+)
+
+# Campos que mudam de um destinatário para outro; o resto da mensagem é comum
+CAMPOS_DESTINATARIO = ("nome",)
+MARCADOR_CAMPO = re.compile(r"\x00(\w+)\x00")
+
+
+def precompilar_templates() -> int:
+    """Compila todos os templates (ou os lê do cache de bytecode) antes do primeiro envio"""
+    nomes = template_env.list_templates(extensions=["html"])
+    for nome in nomes:
+        template_env.get_template(nome)
+    return len(nomes)
+
 
 def render_template(template_name: str, context: dict) -> str:
 
@@ -18,6 +51,39 @@ def render_template(template_name: str, context: dict) -> str:
     return template.render(context)
 
 
+class RenderizadorLote:
+    """
+    Renderiza mensagens que só diferem nos CAMPOS_DESTINATARIO: o template é
+    renderizado uma vez por contexto comum, com marcadores no lugar desses
+    campos, e cada destinatário só troca os marcadores pelos próprios valores.
+    Quando o template transforma o campo (filtro, condição) e o marcador some,
+    a mensagem é renderizada inteira.
+    """
+
+    def __init__(self):
+        self.partes = {}
+
+    def renderizar(self, template_name: str, context: dict) -> str:
+        campos = {campo: context[campo] for campo in CAMPOS_DESTINATARIO if context.get(campo)}
+        comum = {chave: valor for chave, valor in context.items() if chave not in campos}
+        chave = (template_name, tuple(sorted(campos)), json.dumps(comum, sort_keys=True, default=str))
+        if chave not in self.partes:
+            self.partes[chave] = self._pre_renderizar(template_name, comum, campos)
+        partes = self.partes[chave]
+        if partes is None:
+            return render_template(template_name, context)
+        return "".join(parte if i % 2 == 0 else str(campos[parte]) for i, parte in enumerate(partes))
+
+    @staticmethod
+    def _pre_renderizar(template_name: str, comum: dict, campos: dict):
+        """Texto comum intercalado com os nomes dos campos, ou None se algum marcador não sobreviveu"""
+        marcado = render_template(template_name, {**comum, **{campo: f"\x00{campo}\x00" for campo in campos}})
+        partes = MARCADOR_CAMPO.split(marcado)
+        if set(partes[1::2]) != set(campos):
+            return None
+        return partes
+
+
 def enviar_email_background(
     background_tasks: BackgroundTasks,
     destinatario: str,
@@ -27,25 +93,122 @@ def enviar_email_background(
 ):
 
     html_content = render_template(template_name, context)
-    print("Conteúdo HTML renderizado:")
-    print(html_content)
     background_tasks.add_task(enviar_email, destinatario, assunto, html_content)
-    
 
-def enviar_email(destinatario: str, assunto: str, html_content: str):
 
+def montar_mensagem(destinatario: str, assunto: str, html_content: str) -> EmailMessage:
     msg = EmailMessage()
     msg["Subject"] = assunto
     msg["From"] = EMAIL_ADDRESS
     msg["To"] = destinatario
     msg.set_content("Seu cliente de e-mail não suporta HTML.")
     msg.add_alternative(html_content, subtype="html")
+    return msg
+
+
+def abrir_conexao_smtp(
+    host: str = None,
+    port: int = None,
+    seguranca: str = None,
+    usuario: str = None,
+    senha: str = None,
+) -> smtplib.SMTP:
+    """
+    Conexão SMTP já autenticada (sem login quando não há usuário/senha, como em
+    um servidor local de testes). Quem abre fecha com quit().
+    """
+    host = host or SMTP_HOST
+    port = port or SMTP_PORT
+    seguranca = seguranca or SMTP_SEGURANCA
+    usuario = usuario if usuario is not None else EMAIL_ADDRESS
+    senha = senha if senha is not None else EMAIL_PASSWORD
+
+    if seguranca == "ssl":
+        smtp = smtplib.SMTP_SSL(host, port, timeout=SMTP_TIMEOUT)
+    else:
+        smtp = smtplib.SMTP(host, port, timeout=SMTP_TIMEOUT)
+        if seguranca == "starttls":
+            smtp.starttls()
+    try:
+        if usuario and senha:
+            smtp.login(usuario, senha)
+    except Exception:
+        smtp.close()
+        raise
+    return smtp
+
+
+def erro_permanente(erro: Exception) -> bool:
+    """
+    Recusas 5xx da mensagem ou do destinatário não melhoram com nova tentativa;
+    rede, 4xx e falha de login (configuração) sim
+    """
+    if isinstance(erro, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(erro, smtplib.SMTPRecipientsRefused):
+        return all(500 <= codigo < 600 for codigo, _ in erro.recipients.values())
+    if isinstance(erro, smtplib.SMTPResponseException):
+        return 500 <= erro.smtp_code < 600
+    return False
+
+
+class MetricasEnvio:
+    """Contadores do envio (vazão, falhas, tempo por mensagem, conexões)"""
+
+    def __init__(self, relogio: Callable[[], float] = time.monotonic):
+        self.relogio = relogio
+        self.inicio = relogio()
+        self.enviadas = 0
+        self.falhas_temporarias = 0
+        self.falhas_permanentes = 0
+        self.timeouts = 0
+        self.conexoes_abertas = 0
+        self.reconexoes = 0
+        self.tempo_total = 0.0
+        self.tempo_maximo = 0.0
+
+    def registrar_envio(self, segundos: float) -> None:
+        self.enviadas += 1
+        self.tempo_total += segundos
+        self.tempo_maximo = max(self.tempo_maximo, segundos)
+
+    def registrar_falha(self, erro: Exception) -> None:
+        if erro_permanente(erro):
+            self.falhas_permanentes += 1
+        else:
+            self.falhas_temporarias += 1
+        if isinstance(erro, TimeoutError):
+            self.timeouts += 1
+
+    def incrementar(self, contador: str) -> None:
+        setattr(self, contador, getattr(self, contador) + 1)
+
+    def resumo(self) -> Dict[str, Any]:
+        minutos = max(self.relogio() - self.inicio, 1e-9) / 60
+        return {
+            "enviadas": self.enviadas,
+            "falhas_temporarias": self.falhas_temporarias,
+            "falhas_permanentes": self.falhas_permanentes,
+            "timeouts": self.timeouts,
+            "conexoes_abertas": self.conexoes_abertas,
+            "reconexoes": self.reconexoes,
+            "envios_por_minuto": round(self.enviadas / minutos, 2),
+            "tempo_medio_ms": round(self.tempo_total / self.enviadas * 1000, 3) if self.enviadas else 0.0,
+            "tempo_maximo_ms": round(self.tempo_maximo * 1000, 3),
+        }
+
+
+def enviar_email(destinatario: str, assunto: str, html_content: str):
+
+    msg = montar_mensagem(destinatario, assunto, html_content)
 
     try:
         print(f"Tentando enviar e-mail para: {destinatario}")
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
-            smtp.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
+        smtp = abrir_conexao_smtp()
+        try:
             smtp.send_message(msg)
+        finally:
+            smtp.quit()
         print(f"E-mail enviado com sucesso para: {destinatario}")
     except Exception as e:
         print("Erro ao enviar e-mail:", str(e))
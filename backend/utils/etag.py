@@ -0,0 +1,123 @@
+"""
+ETags das rotas GET.
+
+O ETag vem de um validador lido do banco, igual para todos os processos e
+qualquer CACHE_BACKEND: max(data_atualizacao) e count(*) das tabelas de origem
+do namespace (TABELAS_ETAG), em uma única consulta. Com If-None-Match igual, o
+304 sai antes da consulta das linhas e da serialização. O validador também
+entra na chave do cache de respostas, então um worker nunca serve do cache um
+corpo mais antigo do que o ETag enviado.
+
+Namespaces sem tabelas de origem caem no ETag pelo hash do corpo (middleware
+etag_por_conteudo): a rota consulta normalmente e só a transferência é economizada.
+"""
+import hashlib
+from datetime import date
+from typing import Optional, Sequence
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from sqlalchemy import func, literal, select, union_all
+
+from backend.database import models
+
+CABECALHOS_ETAG = {"Cache-Control": "no-cache"}
+
+# Tabelas (com data_atualizacao) cujo conteúdo aparece nas respostas de cada namespace
+TABELAS_ETAG = {
+    "cadastros": (models.Cadastro.__table__,),
+    # Ocorrências das séries e nomes dos participantes entram nas listagens
+    "agendamentos": (
+        models.Agendamento.__table__, models.RecorrenciaAgendamento.__table__, models.Cadastro.__table__,
+    ),
+    "dashboard": (models.MetricaDiaria.__table__,),
+}
+
+
+def validador_tabelas(db, tabelas: Sequence) -> str:
+    """
+    max(data_atualizacao) e count(*) de cada tabela em uma consulta (os índices
+    em data_atualizacao da migração 0009 atendem os dois)
+
+    Recebe a Session síncrona; nas rotas assíncronas use `await db.run_sync(validador_tabelas, ...)`.
+    """
+    consulta = union_all(*(
+        select(literal(tabela.name).label("tabela"), func.max(tabela.c.data_atualizacao), func.count())
+        .select_from(tabela)
+        for tabela in tabelas
+    ))
+    linhas = sorted(db.execute(consulta).all())
+    return ";".join(f"{nome}:{maximo.isoformat() if maximo else '-'}:{quantidade}" for nome, maximo, quantidade in linhas)
+
+
+def calcular_etag(validador: str, request: Request) -> str:
+    """
+    ETag fraco a partir do validador das tabelas, da rota, dos parâmetros
+    normalizados e do dia atual (filtros como "hoje" mudam à meia-noite)
+    """
+    parametros = urlencode(sorted(request.query_params.multi_items()))
+    base = f"{validador}:{date.today().isoformat()}:{request.url.path}?{parametros}"
+    return f'W/"{hashlib.sha1(base.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def etag_corresponde(request: Request, etag: str) -> bool:
+    """Comparação fraca com o cabeçalho If-None-Match (aceita lista e '*')"""
+    cabecalho = request.headers.get("if-none-match")
+    if not cabecalho:
+        return False
+    if cabecalho.strip() == "*":
+        return True
+    alvo = etag[2:] if etag.startswith("W/") else etag
+    for candidato in cabecalho.split(","):
+        candidato = candidato.strip()
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == alvo:
+            return True
+    return False
+
+
+async def verificar_etag(namespace: str, request: Request, response: Response, db) -> Optional[Response]:
+    """
+    Define ETag/Cache-Control na resposta e devolve um 304 quando o cliente já tem
+    a versão atual; nesse caso a rota retorna antes de consultar as linhas.
+    """
+    # no-cache: o navegador guarda a resposta, mas sempre revalida com If-None-Match
+    response.headers["Cache-Control"] = "no-cache"
+    tabelas = TABELAS_ETAG.get(namespace)
+    if not tabelas:
+        request.state.etag_por_conteudo = True
+        return None
+    validador = await db.run_sync(validador_tabelas, tabelas)
+    # Usado por cache_respostas.chave: o cache acompanha o mesmo validador
+    request.state.validador_etag = validador
+    etag = calcular_etag(validador, request)
+    response.headers["ETag"] = etag
+    if etag_corresponde(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, **CABECALHOS_ETAG})
+    return None
+
+
+def etag_do_corpo(corpo: bytes) -> str:
+    return f'W/"{hashlib.sha1(corpo).hexdigest()[:20]}"'
+
+
+async def etag_por_conteudo(request: Request, call_next):
+    """
+    Middleware HTTP: nas respostas 200 das rotas cujo namespace não tem tabelas
+    em TABELAS_ETAG, define o ETag pelo corpo e troca a resposta por um 304
+    quando o cliente já tem o mesmo conteúdo
+    """
+    response = await call_next(request)
+    if not getattr(request.state, "etag_por_conteudo", False) or response.status_code != 200:
+        return response
+    corpo = b"".join([pedaco async for pedaco in response.body_iterator])
+    etag = etag_do_corpo(corpo)
+    if etag_corresponde(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, **CABECALHOS_ETAG})
+    resposta = Response(content=corpo, status_code=response.status_code)
+    resposta.raw_headers = [
+        (nome, valor) for nome, valor in response.raw_headers
+        if nome.lower() not in (b"content-length", b"etag")
+    ] + [(b"content-length", str(len(corpo)).encode()), (b"etag", etag.encode())]
+    return resposta
@@ -0,0 +1,89 @@
+"""
+Exportação de consultas em CSV ou NDJSON via StreamingResponse.
+
+As linhas são lidas com cursor no servidor (yield_per) e enviadas em lotes,
+então a memória usada é a de um lote e o primeiro byte sai logo após a
+primeira leitura, qualquer que seja o tamanho do resultado.
+"""
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+from backend.database.database import abrir_sessao
+
+FORMATO_CSV = "csv"
+FORMATO_NDJSON = "ndjson"
+PADRAO_FORMATOS = "^(csv|ndjson)$"
+TIPOS_MIDIA = {
+    FORMATO_CSV: "text/csv; charset=utf-8",
+    FORMATO_NDJSON: "application/x-ndjson",
+}
+
+# Linhas buscadas do banco (e enviadas) por vez
+EXPORTACAO_LOTE = int(os.getenv("EXPORTACAO_LOTE", "2000"))
+
+
+def _valor_csv(valor: Any) -> Any:
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        return "true" if valor else "false"
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _valor_json(valor: Any) -> Any:
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return str(valor)
+
+
+async def gerar_exportacao(consulta, formato: str) -> AsyncIterator[bytes]:
+    """
+    Executa uma consulta Core (select de colunas nomeadas) e entrega o resultado
+    formatado, um lote por vez. Abre a própria sessão: o corpo da resposta é
+    enviado depois que as dependências da rota já encerraram.
+    """
+    colunas = list(consulta.selected_columns.keys())
+
+    if formato == FORMATO_CSV:
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(colunas)
+        yield buffer.getvalue().encode("utf-8")
+
+    async with abrir_sessao() as db:
+        resultado = await db.stream(consulta.execution_options(yield_per=EXPORTACAO_LOTE))
+        try:
+            async for lote in resultado.partitions():
+                if formato == FORMATO_CSV:
+                    buffer = io.StringIO()
+                    escritor = csv.writer(buffer)
+                    escritor.writerows([_valor_csv(valor) for valor in linha] for linha in lote)
+                    yield buffer.getvalue().encode("utf-8")
+                else:
+                    yield "".join(
+                        json.dumps(dict(zip(colunas, linha)), default=_valor_json, ensure_ascii=False) + "\n"
+                        for linha in lote
+                    ).encode("utf-8")
+        finally:
+            await resultado.close()
+
+
+def resposta_exportacao(consulta, formato: str, nome_base: str) -> StreamingResponse:
+    """StreamingResponse com o tipo de mídia e o nome de arquivo do formato pedido"""
+    nome_arquivo = f"{nome_base}_{datetime.now():%Y%m%d_%H%M%S}.{formato}"
+    return StreamingResponse(
+        gerar_exportacao(consulta, formato),
+        media_type=TIPOS_MIDIA[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'},
+    )
@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+DIRECAO_PROXIMA = "proxima"
+DIRECAO_ANTERIOR = "anterior"
+
+# Maior id aceito em um cursor (coluna integer do PostgreSQL)
+ID_MAXIMO = 2**31 - 1
+
+
+class CursorInvalido(ValueError):
+    """Cursor de paginação malformado ou adulterado"""
+
+
+def codificar_cursor(data_hora: datetime, registro_id: int, direcao: str = DIRECAO_PROXIMA) -> str:
+    """Gera um cursor opaco (base64 url-safe) a partir da chave (data_hora, id)"""
+    payload = json.dumps(
+        {"d": data_hora.isoformat(), "i": registro_id, "p": direcao},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, int, str]:
+    """Retorna (data_hora, id, direcao) de um cursor gerado por codificar_cursor"""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        direcao = dados.get("p", DIRECAO_PROXIMA)
+        if direcao not in (DIRECAO_PROXIMA, DIRECAO_ANTERIOR):
+            raise ValueError(f"direção desconhecida: {direcao}")
+        data_hora = datetime.fromisoformat(dados["d"])
+        if data_hora.tzinfo is not None:
+            raise ValueError("data_hora com fuso horário")
+        registro_id = dados["i"]
+        # bool é subclasse de int; ids fora da coluna integer quebrariam a consulta
+        if isinstance(registro_id, bool) or not isinstance(registro_id, int) or not 0 < registro_id <= ID_MAXIMO:
+            raise ValueError(f"id inválido: {registro_id!r}")
+        return data_hora, registro_id, direcao
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise CursorInvalido(f"Cursor inválido: {str(e)}")
@@ -0,0 +1,22 @@
+"""
+Caminho rápido das listagens: o corpo é serializado uma única vez com orjson
+(como o ORJSONResponse do FastAPI), guardado assim no cache de respostas e
+devolvido sem passar de novo pelo response_model e pelo jsonable_encoder.
+Os itens já precisam estar no formato final; o response_model da rota fica
+só como documentação do formato no OpenAPI.
+"""
+from typing import Any
+
+import orjson
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+
+def serializar(conteudo: Any) -> bytes:
+    """JSON em bytes; datetime/date viram ISO 8601 como no jsonable_encoder"""
+    return orjson.dumps(conteudo, default=jsonable_encoder)
+
+
+def resposta_json(conteudo: bytes, response: Response) -> Response:
+    """Resposta com o JSON já serializado e os cabeçalhos que a rota definiu (ETag, Cache-Control)"""
+    return Response(content=conteudo, media_type="application/json", headers=dict(response.headers))
@@ -0,0 +1,156 @@
+"""
+Envio SMTP assíncrono (aiosmtplib) com um pool pequeno de conexões autenticadas.
+
+O worker da fila de e-mails usa este módulo quando o pacote aiosmtplib está
+instalado; sem ele, volta ao smtplib (uma conexão por lote). Os erros do
+aiosmtplib são convertidos nos equivalentes do smtplib, então a classificação
+de erro_permanente e o reagendamento do outbox são os mesmos nos dois caminhos.
+"""
+import asyncio
+import os
+import smtplib
+from email.message import EmailMessage
+from typing import Any, Awaitable, Callable, List, Optional
+
+import aiosmtplib
+
+from backend.utils.email import (
+    EMAIL_ADDRESS,
+    EMAIL_PASSWORD,
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_SEGURANCA,
+    SMTP_TIMEOUT,
+    MetricasEnvio,
+    erro_permanente,
+)
+
+# Conexões abertas ao mesmo tempo (e envios simultâneos)
+EMAIL_CONEXOES = int(os.getenv("EMAIL_CONEXOES", "3"))
+# Tempo máximo para conectar ou entregar uma mensagem
+EMAIL_TIMEOUT_MENSAGEM = float(os.getenv("EMAIL_TIMEOUT_MENSAGEM", "30"))
+
+
+async def abrir_conexao_smtp_async(
+    host: str = None,
+    port: int = None,
+    seguranca: str = None,
+    usuario: str = None,
+    senha: str = None,
+) -> aiosmtplib.SMTP:
+    """Equivalente assíncrono de abrir_conexao_smtp (mesmos padrões e regras de login)"""
+    host = host or SMTP_HOST
+    port = port or SMTP_PORT
+    seguranca = seguranca or SMTP_SEGURANCA
+    usuario = usuario if usuario is not None else EMAIL_ADDRESS
+    senha = senha if senha is not None else EMAIL_PASSWORD
+
+    smtp = aiosmtplib.SMTP(
+        hostname=host,
+        port=port,
+        use_tls=seguranca == "ssl",
+        start_tls=seguranca == "starttls",
+        timeout=SMTP_TIMEOUT,
+    )
+    await smtp.connect()
+    try:
+        if usuario and senha:
+            await smtp.login(usuario, senha)
+    except Exception:
+        smtp.close()
+        raise
+    return smtp
+
+
+def como_smtplib(erro: Exception) -> Exception:
+    """Converte um erro do aiosmtplib no equivalente do smtplib"""
+    if isinstance(erro, aiosmtplib.SMTPRecipientsRefused):
+        return smtplib.SMTPRecipientsRefused(
+            {recusa.recipient: (recusa.code, recusa.message) for recusa in erro.recipients}
+        )
+    if isinstance(erro, aiosmtplib.SMTPAuthenticationError):
+        return smtplib.SMTPAuthenticationError(erro.code, erro.message)
+    if isinstance(erro, aiosmtplib.SMTPRecipientRefused):
+        return smtplib.SMTPRecipientsRefused({erro.recipient: (erro.code, erro.message)})
+    if isinstance(erro, aiosmtplib.SMTPSenderRefused):
+        return smtplib.SMTPSenderRefused(erro.code, erro.message, erro.sender)
+    if isinstance(erro, aiosmtplib.SMTPResponseException):
+        return smtplib.SMTPResponseException(erro.code, erro.message)
+    if isinstance(erro, aiosmtplib.SMTPServerDisconnected):
+        return smtplib.SMTPServerDisconnected(str(erro))
+    if isinstance(erro, (asyncio.TimeoutError, aiosmtplib.SMTPTimeoutError)):
+        return TimeoutError(str(erro) or "Tempo esgotado no envio SMTP")
+    return erro
+
+
+class PoolSMTP:
+    """
+    Até `tamanho` conexões autenticadas, reaproveitadas entre mensagens e lotes;
+    `tamanho` também limita os envios simultâneos. Uma conexão que falha de
+    forma temporária é descartada; uma recusa definitiva (5xx) não a afeta.
+    """
+
+    def __init__(
+        self,
+        tamanho: int = EMAIL_CONEXOES,
+        conectar: Callable[[], Awaitable[Any]] = abrir_conexao_smtp_async,
+        timeout: float = EMAIL_TIMEOUT_MENSAGEM,
+        metricas: Optional[MetricasEnvio] = None,
+    ):
+        self.tamanho = tamanho
+        self.conectar = conectar
+        self.timeout = timeout
+        self.metricas = metricas or MetricasEnvio()
+        self._semaforo = asyncio.Semaphore(tamanho)
+        self._livres: List[Any] = []
+
+    async def _abrir(self):
+        smtp = await asyncio.wait_for(self.conectar(), self.timeout)
+        self.metricas.incrementar("conexoes_abertas")
+        return smtp
+
+    async def enviar(self, email: EmailMessage) -> None:
+        """Entrega a mensagem ou levanta o erro já convertido para o smtplib"""
+        async with self._semaforo:
+            inicio = self.metricas.relogio()
+            smtp = self._livres.pop() if self._livres else None
+            try:
+                try:
+                    if smtp is None:
+                        smtp = await self._abrir()
+                    await asyncio.wait_for(smtp.send_message(email), self.timeout)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # Conexão ociosa derrubada pelo servidor: uma nova tentativa com outra
+                    _descartar(smtp)
+                    smtp = None
+                    self.metricas.incrementar("reconexoes")
+                    smtp = await self._abrir()
+                    await asyncio.wait_for(smtp.send_message(email), self.timeout)
+            except Exception as e:
+                erro = como_smtplib(e)
+                self.metricas.registrar_falha(erro)
+                if smtp is not None:
+                    if erro_permanente(erro):
+                        self._livres.append(smtp)
+                    else:
+                        _descartar(smtp)
+                raise erro from e
+            self._livres.append(smtp)
+            self.metricas.registrar_envio(self.metricas.relogio() - inicio)
+
+    async def fechar(self) -> None:
+        livres, self._livres = self._livres, []
+        for smtp in livres:
+            try:
+                await asyncio.wait_for(smtp.quit(), self.timeout)
+            except Exception:
+                _descartar(smtp)
+
+
+def _descartar(smtp) -> None:
+    if smtp is None:
+        return
+    try:
+        smtp.close()
+    except Exception:
+        pass
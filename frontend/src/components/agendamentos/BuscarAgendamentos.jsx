@@ -111,17 +111,17 @@ function BuscarAgendamento() {
 
         console.log(` Buscando agendamentos com filtros`);
 
-        let filtroAPI = '';
-
+        // Data e tipo são filtrados no servidor; só o texto livre é filtrado aqui
+        const parametros = new URLSearchParams({ limit: '50', skip: '0' });
         if (filtroTipo) {
-          filtroAPI = filtroTipo;
-        } else if (filtroData) {
-          filtroAPI = 'todos';
-        } else {
-          filtroAPI = 'todos';
+          parametros.append('tipo_sessao', filtroTipo);
+        }
+        if (filtroData) {
+          parametros.append('data_inicio', filtroData);
+          parametros.append('data_fim', filtroData);
         }
 
-        const url = `/api/agendamentos/?limit=50&skip=0&filtro=${filtroAPI}`;
+        const url = `/api/agendamentos/?${parametros.toString()}`;
         console.log(`📡 Fazendo requisição para: ${url}`);
 
         const response = await fetchApi(url);
@@ -153,13 +153,8 @@ function BuscarAgendamento() {
                 p.nome.toLowerCase().includes(searchTerm.trim().toLowerCase()) ||
                 p.email.toLowerCase().includes(searchTerm.trim().toLowerCase())
               ));
-          const matchData = !filtroData ||
-            (agendamento.data_hora &&
-              new Date(agendamento.data_hora).toISOString().split('T')[0] === filtroData);
-
-          const matchTipo = !filtroTipo || agendamento.tipo_sessao === filtroTipo;
 
-          return matchTexto && matchData && matchTipo;
+          return matchTexto;
         });
       }
 
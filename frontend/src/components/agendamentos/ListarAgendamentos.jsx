@@ -2,6 +2,11 @@ import { useEffect, useState, useCallback } from "react";
 import { Calendar, Clock, MapPin, Users, FileText, List, X, ChevronLeft, ChevronRight, DollarSign, Edit, Trash2, Check, MoreVertical, AlertCircle, Filter, ChevronDown, Save } from 'lucide-react';
 import fetchApi from "../../utils/fetchApi";
 
+// Ocorrências de séries ainda não gravadas são editadas e excluídas pela rota da série
+const urlDoAgendamento = (agendamento) => agendamento.ocorrencia_virtual
+  ? `/api/agendamentos/recorrencias/${agendamento.recorrencia_id}/ocorrencias/${agendamento.ocorrencia_dia}`
+  : `/api/agendamentos/${agendamento.id}`;
+
 function ListarAgendamentos() {
   const [agendamentos, setAgendamentos] = useState([]);
   const [carregando, setCarregando] = useState(true);
@@ -188,7 +193,7 @@ function ListarAgendamentos() {
       setProcessando(true);
       const novoStatus = !agendamento.concluido;
       
-      const response = await fetchApi(`/api/agendamentos/${agendamento.id}`, {
+      const response = await fetchApi(urlDoAgendamento(agendamento), {
         method: 'PUT',
         headers: {
           'Content-Type': 'application/json',
@@ -234,7 +239,8 @@ function ListarAgendamentos() {
     try {
       setProcessando(true);
       
-      await fetchApi(`/api/agendamentos/${agendamentoId}`, {
+      const agendamento = agendamentos.find(ag => ag.id === agendamentoId) || { id: agendamentoId };
+      await fetchApi(urlDoAgendamento(agendamento), {
         method: 'DELETE',
       });
 
@@ -272,6 +278,7 @@ function ListarAgendamentos() {
     
     setDadosEdicao({
       id: agendamento.id,
+      url: urlDoAgendamento(agendamento),
       titulo: agendamento.titulo || '',
       data: data,
       hora: hora,
@@ -310,7 +317,7 @@ function ListarAgendamentos() {
         participantes_ids: dadosEdicao.participantes_ids || []
       };
 
-      const response = await fetchApi(`/api/agendamentos/${dadosEdicao.id}`, {
+      const response = await fetchApi(dadosEdicao.url, {
         method: 'PUT',
         headers: {
           'Content-Type': 'application/json',
@@ -64,7 +64,8 @@ export default async function fetchApi(url, options = {}) {
         return response.data;
 
     } catch (error) {
-        const errorMessage = error.response?.data?.detail ||
+        const errorMessage = error.response?.data?.detail?.mensagem ||
+            error.response?.data?.detail ||
             error.response?.data?.message ||
             error.message ||
             'Erro desconhecido na API';